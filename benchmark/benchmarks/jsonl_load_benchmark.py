@@ -0,0 +1,160 @@
+"""
+Load-time benchmark for RGB data files and prior outputs: full parse vs. line-offset index.
+
+For each query count, times the previous approach (json.loads of every line)
+against `load_dataset` cold (no index on disk), warm (saved index, new process)
+and cached (repeated call in the same process, as on a second button click).
+Also times `load_used_data` plus one lookup per query against parsing the whole
+previous output file into a dict.
+
+Uses data/<file> when it has been downloaded, otherwise a synthetic file of
+RGB-sized records, so it runs offline.
+
+Usage (from the benchmark directory):
+    python -m benchmarks.jsonl_load_benchmark --queries 10 100 300 --output jsonl_load.json
+"""
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import logging
+import tempfile
+import statistics
+
+import scripts.helper as helper
+import scripts.jsonl_index as jsonl_index
+from scripts.jsonl_index import index_path
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_dataset(path, num_records, passages, words_per_passage, seed=0):
+    """Write a synthetic RGB-style dataset: a query, answers and positive/negative passages per record."""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(num_records):
+            passage = lambda: " ".join(rng.choices(vocabulary, k=words_per_passage))
+            record = {
+                "id": i,
+                "query": passage()[:80],
+                "answer": [rng.choice(vocabulary)],
+                "positive": [passage() for _ in range(passages)],
+                "negative": [passage() for _ in range(passages)],
+            }
+            f.write(json.dumps(record) + "\n")
+
+def make_outputs(dataset_path, path):
+    """Write a prediction file like the evaluators produce, one record per dataset record."""
+    with open(dataset_path, encoding="utf-8") as src, open(path, "w", encoding="utf-8") as f:
+        for line in src:
+            instance = json.loads(line)
+            f.write(json.dumps({
+                "id": instance["id"], "query": instance["query"], "ans": instance["answer"], "label": [1],
+                "prediction": "answer", "docs": instance["positive"][:5], "noise_rate": 0.4, "factlabel": 0
+            }) + "\n")
+
+def full_parse_dataset(path, num_records):
+    """The previous load_dataset: parse every line, then slice."""
+    dataset = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            dataset.append(json.loads(line.strip()))
+    return dataset[:num_records]
+
+def full_parse_used_data(path, ids):
+    """The previous load_used_data, followed by the evaluators' lookups."""
+    used_data = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            data = json.loads(line)
+            used_data[data["id"]] = data
+    return [used_data[record_id]["query"] for record_id in ids if record_id in used_data]
+
+def indexed_used_data(path, ids):
+    used_data = helper.load_used_data(path)
+    return [used_data[record_id]["query"] for record_id in ids if record_id in used_data]
+
+def clear_process_caches():
+    jsonl_index._indexes.clear()
+    helper._dataset_cache.clear()
+
+def remove_index(path):
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
+
+def timed(fn, repeat, setup=None):
+    """Median milliseconds of fn() over `repeat` runs, with setup() run untimed before each."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-parse vs. indexed loading of RGB JSONL files.")
+    parser.add_argument("--data-file", default="en_refine.json", help="File under data/ to use when it exists")
+    parser.add_argument("--queries", nargs="+", type=int, default=[10, 100, 300], help="num_queries values to test")
+    parser.add_argument("--records", type=int, default=300, help="Records of the synthetic dataset")
+    parser.add_argument("--passages", type=int, default=25, help="Positive and negative passages per synthetic record")
+    parser.add_argument("--words", type=int, default=120, help="Words per synthetic passage")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="jsonl_load.json", help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        dataset_path = os.path.join(work_dir, "data", args.data_file)
+        os.makedirs(os.path.dirname(dataset_path))
+        if os.path.exists(os.path.join("data", args.data_file)):
+            shutil.copy(os.path.join("data", args.data_file), dataset_path)
+            source = f"data/{args.data_file}"
+        else:
+            make_dataset(dataset_path, args.records, args.passages, args.words)
+            source = "synthetic"
+        outputs_path = os.path.join(work_dir, "prediction.json")
+        make_outputs(dataset_path, outputs_path)
+        print(f"Dataset: {source}, {os.path.getsize(dataset_path) / 1e6:.1f} MB; "
+              f"outputs: {os.path.getsize(outputs_path) / 1e6:.1f} MB")
+
+        # load_dataset reads data/<file> relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        results = []
+        print(f"{'queries':>8} {'full ms':>9} {'cold ms':>9} {'warm ms':>9} {'cached ms':>10} {'outputs full ms':>16} {'outputs idx ms':>15}")
+        try:
+            relative_path = os.path.join("data", args.data_file)
+            for num_queries in args.queries:
+                ids = list(range(num_queries))
+                result = {
+                    "queries": num_queries,
+                    "full_parse_ms": timed(lambda: full_parse_dataset(relative_path, num_queries), args.repeat),
+                    "index_cold_ms": timed(lambda: helper.load_dataset(args.data_file, num_queries), args.repeat,
+                                           setup=lambda: (clear_process_caches(), remove_index(relative_path))),
+                    "index_warm_ms": timed(lambda: helper.load_dataset(args.data_file, num_queries), args.repeat,
+                                           setup=clear_process_caches),
+                    "cached_ms": timed(lambda: helper.load_dataset(args.data_file, num_queries), args.repeat),
+                    "outputs_full_parse_ms": timed(lambda: full_parse_used_data(outputs_path, ids), args.repeat),
+                    "outputs_indexed_ms": timed(lambda: indexed_used_data(outputs_path, ids), args.repeat,
+                                                setup=clear_process_caches),
+                }
+                assert helper.load_dataset(args.data_file, num_queries) == full_parse_dataset(relative_path, num_queries)
+                results.append(result)
+                print(f"{num_queries:>8} {result['full_parse_ms']:>9.2f} {result['index_cold_ms']:>9.2f} "
+                      f"{result['index_warm_ms']:>9.2f} {result['cached_ms']:>10.3f} "
+                      f"{result['outputs_full_parse_ms']:>16.2f} {result['outputs_indexed_ms']:>15.2f}")
+        finally:
+            os.chdir(cwd)
+    finally:
+        shutil.rmtree(work_dir)
+
+    with open(args.output, "w") as f:
+        json.dump({"settings": vars(args), "source": source, "results": results}, f, indent=4)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
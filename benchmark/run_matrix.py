@@ -0,0 +1,215 @@
+"""
+Headless runner for the full RGB evaluation matrix.
+
+Expands models x noise rates x tasks into a job graph, in which each model's
+negative rejection job waits for its noise-1.0 noise robustness predictions,
+and runs independent jobs concurrently. Requests to each model are paced by
+the per-model budgets in `requests_per_minute` of config.json, shared by all
+of that model's jobs. With --resume, jobs whose scores file already exists are
+skipped and partial runs continue from their saved outputs and checkpoints.
+Prints wall-clock time, request totals and the populated score tables at the end.
+
+Usage (from the benchmark directory):
+    python run_matrix.py --resume
+    python run_matrix.py --models llama3-8b-8192 gemma2-9b-it --noise-rates 0.2 1.0 --tasks noise negative
+"""
+import os
+import sys
+import copy
+import time
+import argparse
+import logging
+from itertools import chain, zip_longest
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from scripts.evaluate_factual_robustness import evaluate_factual_robustness
+from scripts.evaluate_information_integration import evaluate_information_integration
+from scripts.evaluate_negative_rejection import evaluate_negative_rejection
+from scripts.evaluate_noise_robustness import evaluate_noise_robustness
+from scripts.get_scores import (Counterfactual_Robustness_DIR, Infomration_Integration_DIR, Negative_Rejection_DIR,
+                                Noise_Robustness_DIR, load_counterfactual_robustness_scores,
+                                load_negative_rejection_scores, load_scores_common)
+from scripts.groq_client import process_stats, set_rate_limit
+from scripts.helper import load_config, update_config
+from scripts.prediction_store import get_prediction_store
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+NOISE_RATES = [0.2, 0.4, 0.6, 0.8, 1.0]
+COUNTERFACTUAL_NOISE_RATE = 0.4  # The counterfactual score table reads its scores file at this noise rate
+
+# Task name -> (evaluator, directory of its scores files)
+TASKS = {
+    "noise": (evaluate_noise_robustness, Noise_Robustness_DIR),
+    "negative": (evaluate_negative_rejection, Negative_Rejection_DIR),
+    "counterfactual": (evaluate_factual_robustness, Counterfactual_Robustness_DIR),
+    "integration": (evaluate_information_integration, Infomration_Integration_DIR),
+}
+
+class MatrixJob:
+    def __init__(self, task, model, noise_rate, depends_on=()):
+        """
+        One evaluator run for a model at a noise rate.
+
+        Args:
+            task (str): Key of TASKS.
+            model (str): Model name from config['models'].
+            noise_rate (float): Noise rate the scores file is named after.
+            depends_on (tuple): Jobs that must succeed before this one starts.
+        """
+        self.task = task
+        self.model = model
+        self.noise_rate = noise_rate
+        self.depends_on = depends_on
+        self.name = f"{task}/{model}/noise_{noise_rate}"
+        self.status = "pending"
+        self.seconds = None
+        self.error = None
+
+    def job_config(self, config):
+        """A private copy of the config for this job; the evaluators modify the config they are given."""
+        job_config = copy.deepcopy(config)
+        return update_config(job_config, self.model, self.noise_rate)
+
+    def score_file(self, config):
+        job_config = self.job_config(config)
+        return os.path.join(TASKS[self.task][1], f"scores_{job_config['output_file_extension']}.json")
+
+    def run(self, config):
+        start = time.perf_counter()
+        try:
+            TASKS[self.task][0](self.job_config(config))
+            if not os.path.exists(self.score_file(config)):
+                raise RuntimeError("evaluator finished without writing a scores file")
+            self.status = "done"
+        except Exception as e:
+            logging.exception(f"Job {self.name} failed")
+            self.status = "failed"
+            self.error = str(e)
+        self.seconds = time.perf_counter() - start
+        return self
+
+def build_jobs(models, noise_rates, tasks):
+    """
+    Expand the matrix into jobs, interleaved across models so that concurrent jobs
+    draw on different models' rate budgets.
+
+    Negative rejection scores the noise-1.0 noise robustness predictions, so that
+    job is added (and depended on) whenever negative rejection is requested.
+    """
+    per_model = []
+    for model in models:
+        jobs = []
+        noise_jobs = {}
+        noise_job_rates = list(noise_rates) if "noise" in tasks else []
+        if "negative" in tasks and 1.0 not in noise_job_rates:
+            noise_job_rates.append(1.0)
+        for noise_rate in noise_job_rates:
+            noise_jobs[noise_rate] = MatrixJob("noise", model, noise_rate)
+            jobs.append(noise_jobs[noise_rate])
+        if "integration" in tasks:
+            jobs.extend(MatrixJob("integration", model, noise_rate) for noise_rate in noise_rates)
+        if "counterfactual" in tasks:
+            jobs.append(MatrixJob("counterfactual", model, COUNTERFACTUAL_NOISE_RATE))
+        if "negative" in tasks:
+            jobs.append(MatrixJob("negative", model, 1.0, depends_on=(noise_jobs[1.0],)))
+        per_model.append(jobs)
+    return [job for job in chain.from_iterable(zip_longest(*per_model)) if job is not None]
+
+def run_jobs(jobs, config, max_jobs, max_jobs_per_model):
+    """Run jobs as their dependencies complete, at most max_jobs at once and max_jobs_per_model per model."""
+    finished = {"done", "skipped"}
+    pending = [job for job in jobs if job.status == "pending"]
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="matrix") as executor:
+        while pending or running:
+            for job in list(pending):
+                if any(dep.status in ("failed", "blocked") for dep in job.depends_on):
+                    job.status = "blocked"
+                    pending.remove(job)
+                    logging.warning(f"Job {job.name} blocked by a failed dependency")
+                    continue
+                if len(running) >= max_jobs or not all(dep.status in finished for dep in job.depends_on):
+                    continue
+                if sum(1 for other in running.values() if other.model == job.model) >= max_jobs_per_model:
+                    continue
+                job.status = "running"
+                pending.remove(job)
+                running[executor.submit(job.run, config)] = job
+                logging.info(f"Started {job.name} ({len(running)} running, {len(pending)} waiting)")
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                logging.info(f"Finished {job.name}: {job.status} in {job.seconds:.1f}s")
+
+def print_report(jobs, config, wall_clock):
+    print(f"\nWall-clock time: {wall_clock:.1f}s")
+    counts = {status: sum(1 for job in jobs if job.status == status) for status in ("done", "skipped", "failed", "blocked")}
+    print("Jobs: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+    for job in jobs:
+        if job.status in ("failed", "blocked"):
+            print(f"  {job.status}: {job.name}" + (f" ({job.error})" if job.error else ""))
+
+    summary = process_stats.summary()
+    print(f"API requests: {summary['requests']} ({summary['retries']} retries, {summary['failures']} failed), "
+          f"{summary['prompt_tokens']}+{summary['completion_tokens']} tokens")
+    hit_rates = get_prediction_store(config.get('prediction_store_path')).hit_rates()
+    print(f"Prediction store hits: {sum(rates['hits'] for rates in hit_rates.values())}")
+
+    tables = [
+        ("Noise Robustness (accuracy %)", load_scores_common(Noise_Robustness_DIR, copy.deepcopy(config))),
+        ("Negative Rejection", load_negative_rejection_scores(copy.deepcopy(config))),
+        ("Counterfactual Robustness", load_counterfactual_robustness_scores(copy.deepcopy(config))),
+        ("Information Integration (accuracy %)", load_scores_common(Infomration_Integration_DIR, copy.deepcopy(config))),
+    ]
+    for title, table in tables:
+        print(f"\n{title}")
+        print(table.to_string(index=False) if not table.empty else "(no scores)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RGB evaluation matrix without the UI.")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--models", nargs="+", help="Defaults to every model in the config")
+    parser.add_argument("--noise-rates", nargs="+", type=float, default=NOISE_RATES)
+    parser.add_argument("--tasks", nargs="+", choices=list(TASKS), default=list(TASKS))
+    parser.add_argument("--num-queries", type=int, help="Defaults to num_queries in the config")
+    parser.add_argument("--jobs", type=int, default=4, help="Jobs running at once")
+    parser.add_argument("--jobs-per-model", type=int, default=2, help="Jobs running at once for one model")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip jobs whose scores file exists and reuse saved outputs of the others")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not config:
+        sys.exit(f"Could not load {args.config}")
+    models = args.models or config['models']
+    unknown = [model for model in models if model not in config['models']]
+    if unknown:
+        sys.exit(f"Models not in {args.config}: {', '.join(unknown)}")
+    config['models'] = models
+    config['UsePreCalculatedValue'] = args.resume
+    if args.num_queries is not None:
+        config['num_queries'] = args.num_queries
+
+    budgets = config.get('requests_per_minute', {})
+    for model in models:
+        set_rate_limit(model, budgets.get(model, budgets.get('default')))
+
+    jobs = build_jobs(models, args.noise_rates, args.tasks)
+    if args.resume:
+        for job in jobs:
+            if os.path.exists(job.score_file(config)):
+                job.status = "skipped"
+    logging.info(f"Matrix of {len(jobs)} jobs, {sum(1 for job in jobs if job.status == 'skipped')} already scored")
+
+    start = time.perf_counter()
+    run_jobs(jobs, config, max(1, args.jobs), max(1, args.jobs_per_model))
+    print_report(jobs, config, time.perf_counter() - start)
+    if any(job.status in ("failed", "blocked") for job in jobs):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,18 @@ import tqdm
 import logging
 from scripts.get_prediction_file import get_prediction_file
 from scripts.groq_client import GroqClient
-from scripts.helper import adaptive_delay, ensure_directory_exists, load_used_data, update_config
+from scripts.prediction_store import CachedModel, get_prediction_store
+from scripts.helper import CheckpointWriter, ensure_directory_exists, load_checkpoint, load_used_data, update_config, write_json_atomic, write_jsonl_atomic
 from scripts.prompt import get_factual_prompt
+from scripts.results_catalog import record_scores
 
 def evaluate_factual_robustness(config):
     """Evaluates negative rejection for a given model under multiple correct_rate/noise_rate conditions."""
     model_name = config['model_name']
     
     if model_name in config['models']:
-        model = GroqClient(plm=model_name)
+        client = GroqClient(plm=model_name, max_retries=config['retry_attempts'], timeout=config['timeout_limit'])
+        model = CachedModel(client, "Counterfactual Robustness", get_prediction_store(config.get('prediction_store_path')))
     else:
         logging.warning(f"Skipping unknown model: {model_name}")
         return
@@ -19,6 +22,7 @@ def evaluate_factual_robustness(config):
     conditions = get_conditions()
     base_path = "results/Counterfactual Robustness"
     result_file = f"{base_path}/scores_{config['output_file_extension']}.json"
+    result_noise_rate = config['noise_rate']  # The conditions below change config['noise_rate']
     final_scores = {"conditions": []}
 
     for condition in conditions:
@@ -38,6 +42,8 @@ def evaluate_factual_robustness(config):
         logging.info(f"Counterfactual Robustness Score for {condition['label']}: {scores}")
 
     save_final_scores(result_file, final_scores)
+    record_scores("Counterfactual Robustness", config, final_scores, noise_rate=result_noise_rate)
+    model.report()
 
 def get_conditions():
     """Returns the conditions to test."""
@@ -48,39 +54,38 @@ def get_conditions():
 
 def load_or_recalculate_data(config, output_file, pred_file, model):
     """Loads or recalculates data based on the configuration."""
-    used_data = []
+    used_data = {}
     results = []
     if config['UsePreCalculatedValue']:
         logging.info(f"Trying to use pre-calculated values")
         used_data = load_used_data(output_file)
     else:
         logging.info(f"Recalculating the metrics...")
+    # Queries completed before a crash are resumed from the checkpoint either way
+    used_data.update(load_checkpoint(output_file))
 
-    with open(output_file, 'w', encoding='utf-8') as f_out, open(pred_file, 'r', encoding='utf-8') as f_eval:
+    # output_file is only replaced once every query is done, so a crash never loses earlier results
+    with CheckpointWriter(output_file) as checkpoint, open(pred_file, 'r', encoding='utf-8') as f_eval:
         for line in tqdm.tqdm(f_eval):
             data = json.loads(line)
-            processed_data = process_query(model, data, used_data, f_out)
+            processed_data = process_query(model, data, used_data, checkpoint)
             if processed_data:
                 results.append(processed_data)
+    write_jsonl_atomic(output_file, results)
     return results
 
-def process_query(model, data, used_data, output_file):
-    """Processes a single query, generates evaluation, and writes the result."""
+def process_query(model, data, used_data, checkpoint):
+    """Processes a single query, generates evaluation, and checkpoints the result."""
     if data['id'] in used_data and data['query'] == used_data[data['id']]['query'] and data['ans'] == used_data[data['id']]['ans']:
-        output_file.write(json.dumps(used_data[data['id']], ensure_ascii=False) + '\n')
         return used_data[data['id']]
 
     try:
         instruction = get_factual_prompt(data['query'], data['prediction'])
-        for attempt in range(1, 4):
-            evaluation = model.generate(instruction)
-            if evaluation:
-                break
-            adaptive_delay(attempt)
+        evaluation = model.generate(instruction)  # Retries are handled by the client
         
         data['evaluation'] = evaluation
         logging.info(f"Model Response for Factual robustness: {evaluation}")
-        output_file.write(json.dumps(data, ensure_ascii=False) + '\n')
+        checkpoint.append(data)
         return data
 
     except Exception as e:
@@ -115,5 +120,4 @@ def calculate_scores(results, condition):
 
 def save_final_scores(result_file, final_scores):
     """Saves the final scores to a file."""
-    with open(result_file, 'w', encoding='utf-8') as f_result:
-        json.dump(final_scores, f_result, ensure_ascii=False, indent=4)
+    write_json_atomic(result_file, final_scores)
@@ -4,8 +4,10 @@ import tqdm
 import logging
 from scripts.evaluate_noise_robustness import evaluate_noise_robustness
 from scripts.groq_client import GroqClient
-from scripts.helper import adaptive_delay, load_used_data
+from scripts.prediction_store import CachedModel, get_prediction_store
+from scripts.helper import CheckpointWriter, load_checkpoint, load_used_data, write_json_atomic, write_jsonl_atomic
 from scripts.prompt import get_prompt
+from scripts.results_catalog import record_scores
 
 def evaluate_negative_rejection(config):
     """Evaluates negative rejection for a given model by processing predictions and computing scores."""
@@ -18,7 +20,8 @@ def evaluate_negative_rejection(config):
     noise_rate = config['noise_rate']
     
     if modelname in config['models']:
-        model = GroqClient(plm=modelname)
+        client = GroqClient(plm=modelname, max_retries=config['retry_attempts'], timeout=config['timeout_limit'])
+        model = CachedModel(client, "Negative Rejection", get_prediction_store(config.get('prediction_store_path')))
     else:
         logging.warning(f"Skipping unknown model: {modelname}")
         return
@@ -34,25 +37,19 @@ def evaluate_negative_rejection(config):
         logging.info("Generating evaluation file")
         evaluate_noise_robustness(config)
     
-    def process_query(model, data, used_data, output_file):
-        """Processes a single query, generates evaluation, and writes the result."""
+    def process_query(model, data, used_data, checkpoint):
+        """Processes a single query, generates evaluation, and checkpoints the result."""
         if data['id'] in used_data and data['query'] == used_data[data['id']]['query'] and data['ans'] == used_data[data['id']]['ans']:
-            output_file.write(json.dumps(used_data[data['id']], ensure_ascii=False) + '\n')
             return used_data[data['id']]
 
         try:
             instruction = get_prompt(data['query'], data['prediction'])
             
-            # Retry mechanism for evaluation
-            for attempt in range(1, 4):
-                evaluation = model.generate(instruction)
-                if evaluation:
-                    break
-                adaptive_delay(attempt)
+            evaluation = model.generate(instruction)  # Retries are handled by the client
             
             data['evaluation'] = evaluation
             print(f"Model Response: {evaluation}")
-            output_file.write(json.dumps(data, ensure_ascii=False) + '\n')
+            checkpoint.append(data)
             return data
 
         except Exception as e:
@@ -73,24 +70,29 @@ def evaluate_negative_rejection(config):
             'nums': total,
         }
 
-    used_data = []
+    used_data = {}
     results = []
     if config['UsePreCalculatedValue']: 
         logging.info(f"Trying to use pre calculated values for Negative rejection report generation")
         used_data = load_used_data(output_file)
     else:
         logging.info(f"Recalculating the metrics...")
+    # Queries completed before a crash are resumed from the checkpoint either way
+    used_data.update(load_checkpoint(output_file))
 
-    with open(output_file, 'w', encoding='utf-8') as f_out, open(evalue_file, 'r', encoding='utf-8') as f_eval:
+    # output_file is only replaced once every query is done, so a crash never loses earlier results
+    with CheckpointWriter(output_file) as checkpoint, open(evalue_file, 'r', encoding='utf-8') as f_eval:
         for line in tqdm.tqdm(f_eval):
             data = json.loads(line)
-            processed_data = process_query(model, data, used_data, f_out)
+            processed_data = process_query(model, data, used_data, checkpoint)
             if processed_data:
                 results.append(processed_data)
+    write_jsonl_atomic(output_file, results)
+    model.report()
 
     # Compute scores and save
     scores = calculate_scores(results)
     logging.info(f"Negative Rejection Score: {scores}")
 
-    with open(result_file, 'w', encoding='utf-8') as f_result:
-        json.dump(scores, f_result, ensure_ascii=False, indent=4)
+    write_json_atomic(result_file, scores)
+    record_scores("Negative Rejection", config, scores)
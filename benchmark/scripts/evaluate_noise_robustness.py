@@ -1,8 +1,8 @@
 import os
-import json
 import logging
 from scripts.get_prediction_result import get_prediction_result
-from scripts.helper import ensure_directory_exists
+from scripts.helper import ensure_directory_exists, write_json_atomic, write_jsonl_atomic
+from scripts.results_catalog import record_scores
 
 
 # Set up logging configuration
@@ -17,12 +17,10 @@ def evaluate_noise_robustness(config):
     filename = os.path.join(result_path, f"prediction_{config['output_file_extension']}.json")
     ensure_directory_exists(filename)
 
-    results = get_prediction_result(config, config['robustness_file_name'], filename)  # Store results for this model
+    results = get_prediction_result(config, config['robustness_file_name'], filename, task="Noise Robustness")  # Store results for this model
 
-    # Save results to a file
-    with open(filename, 'w', encoding='utf-8') as f:
-        for result in results:
-            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+    # Replace the predictions file in one step; the checkpoint of this run is removed with it
+    write_jsonl_atomic(filename, results)
 
     # Compute per-model noise robustness
     correct_count = sum(1 for res in results if 0 not in res['label'] and 1 in res['label'])
@@ -46,7 +44,7 @@ def evaluate_noise_robustness(config):
     logging.info(f"Accuracy: {accuracy:.2%}")
     
     score_filename = os.path.join(result_path, f"scores_{config['output_file_extension']}.json")
-    with open(score_filename, 'w') as f:
-        json.dump(scores, f, ensure_ascii=False, indent=4)
+    write_json_atomic(score_filename, scores)
+    record_scores("Noise Robustness", config, scores)
 
     return results
@@ -1,8 +1,7 @@
 import os
-import json
 import logging
 from scripts.get_prediction_result import get_prediction_result
-from scripts.helper import ensure_directory_exists, load_dataset
+from scripts.helper import ensure_directory_exists, load_dataset, write_jsonl_atomic
 
 
 # Set up logging configuration
@@ -17,12 +16,10 @@ def get_prediction_file(config, correct_rate = 0):
     filename = os.path.join(result_path, f"prediction_{config['output_file_extension']}.json")
     ensure_directory_exists(filename)
 
-    results = get_prediction_result(config, config['factual_file_name'], filename, correct_rate)  # Store results for this model
+    results = get_prediction_result(config, config['factual_file_name'], filename, correct_rate, task="Counterfactual Robustness")  # Store results for this model
 
-    # Save results to a file
-    with open(filename, 'w', encoding='utf-8') as f:
-        for result in results:
-            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+    # Replace the predictions file in one step; the checkpoint of this run is removed with it
+    write_jsonl_atomic(filename, results)
     
     return filename
     # Compute per-model noise robustness
@@ -1,25 +1,29 @@
+from functools import partial
 import logging
-from scripts.helper import adaptive_delay, load_dataset, load_used_data
+from scripts.helper import CheckpointWriter, load_checkpoint, load_dataset, load_used_data
 from scripts.process_data import process_data
 from scripts.groq_client import GroqClient
 from scripts.prediction import predict
+from scripts.prediction_engine import PredictionEngine
+from scripts.prediction_store import CachedModel, get_prediction_store
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Get prediction from LLM based on different dataset
 
-def get_prediction_result(config, data_file_name, prediction_file_name='', correct_rate = 0):
-    results = []
-    used_data = []
-    dataset = load_dataset(data_file_name)
+def get_prediction_result(config, data_file_name, prediction_file_name='', correct_rate = 0, task=None):
+    used_data = {}
+    subdataset = load_dataset(data_file_name, config['num_queries'])  # Only the queries of this run are parsed
     modelname = config['model_name']
-    num_queries = min(config['num_queries'], len(dataset))
-    subdataset = dataset[:num_queries]
+    num_queries = len(subdataset)
 
     # Create GroqClient instance for supported models
     if modelname in config['models']:
-        model = GroqClient(plm=modelname)
+        client = GroqClient(plm=modelname, max_retries=config['retry_attempts'], timeout=config['timeout_limit'],
+                            pool_size=config.get('max_in_flight', 1))
+        # Identical prompts are answered from the shared prediction store
+        model = CachedModel(client, task or data_file_name, get_prediction_store(config.get('prediction_store_path')))
     else:
         logging.warning(f"Skipping unknown model: {modelname}")
         return
@@ -29,40 +33,56 @@ def get_prediction_result(config, data_file_name, prediction_file_name='', corre
         used_data = load_used_data(prediction_file_name)
     else:
         logging.info(f"Running evaluation for {num_queries} queries...")
+    # Queries completed before a crash are resumed from the checkpoint either way
+    used_data.update(load_checkpoint(prediction_file_name))
 
-    # Iterate through dataset and process queries
+    # Reuse cached results straight away and queue only the queries that still need the model
+    checkpoint = CheckpointWriter(prediction_file_name)
+    results = [None] * len(subdataset)
+    tasks = []
+    pending = []
     for idx, instance in enumerate(subdataset, start=0):
         if instance['id'] in used_data and instance['query'] == used_data[instance['id']]['query'] and instance['answer']  == used_data[instance['id']]['ans']:
-                results.append(used_data[instance['id']])
+                results[idx] = used_data[instance['id']]
                 continue
-        
-        logging.info(f"Executing Query {idx + 1} for Model: {modelname}")
+
         query, ans, docs = process_data(instance, config['noise_rate'], config['passage_num'], data_file_name, correct_rate)
+        tasks.append(partial(predict_instance, config, model, idx, instance, query, ans, docs, checkpoint))
+        pending.append(idx)
+
+    logging.info(f"Reusing {len(subdataset) - len(pending)} cached results, running {len(pending)} queries for Model: {modelname}")
+    engine = PredictionEngine(config.get('max_in_flight', 1))
+    with checkpoint:
+        for idx, new_instance in zip(pending, engine.run(tasks, label=f"{modelname} predictions")):
+            results[idx] = new_instance
+    if pending:
+        logging.info(f"Request stats for {modelname}: {model.stats.summary()}")
+        model.report()
+
+    return results
 
-        # Retry mechanism for prediction
-        for attempt in range(1, config['retry_attempts'] + 1):
-            label, prediction, factlabel = predict(query, ans, docs, model, "Document:\n{DOCS} \n\nQuestion:\n{QUERY}", 0.7)
-            if prediction:  # If response is not empty, break retry loop
-                break
-            adaptive_delay(attempt)
+def predict_instance(config, model, idx, instance, query, ans, docs, checkpoint):
+    """Query the model for one dataset instance and checkpoint the result; GroqClient retries failed requests itself."""
+    modelname = config['model_name']
+    logging.info(f"Executing Query {idx + 1} for Model: {modelname}")
 
-        # Check correctness and log the result
-        is_correct = all(x == 1 for x in label)  # True if all values are 1 (correct), else False
-        logging.info(f"Model Response: {prediction}")
-        logging.info(f"Correctness: {is_correct}")
+    label, prediction, factlabel = predict(query, ans, docs, model, "Document:\n{DOCS} \n\nQuestion:\n{QUERY}", 0.7)
 
-        # Save result for this query
-        instance['label'] = label
-        new_instance = {
-            'id': instance['id'],
-            'query': query,
-            'ans': ans,
-            'label': label,
-            'prediction': prediction,
-            'docs': docs,
-            'noise_rate': config['noise_rate'],
-            'factlabel': factlabel
-        }
-        results.append(new_instance)
+    # Check correctness and log the result
+    is_correct = all(x == 1 for x in label)  # True if all values are 1 (correct), else False
+    logging.info(f"Model Response: {prediction}")
+    logging.info(f"Correctness: {is_correct}")
 
-    return results
+    # Save result for this query; the dataset instance is shared through the dataset cache and left as is
+    new_instance = {
+        'id': instance['id'],
+        'query': query,
+        'ans': ans,
+        'label': label,
+        'prediction': prediction,
+        'docs': docs,
+        'noise_rate': config['noise_rate'],
+        'factlabel': factlabel
+    }
+    checkpoint.append(new_instance)
+    return new_instance
@@ -1,53 +1,270 @@
 import requests
 import os
+import time
+import random
+import asyncio
 import logging
+import threading
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
 
-class GroqClient:
-    def __init__(self, plm):
-        os.environ["GROQ_API_KEY"] = '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'
-        # Fetch API Key from environment variables for security
-        api_key = os.getenv("GROQ_API_KEY")  # Fetch from environment
-        if not api_key:
-            raise ValueError("GROQ_API_KEY is not set. Please add it in Hugging Face Secrets.")
-        
-          # Explicitly set it
-        self.api_key = api_key  
+API_URL = "https://api.groq.com/openai/v1/chat/completions"
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+def get_api_key():
+    # Fetch API Key from environment variables for security
+    api_key = os.getenv("GROQ_API_KEY")  # Fetch from environment
+    if not api_key:
+        raise ValueError("GROQ_API_KEY is not set. Please add it in Hugging Face Secrets.")
+    return api_key
+
+def parse_retry_after(value):
+    """Seconds to wait according to a Retry-After header (delta seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None, base_delay=1.0, max_delay=60.0):
+    """
+    Delay before retry number `attempt` (1-based): the server's Retry-After when given,
+    otherwise exponential backoff with full jitter.
+    """
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+class RequestStats:
+    def __init__(self):
+        """Thread-safe totals of the requests made by a client."""
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.latencies = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, retries, usage, failed=False):
+        with self._lock:
+            self.requests += 1
+            self.failures += int(failed)
+            self.retries += retries
+            self.latencies.append(latency)
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+
+    def summary(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "latency_p50_seconds": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p95_seconds": latencies[int(len(latencies) * 0.95)] if latencies else None,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+class RateLimiter:
+    def __init__(self, requests_per_minute):
+        """Spaces requests evenly so that at most `requests_per_minute` start in any minute."""
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Claim the next request slot and return the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            return slot - now
+
+# Request budgets shared by every client of a model in this process, and totals across all clients
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+process_stats = RequestStats()
+
+def set_rate_limit(model, requests_per_minute):
+    """Cap the requests sent for a model by all clients in this process; None or 0 removes the cap."""
+    with _rate_limiters_lock:
+        if requests_per_minute:
+            _rate_limiters[model] = RateLimiter(requests_per_minute)
+        else:
+            _rate_limiters.pop(model, None)
+
+def get_rate_limiter(model):
+    with _rate_limiters_lock:
+        return _rate_limiters.get(model)
+
+class GroqClientBase:
+    def __init__(self, plm, max_retries=3, timeout=30):
+        """
+        Request building, retry decisions and accounting shared by the sync and async clients.
+
+        Args:
+            plm (str): Model name.
+            max_retries (int): Retries after a retryable failure (rate limits, timeouts, 5xx).
+            timeout (float): Seconds to wait for each HTTP request.
+        """
+        self.api_key = get_api_key()
         self.model = plm
-        self.api_url = "https://api.groq.com/openai/v1/chat/completions"
+        self.api_url = API_URL
+        self.max_retries = max_retries
+        self.timeout = timeout
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        
+        self.stats = RequestStats()
+
         # Set up logging
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.INFO)
-        
-    def generate(self, text, temperature=0.7, system=""):
+
+    def _payload(self, text, temperature, system):
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": text})
-
-        payload = {
+        return {
             "model": self.model,
             "messages": messages,
             "temperature": temperature
         }
 
-        try:
-            # Adding a timeout to avoid hanging indefinitely
-            response = requests.post(self.api_url, headers=self.headers, json=payload, timeout=30)
-            response.raise_for_status()  # Raise an exception for HTTP errors (4xx, 5xx)
+    def _parse_response(self, response_json):
+        if "choices" in response_json and response_json["choices"]:
+            return response_json["choices"][0].get("message", {}).get("content", "")
+        self.logger.error(f"Unexpected response format: {response_json}")
+        return ""
+
+    def _wait_for_slot(self):
+        """Seconds to wait before the next request so the model's rate budget is respected."""
+        limiter = get_rate_limiter(self.model)
+        return limiter.reserve() if limiter else 0.0
+
+    def _finish(self, start, attempt, usage, failed):
+        latency = time.perf_counter() - start
+        self.stats.record(latency, attempt, usage, failed)
+        process_stats.record(latency, attempt, usage, failed)
+        self.logger.info(f"{self.model}: {latency:.2f}s, {attempt} retries, "
+                         f"{usage.get('prompt_tokens', 0)}+{usage.get('completion_tokens', 0)} tokens"
+                         f"{' (failed)' if failed else ''}")
 
-            response_json = response.json()
-            if "choices" in response_json and response_json["choices"]:
-                return response_json["choices"][0].get("message", {}).get("content", "")
+    def _next_step(self, attempt, start, status_code=None, retry_after=None, read_json=None, error=None, fatal=False):
+        """
+        Decide what follows one attempt; both transports call this after every request.
+
+        Pass either the response's status code, Retry-After header and a callable
+        returning its JSON body, or the transport error and whether it is fatal.
+
+        Returns:
+            tuple: (True, reply) when the call is over, "" if it failed, or
+                (False, seconds to wait before the next attempt).
+        """
+        if error is None:
+            if status_code in RETRYABLE_STATUS_CODES:
+                error = f"HTTP {status_code}"
+            elif status_code >= 400:
+                error, fatal = f"HTTP {status_code}", True  # Other 4xx errors are fatal
             else:
-                self.logger.error(f"Unexpected response format: {response_json}")
-                return ""
+                try:
+                    response_json = read_json()
+                except ValueError as e:
+                    error, fatal = f"Invalid JSON in response: {e}", True
+                else:
+                    self._finish(start, attempt, response_json.get("usage") or {}, failed=False)
+                    return True, self._parse_response(response_json)
+
+        if fatal:
+            self.logger.error(f"Request failed: {error}")
+            self._finish(start, attempt, {}, failed=True)
+            return True, ""
+        if attempt == self.max_retries:
+            self.logger.error(f"Request failed after {self.max_retries} retries: {error}")
+            self._finish(start, attempt, {}, failed=True)
+            return True, ""
+        delay = backoff_delay(attempt + 1, parse_retry_after(retry_after))
+        self.logger.warning(f"{self.model}: {error}, retrying in {delay:.1f}s (retry {attempt + 1}/{self.max_retries})")
+        return False, delay
+
+class GroqClient(GroqClientBase):
+    def __init__(self, plm, max_retries=3, timeout=30, pool_size=10):
+        """
+        Chat completion client with pooled keep-alive connections and built-in retries.
+
+        Args:
+            plm (str): Model name.
+            max_retries (int): Retries after a retryable failure (rate limits, timeouts, 5xx).
+            timeout (float): Seconds to wait for each HTTP request.
+            pool_size (int): Connections kept open; should cover the number of concurrent calls.
+        """
+        super().__init__(plm, max_retries=max_retries, timeout=timeout)
+
+        # One session per client so connections (and their TLS handshakes) are reused across calls
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+    def generate(self, text, temperature=0.7, system=""):
+        """Return the model's reply, or "" once retries are exhausted or the error is not retryable."""
+        payload = self._payload(text, temperature, system)
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._wait_for_slot())
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+                done, result = self._next_step(attempt, start, response.status_code,
+                                               response.headers.get("Retry-After"), response.json)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                done, result = self._next_step(attempt, start, error=str(e))
+            except requests.exceptions.RequestException as e:
+                done, result = self._next_step(attempt, start, error=str(e), fatal=True)
+            if done:
+                return result
+            time.sleep(result)
+
+class AsyncGroqClient(GroqClientBase):
+    def __init__(self, plm, max_retries=3, timeout=30, pool_size=10):
+        """asyncio counterpart of GroqClient, on a pooled httpx.AsyncClient."""
+        import httpx  # Only needed for the async client
+
+        super().__init__(plm, max_retries=max_retries, timeout=timeout)
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
 
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Request failed: {e}")
-            return ""
+    async def generate(self, text, temperature=0.7, system=""):
+        """Return the model's reply, or "" once retries are exhausted or the error is not retryable."""
+        httpx = self._httpx
+        payload = self._payload(text, temperature, system)
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._wait_for_slot())
+            try:
+                response = await self.client.post(self.api_url, json=payload)
+                done, result = self._next_step(attempt, start, response.status_code,
+                                               response.headers.get("Retry-After"), response.json)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                done, result = self._next_step(attempt, start, error=str(e) or type(e).__name__)
+            except httpx.HTTPError as e:
+                done, result = self._next_step(attempt, start, error=str(e), fatal=True)
+            if done:
+                return result
+            await asyncio.sleep(result)
 
+    async def aclose(self):
+        await self.client.aclose()
@@ -2,24 +2,23 @@ import json
 import os
 import time
 import logging
+import threading
 from pathlib import Path
+from scripts.jsonl_index import IndexedRecords, get_jsonl_index
 
 # Create a list to store logs
 logs = []
 
+# Parsed dataset records by path, kept across evaluator runs in this process
+_dataset_cache = {}
+_dataset_cache_lock = threading.Lock()
+
 # Helper function to ensure directory exists
 def ensure_directory_exists(filepath):
     """Ensure the directory for a given file path exists."""
     directory = os.path.dirname(filepath)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-
-# Helper function for adaptive delay
-def adaptive_delay(attempt, max_delay=60):
-    """Increase wait time with each retry."""
-    delay = min(5 * attempt, max_delay)  # Max delay of max_delay seconds
-    logging.info(f"Retrying after {delay} seconds...")
-    time.sleep(delay)
+    if directory:
+        os.makedirs(directory, exist_ok=True)  # Concurrent jobs may create it at the same time
 
 def load_config(config_file="config.json"):
     """Load configuration from the config file."""
@@ -56,13 +55,26 @@ def update_config(config, model_name=None, noise_rate=None, num_queries=None):
     
     return config
 
-def load_dataset(file_name):
-    dataset = []
-    with open('data/' + file_name, "r", encoding="utf-8") as f:
-        for line in f:
-            dataset.append(json.loads(line.strip()))  # Load each JSON object per line
-    logging.info(f"Loaded {len(dataset)} entries from file {file_name}")  # Check how many records were loaded
-    return dataset
+def load_dataset(file_name, num_records=None):
+    """
+    The first num_records records (all by default) of data/<file_name>.
+
+    Only the records asked for are parsed, through the file's line-offset index, and
+    they are cached in-process until the file changes. The records are shared
+    between calls, so callers must not modify them.
+    """
+    filepath = 'data/' + file_name
+    index = get_jsonl_index(filepath)
+    stop = len(index) if num_records is None else min(num_records, len(index))
+    with _dataset_cache_lock:
+        signature, records = _dataset_cache.get(filepath, (None, []))
+        if signature != index.signature:
+            records = []
+        if len(records) < stop:
+            records = records + index.read(len(records), stop)
+        _dataset_cache[filepath] = (index.signature, records)
+    logging.info(f"Loaded {stop} of {len(index)} entries from file {file_name}")  # Check how many records were loaded
+    return records[:stop]
 
 def initialize_logging():
     logger = logging.getLogger()
@@ -83,15 +95,93 @@ def get_logs():
     """Retrieve logs for display."""
     return "\n".join(logs[-1000:])
 
-def load_used_data(filepath):
-        """Loads existing processed data to avoid redundant evaluations."""
-        used_data = {}
-        if Path(filepath).exists():
-            with open(filepath, encoding='utf-8') as f:
-                for line in f:
-                    data = json.loads(line)
-                    used_data[data['id']] = data
-        return used_data
+def load_used_data(filepath, persist_index=True):
+        """
+        Loads existing processed data to avoid redundant evaluations.
+
+        Returns a mapping of id to record in which a record is only parsed when it is
+        looked up; torn lines left by a crash are skipped.
+        """
+        if not Path(filepath).exists():
+            return {}
+        return IndexedRecords(get_jsonl_index(filepath, persist=persist_index))
+
+def checkpoint_path(filepath):
+    """Path of the append-only checkpoint kept next to a results file while it is being produced."""
+    return f"{filepath}.partial"
+
+class JsonlAppender:
+    def __init__(self, path):
+        """
+        Thread-safe append-only JSONL file.
+
+        Every record is flushed and fsynced as soon as it is appended, so a crash
+        loses at most the record being written.
+        """
+        self.path = path
+        ensure_directory_exists(self.path)
+        self._drop_torn_line()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def _drop_torn_line(self):
+        """Cut a partially written last line, so the next record starts on a line of its own."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def append(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CheckpointWriter(JsonlAppender):
+    def __init__(self, filepath):
+        """
+        Append-only checkpoint for a results file, so a crash loses at most the query
+        in progress. It is removed once the results file is written with write_jsonl_atomic.
+        """
+        super().__init__(checkpoint_path(filepath))
+
+def load_checkpoint(filepath):
+    """Records of an interrupted run of filepath by id, skipping a torn last line."""
+    records = load_used_data(checkpoint_path(filepath), persist_index=False)  # Checkpoints are deleted once complete
+    if records:
+        logging.info(f"Resuming from {len(records)} checkpointed records for {filepath}")
+    return records
+
+def _replace_atomically(filepath, text):
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+def write_jsonl_atomic(filepath, records):
+    """Replace filepath with one JSON record per line in a single rename, then drop its checkpoint."""
+    ensure_directory_exists(filepath)
+    _replace_atomically(filepath, ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+    if os.path.exists(checkpoint_path(filepath)):
+        os.remove(checkpoint_path(filepath))
+
+def write_json_atomic(filepath, data):
+    """Replace filepath with a JSON document in a single rename."""
+    ensure_directory_exists(filepath)
+    _replace_atomically(filepath, json.dumps(data, ensure_ascii=False, indent=4))
 
 
 def update_logs_periodically():
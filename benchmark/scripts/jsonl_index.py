@@ -0,0 +1,189 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections.abc import MutableMapping
+
+INDEX_VERSION = 1
+
+# RGB records and the evaluators' outputs are written with "id" as their first key
+_LEADING_ID = re.compile(rb'^\s*\{\s*"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")\s*[,}]')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def index_path(path):
+    """Path of the persisted line-offset index of a JSONL file."""
+    return f"{path}.idx.json"
+
+class JsonlIndex:
+    def __init__(self, path, persist=True):
+        """
+        Byte offset, length and id of every record line of a JSONL file, so records
+        can be read by position or id without parsing the rest of the file.
+
+        The index is saved next to the file as <file>.idx.json and rebuilt whenever
+        the file's size or modification time no longer match it.
+
+        Args:
+            path (str): JSONL file to index.
+            persist (bool): Save the index; off for short-lived files such as checkpoints.
+        """
+        self.path = path
+        self.persist = persist
+        self.signature = None
+        self.offsets = []
+        self.lengths = []
+        self.ids = []
+        self.positions = {}
+        self.refresh()
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def refresh(self):
+        """Reload or rebuild the index if the file changed since it was indexed; cheap when it did not."""
+        signature = self._stat_signature()
+        if signature == self.signature:
+            return
+        if not (self.persist and self._load_saved(signature)):
+            self._build(signature)
+            if self.persist:
+                self._save()
+        self.positions = {record_id: position for position, record_id in enumerate(self.ids)}  # Last one wins, as in a dict
+
+    def _load_saved(self, signature):
+        try:
+            with open(index_path(self.path), "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if saved.get("version") != INDEX_VERSION or saved.get("signature") != signature:
+            return False
+        self.signature = signature
+        self.offsets, self.lengths, self.ids = saved["offsets"], saved["lengths"], saved["ids"]
+        return True
+
+    def _build(self, signature):
+        offsets, lengths, ids = [], [], []
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                record_id = self._line_id(line)
+                if record_id is not None:
+                    offsets.append(offset)
+                    lengths.append(len(line))
+                    ids.append(record_id)
+                offset += len(line)
+        self.signature = signature
+        self.offsets, self.lengths, self.ids = offsets, lengths, ids
+        logging.info(f"Indexed {len(ids)} records of {self.path}")
+
+    def _line_id(self, line):
+        """Id of the record on a line, or None for blank and torn lines, which are skipped."""
+        # Only a last line without its newline can be torn, so complete lines need not be parsed
+        match = _LEADING_ID.match(line)
+        if match and line.endswith(b"\n") and line.rstrip().endswith(b"}"):
+            return json.loads(match.group(1))
+        if not line.strip():
+            return None
+        try:
+            return json.loads(line).get("id")
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+            logging.warning(f"Skipping incomplete line in {self.path}")  # Torn write at crash time
+            return None
+
+    def _save(self):
+        tmp_path = f"{index_path(self.path)}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "signature": self.signature,
+                           "offsets": self.offsets, "lengths": self.lengths, "ids": self.ids}, f)
+            os.replace(tmp_path, index_path(self.path))
+        except OSError as e:
+            logging.warning(f"Could not save index of {self.path}: {e}")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def read(self, start=0, stop=None):
+        """Parse the records at positions [start, stop) with a single contiguous read."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        first = self.offsets[start]
+        with open(self.path, "rb") as f:
+            f.seek(first)
+            data = f.read(self.offsets[stop - 1] + self.lengths[stop - 1] - first)
+        return [
+            json.loads(data[offset - first:offset - first + length])
+            for offset, length in zip(self.offsets[start:stop], self.lengths[start:stop])
+        ]
+
+    def record(self, position):
+        return self.read(position, position + 1)[0]
+
+    def get(self, record_id, default=None):
+        """The last record with this id, parsed on demand."""
+        position = self.positions.get(record_id)
+        return default if position is None else self.record(position)
+
+def get_jsonl_index(path, persist=True):
+    """Return the process-wide index of path, refreshed if the file changed since it was last used."""
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = JsonlIndex(path, persist=persist)
+        else:
+            index.refresh()
+        return index
+
+class IndexedRecords(MutableMapping):
+    def __init__(self, index):
+        """
+        Records of an indexed JSONL file by id, parsed only when looked up.
+
+        Drop-in replacement for the {id: record} dict of a fully parsed file;
+        assigned records are kept in memory and never written back.
+        """
+        self.path = index.path
+        self._size = index.signature[0]
+        self._offsets = index.offsets
+        self._lengths = index.lengths
+        self._positions = dict(index.positions)
+        self._records = {}
+        self._data = None
+
+    def _parse(self, position):
+        # The file is read in one go on first use; parsing, not reading, is what lookups save
+        if self._data is None:
+            with open(self.path, "rb") as f:
+                self._data = f.read(self._size)
+        offset = self._offsets[position]
+        return json.loads(self._data[offset:offset + self._lengths[position]])
+
+    def __getitem__(self, record_id):
+        if record_id not in self._records:
+            self._records[record_id] = self._parse(self._positions[record_id])
+        return self._records[record_id]
+
+    def __setitem__(self, record_id, record):
+        self._records[record_id] = record
+
+    def __delitem__(self, record_id):
+        found = self._records.pop(record_id, None) is not None
+        found = self._positions.pop(record_id, None) is not None or found
+        if not found:
+            raise KeyError(record_id)
+
+    def __contains__(self, record_id):
+        return record_id in self._records or record_id in self._positions
+
+    def __iter__(self):
+        yield from self._positions
+        yield from (record_id for record_id in self._records if record_id not in self._positions)
+
+    def __len__(self):
+        return len(self._positions) + sum(1 for record_id in self._records if record_id not in self._positions)
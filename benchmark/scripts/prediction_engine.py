@@ -0,0 +1,45 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+class PredictionEngine:
+    def __init__(self, max_in_flight=1):
+        """
+        Run model calls on a bounded thread pool.
+
+        Args:
+            max_in_flight (int): Calls allowed to wait on the API at the same time.
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _run_task(self, task):
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return task()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def run(self, tasks, label="Predictions"):
+        """
+        Run zero-argument callables concurrently and return their results in the order of `tasks`.
+
+        Progress, queries/sec and the number of calls in flight are logged as tasks complete.
+        """
+        results = [None] * len(tasks)
+        if not tasks:
+            return results
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="prediction") as executor:
+            futures = {executor.submit(self._run_task, task): index for index, task in enumerate(tasks)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                elapsed = time.perf_counter() - start
+                logging.info(f"{label}: {done}/{len(tasks)} done, {done / elapsed:.2f} queries/sec, "
+                             f"{self.in_flight} in flight (limit {self.max_in_flight})")
+        return results
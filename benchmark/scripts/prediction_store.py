@@ -0,0 +1,125 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from pathlib import Path
+from scripts.helper import JsonlAppender
+
+DEFAULT_STORE_PATH = "results/prediction_store.jsonl"
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def digest(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def prediction_key(model, temperature, system, instruction):
+    """Content address of a model call: what was sent, not which file it was written to."""
+    return digest(json.dumps([model, float(temperature), digest(system), digest(instruction)]))
+
+class PredictionStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Append-only store of model responses keyed by prediction_key.
+
+        Shared by all evaluators, so an identical prompt is answered once across
+        tasks, conditions and runs.
+        """
+        self.path = path
+        self.responses = self._load()
+        self._writer = JsonlAppender(path)
+        self._lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def _load(self):
+        responses = {}
+        if Path(self.path).exists():
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn write at crash time
+                    responses[record['key']] = record['response']
+            logging.info(f"Loaded {len(responses)} stored predictions from {self.path}")
+        return responses
+
+    def get(self, key, task):
+        with self._lock:
+            response = self.responses.get(key)
+            if response is None:
+                self.misses[task] += 1
+            else:
+                self.hits[task] += 1
+            return response
+
+    def put(self, key, response, model, temperature):
+        with self._lock:
+            if key in self.responses:
+                return
+            self.responses[key] = response
+        self._writer.append({
+            'key': key,
+            'model': model,
+            'temperature': temperature,
+            'response': response,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        })
+
+    def hit_rates(self):
+        """Hits, misses and hit rate per task since the store was opened."""
+        with self._lock:
+            tasks = set(self.hits) | set(self.misses)
+            return {
+                task: {
+                    'hits': self.hits[task],
+                    'misses': self.misses[task],
+                    'hit_rate': self.hits[task] / (self.hits[task] + self.misses[task])
+                }
+                for task in sorted(tasks)
+            }
+
+def get_prediction_store(path=None):
+    """Return the process-wide store for path, opening it on first use."""
+    path = path or DEFAULT_STORE_PATH
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = PredictionStore(path)
+        return _stores[path]
+
+class CachedModel:
+    def __init__(self, model, task, store=None):
+        """
+        Drop-in replacement for a GroqClient that answers repeated prompts from the prediction store.
+
+        Args:
+            model (GroqClient): Client used on a store miss.
+            task (str): Evaluation task the calls are counted under.
+            store (PredictionStore, optional): Defaults to the shared store.
+        """
+        self.model = model
+        self.task = task
+        self.store = store or get_prediction_store()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def generate(self, text, temperature=0.7, system=""):
+        key = prediction_key(self.model.model, temperature, system, text)
+        response = self.store.get(key, self.task)
+        if response is not None:
+            return response
+        response = self.model.generate(text, temperature, system)
+        if response:  # Failed calls return "" and are retried next time
+            self.store.put(key, response, self.model.model, temperature)
+        return response
+
+    def report(self):
+        """Log the store hit rate of this task."""
+        rates = self.store.hit_rates().get(self.task)
+        if rates:
+            logging.info(f"Prediction store for {self.task}: {rates['hits']} hits, {rates['misses']} misses "
+                         f"({rates['hit_rate']:.1%} hit rate)")
@@ -3,7 +3,14 @@ import random
 import math
 
 def process_data(instance, noise_rate, passage_num, filename, correct_rate=0):
-    """Process the data for generating a noisy document set."""
+    """
+    Process the data for generating a noisy document set.
+
+    Documents are sampled with a generator seeded from the instance and settings, so the same
+    instance always yields the same prompt (and can be answered from the prediction store).
+    The instance itself is left unchanged.
+    """
+    rng = random.Random(f"{instance['id']}|{noise_rate}|{passage_num}|{filename}|{correct_rate}")
     query = instance['query']
     ans = instance['answer']
     logging.info(f"Query: {query}")
@@ -15,13 +22,14 @@ def process_data(instance, noise_rate, passage_num, filename, correct_rate=0):
     
     # Handling the '_int' case in filename
     if '_int' in filename:
-        for i in instance['positive']:
-            random.shuffle(i)
-        docs = [i[0] for i in instance['positive']]
+        positive = [list(group) for group in instance['positive']]
+        for i in positive:
+            rng.shuffle(i)
+        docs = [i[0] for i in positive]
         if len(docs) < pos_num:
-            maxnum = max([len(i) for i in instance['positive']])
+            maxnum = max([len(i) for i in positive])
             for i in range(1, maxnum):
-                for j in instance['positive']:
+                for j in positive:
                     if len(j) > i:
                         docs.append(j[i])
                         if len(docs) == pos_num:
@@ -49,7 +57,7 @@ def process_data(instance, noise_rate, passage_num, filename, correct_rate=0):
 
         # Select positive documents (factual) first
         indexs_positive = list(range(len(instance['positive'])))
-        selected_positive = random.sample(indexs_positive, min(len(indexs_positive), correct_num))
+        selected_positive = rng.sample(indexs_positive, min(len(indexs_positive), correct_num))
         docs = [instance['positive'][i] for i in selected_positive]
 
         # Add negative documents (noise) if needed
@@ -59,12 +67,12 @@ def process_data(instance, noise_rate, passage_num, filename, correct_rate=0):
         # Only add positive_wrong documents if pos_num > 0 and correct_rate < 1.0
         if pos_num > 0 and correct_rate < 1.0:
             indexs_positive_wrong = list(range(len(instance['positive_wrong'])))
-            selected_positive_wrong = random.sample(indexs_positive_wrong, min(len(indexs_positive_wrong), pos_num))
+            selected_positive_wrong = rng.sample(indexs_positive_wrong, min(len(indexs_positive_wrong), pos_num))
             docs += [instance['positive_wrong'][i] for i in selected_positive_wrong]
 
         # Ensure docs length does not exceed passage_num
         if len(docs) > passage_num:
-            random.shuffle(docs)
+            rng.shuffle(docs)
             docs = docs[:passage_num]
         elif len(docs) < passage_num and 'negative' in instance:
             remaining = passage_num - len(docs)
@@ -91,5 +99,5 @@ def process_data(instance, noise_rate, passage_num, filename, correct_rate=0):
         logging.info(f"Using {num_positive} positive and {num_negative} negative documents as context")
     
     # Shuffle the final document list
-    random.shuffle(docs)
+    rng.shuffle(docs)
     return query, ans, docs
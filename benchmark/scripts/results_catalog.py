@@ -0,0 +1,143 @@
+"""
+SQLite catalog of evaluation scores, one row per task, model, noise rate, passage count and query count.
+
+Evaluators upsert their scores here as they write their scores files, so score
+tables are built from one indexed query instead of listing and opening result
+files. A new catalog is backfilled from the scores files under results/; run
+`python -m scripts.results_catalog` (from the benchmark directory) to re-import
+files added some other way.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import logging
+import threading
+
+DEFAULT_CATALOG_PATH = "results/results_catalog.sqlite"
+TASKS = ["Noise Robustness", "Negative Rejection", "Counterfactual Robustness", "Information Integration"]
+
+SCORE_FILE_PATTERN = re.compile(
+    r"^scores_(?P<model>.+)_noise_(?P<noise_rate>[\d.]+)_passage_(?P<passage_num>\d+)_num_queries_(?P<num_queries>\d+)\.json$"
+)
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+class ResultsCatalog:
+    def __init__(self, path=DEFAULT_CATALOG_PATH):
+        """Open (and create if needed) the catalog database at path."""
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers are not blocked by an evaluator writing
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    task TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    noise_rate REAL NOT NULL,
+                    passage_num INTEGER NOT NULL,
+                    num_queries INTEGER NOT NULL,
+                    scores TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (task, passage_num, num_queries, model, noise_rate)
+                )
+            """)
+
+    def _connection(self):
+        """This thread's connection; a connection cannot be shared between threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+        return conn
+
+    def upsert(self, task, model, noise_rate, passage_num, num_queries, scores, updated_at=None):
+        """Insert or replace the scores of one run; an older `updated_at` never overwrites a newer row."""
+        with self._connection() as conn:
+            conn.execute("""
+                INSERT INTO results (task, model, noise_rate, passage_num, num_queries, scores, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (task, passage_num, num_queries, model, noise_rate) DO UPDATE
+                SET scores = excluded.scores, updated_at = excluded.updated_at
+                WHERE excluded.updated_at >= results.updated_at
+            """, (task, model, round(float(noise_rate), 2), int(passage_num), int(num_queries),
+                  json.dumps(scores, ensure_ascii=False), updated_at or time.time()))
+
+    def get_scores(self, task, passage_num, num_queries, noise_rate=None):
+        """
+        Scores of a task for one passage/query configuration.
+
+        Returns:
+            dict: (model, noise_rate) -> scores dict.
+        """
+        query = "SELECT model, noise_rate, scores FROM results WHERE task = ? AND passage_num = ? AND num_queries = ?"
+        params = [task, int(passage_num), int(num_queries)]
+        if noise_rate is not None:
+            query += " AND noise_rate = ?"
+            params.append(round(float(noise_rate), 2))
+        rows = self._connection().execute(query, params).fetchall()
+        return {(model, rate): json.loads(scores) for model, rate, scores in rows}
+
+    def has_task(self, task):
+        return self._connection().execute("SELECT 1 FROM results WHERE task = ? LIMIT 1", (task,)).fetchone() is not None
+
+    def import_results(self, result_path="results/"):
+        """Backfill from the scores files of every task under result_path; returns the number of files imported."""
+        imported = 0
+        for task in TASKS:
+            task_dir = os.path.join(result_path, task)
+            if not os.path.isdir(task_dir):
+                continue
+            for filename in os.listdir(task_dir):
+                match = SCORE_FILE_PATTERN.match(filename)
+                if not match:
+                    continue
+                filepath = os.path.join(task_dir, filename)
+                try:
+                    with open(filepath, "r", encoding="utf-8") as f:
+                        scores = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logging.warning(f"Skipping unreadable scores file {filepath}: {e}")
+                    continue
+                self.upsert(task, match.group("model"), match.group("noise_rate"), match.group("passage_num"),
+                            match.group("num_queries"), scores, updated_at=os.path.getmtime(filepath))
+                imported += 1
+        logging.info(f"Imported {imported} scores files from {result_path} into {self.path}")
+        return imported
+
+def get_results_catalog(config):
+    """Return the process-wide catalog for the config, backfilling it from its result files when first created."""
+    path = config.get('results_catalog_path') or DEFAULT_CATALOG_PATH
+    with _catalogs_lock:
+        if path not in _catalogs:
+            is_new = not os.path.exists(path)
+            catalog = ResultsCatalog(path)
+            if is_new:
+                catalog.import_results(config.get('result_path', "results/"))
+            _catalogs[path] = catalog
+        return _catalogs[path]
+
+def record_scores(task, config, scores, noise_rate=None):
+    """Upsert the scores an evaluator has just written for the model and noise rate in config."""
+    get_results_catalog(config).upsert(
+        task, config['model_name'], config['noise_rate'] if noise_rate is None else noise_rate,
+        config['passage_num'], config['num_queries'], scores
+    )
+
+if __name__ == "__main__":
+    from scripts.helper import load_config
+
+    parser = argparse.ArgumentParser(description="Import scores files into the results catalog.")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--result-path", help="Defaults to result_path in the config")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = load_config(args.config)
+    ResultsCatalog(config.get('results_catalog_path') or DEFAULT_CATALOG_PATH).import_results(
+        args.result_path or config.get('result_path', "results/"))
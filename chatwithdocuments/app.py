@@ -1,7 +1,8 @@
+import time
 import logging
 import gradio as gr
 from utils.document_utils import initialize_logging
-from globals import app_config 
+from globals import get_app_config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,36 +14,85 @@ def load_sample_question(question):
 def clear_selection():
     return gr.update(value=[]), "", ""  # Reset doc_selector to empty list
 
-def process_uploaded_file(file, current_selection):
-    """Process uploaded file using DocumentManager and update UI."""
+def process_uploaded_file(file, current_selection, request: gr.Request):
+    """Submit the uploaded file as a background ingestion job and stream its progress to the UI."""
+    app_config = get_app_config()
+    session_id = request.session_hash
     try:
         if file is None:
             # When file input is cleared, preserve current selection and choices
-            uploaded_docs = app_config.doc_manager.get_uploaded_documents()
-            return (
+            uploaded_docs = app_config.doc_manager.get_uploaded_documents(session_id)
+            yield (
                 "",
                 gr.update(choices=uploaded_docs, value=current_selection or []),
                 False,
-                ""
+                "",
+                None
             )
-        
-        status, filename, doc_id = app_config.doc_manager.process_document(file.name if file else None)
+            return
 
+        job = app_config.ingestion_manager.submit(file.name, session_id=session_id)
         updated_selection = current_selection if current_selection else []
-        if filename and filename not in updated_selection:
-            updated_selection.append(filename)
+        while True:
+            # The document becomes selectable as soon as its first pages are indexed
+            if app_config.doc_manager.get_document_id(job.filename, session_id) and job.filename not in updated_selection and not job.cancel_event.is_set():
+                updated_selection.append(job.filename)
+            if job.finished:
+                break
+            yield (
+                job.describe(),
+                gr.update(choices=app_config.doc_manager.get_uploaded_documents(session_id), value=updated_selection),
+                False,
+                "",
+                job.job_id
+            )
+            time.sleep(0.5)
+
+        app_config.ingestion_manager.release(job.job_id)  # The final outcome is yielded below from this job object
+        filename = job.filename if job.status == "done" else None
+        if not filename and job.filename in updated_selection:
+            updated_selection.remove(job.filename)
         trigger_summary = bool(filename)
         logging.info(f"Processed file: {filename}, Trigger summary: {trigger_summary}")
 
-        return (
-            status,
-            gr.update(choices=app_config.doc_manager.get_uploaded_documents(), value=updated_selection),
+        yield (
+            job.describe(),
+            gr.update(choices=app_config.doc_manager.get_uploaded_documents(session_id), value=updated_selection),
             trigger_summary,
-            filename  
+            filename,
+            None
         )
     except Exception as e:
         logging.error(f"Error in process_uploaded_file: {e}")
-        return "Error processing file", gr.update(choices=[]), False, ''
+        yield f"Error processing file: {e}", gr.update(choices=app_config.doc_manager.get_uploaded_documents(session_id)), False, '', None
+
+def cancel_upload(job_id):
+    """Cancel the upload currently being processed for this session."""
+    if not job_id:
+        return "No upload in progress"
+    return get_app_config().ingestion_manager.cancel(job_id)
+
+def delete_selected_documents(selected_docs, request: gr.Request):
+    """Delete the selected documents and refresh the selector."""
+    app_config = get_app_config()
+    if not selected_docs:
+        return "Please select at least one document to delete.", gr.update()
+    statuses = [app_config.doc_manager.delete_document(filename, request.session_hash) for filename in selected_docs]
+    return "\n".join(statuses), gr.update(choices=app_config.doc_manager.get_uploaded_documents(request.session_hash), value=[])
+
+def load_session_documents(request: gr.Request):
+    """Fill the selector with the documents visible to a new browser session."""
+    return gr.update(choices=get_app_config().doc_manager.get_uploaded_documents(request.session_hash), value=[])
+
+def close_session(request: gr.Request):
+    get_app_config().doc_manager.close_namespace(request.session_hash)
+
+def chat_response_stream(query, selected_docs, history, request: gr.Request):
+    """Answer a question about the documents selected in this session, streaming the reply."""
+    yield from get_app_config().chat_manager.generate_chat_response_stream(query, selected_docs, history, session_id=request.session_hash)
+
+def get_session_chunks(trigger, filename, request: gr.Request):
+    return get_app_config().doc_manager.get_chunks(filename, request.session_hash) if trigger and filename else None
 
 def update_doc_selector(selected_docs):
     """Keep selected documents in sync."""
@@ -60,7 +110,11 @@ example_questions = [
     "Why AzureBlobStorage port is used?"
 ]
 
-with gr.Blocks(css="""
+def build_interface():
+    """Build the Gradio UI; only called when app.py runs as the main script."""
+    app_config = get_app_config()
+
+    with gr.Blocks(css="""
         .chatbot .user {
             position: relative;
             background-color: #cfdcfd;
@@ -88,122 +142,143 @@ with gr.Blocks(css="""
         }
         .chatbot .bot { background-color: #f1f8e9; padding: 8px; border-radius: 10px; }   /* Light green for bot responses */
     """) as interface:
-    interface.title = "🤖 IntelliDoc: AI Document Explorer"
-    gr.Markdown("""
+        interface.title = "🤖 IntelliDoc: AI Document Explorer"
+        gr.Markdown("""
         # 🤖 IntelliDoc: AI Document Explorer
         **AI Document Explorer** allows you to upload PDF documents and interact with them using AI-powered analysis and summarization. Ask questions, extract key insights, and gain a deeper understanding of your documents effortlessly.
     """)
-    summary_query_state = gr.State()  # State to hold the summary query
-    trigger_summary_state = gr.State()  # State to hold trigger flag
-    filename_state = gr.State()  # State to hold file name
-    chunks_state = gr.State()
-    summary_text_state = gr.State()
-    sample_questions_state = gr.State()
-
-    with gr.Row():
-        # Left Sidebar
-        with gr.Column(scale=2):
-            gr.Markdown("## Upload and Select Document")
-            upload_btn = gr.File(label="Upload PDF Document", file_types=[".pdf"])
-            doc_selector = gr.Dropdown(
-                choices=app_config.doc_manager.get_uploaded_documents(),
-                label="Documents",
-                multiselect=True,
-                value=[]  # Initial value as empty list
-            )
-            model_selector = gr.Dropdown(choices=models, label="Models", interactive=True)
-            clear_btn = gr.Button("Clear Selection")
-            upload_status = gr.Textbox(label="Upload Status", interactive=False)
-
-            # Process uploaded file and update UI
-            upload_event = upload_btn.change(
-                process_uploaded_file,
-                inputs=[upload_btn, doc_selector],
-                outputs=[
-                    upload_status,
-                    doc_selector,
-                    trigger_summary_state,  # Store trigger_summary
-                    filename_state
-                ]
-            )
-            clear_btn.click(
-                clear_selection,
-                outputs=[doc_selector, upload_status, filename_state]
-            )
-            # Reinitialize LLM when the model changes
-            model_selector.change(
-                app_config.gen_llm.reinitialize_llm,
-                inputs=[model_selector],
-                outputs=[upload_status]
-            )
+        summary_query_state = gr.State()  # State to hold the summary query
+        trigger_summary_state = gr.State()  # State to hold trigger flag
+        filename_state = gr.State()  # State to hold file name
+        chunks_state = gr.State()
+        summary_text_state = gr.State()
+        sample_questions_state = gr.State()
+        ingestion_job_state = gr.State()  # ID of the upload job being processed
 
-        # Middle Section (Chat & LLM Response)
-        with gr.Column(scale=6):
-            gr.Markdown("## Chat with document(s)")
-            chat_history = gr.Chatbot(label="Chat History", height= 650, bubble_full_width= False, type="messages")
-            with gr.Row():
-                chat_input = gr.Textbox(label="Ask additional questions about the document...", show_label=False, placeholder="Ask additional questions about the document...", elem_id="chat-input", lines=3)
-                chat_btn = gr.Button("🚀 Send", variant="primary", elem_id="send-button", scale=0)
-            chat_btn.click(app_config.chat_manager.generate_chat_response, inputs=[chat_input, doc_selector, chat_history], outputs=chat_history).then(
-                lambda: "",  # Return an empty string to clear the chat_input
-                outputs=chat_input
-            )
+        with gr.Row():
+            # Left Sidebar
+            with gr.Column(scale=2):
+                gr.Markdown("## Upload and Select Document")
+                upload_btn = gr.File(label="Upload PDF Document", file_types=[".pdf"])
+                doc_selector = gr.Dropdown(
+                    choices=[],  # Filled per session on load
+                    label="Documents",
+                    multiselect=True,
+                    value=[]  # Initial value as empty list
+                )
+                model_selector = gr.Dropdown(choices=models, label="Models", interactive=True)
+                clear_btn = gr.Button("Clear Selection")
+                cancel_upload_btn = gr.Button("Cancel Upload")
+                delete_btn = gr.Button("Delete Selected Documents")
+                upload_status = gr.Textbox(label="Upload Status", interactive=False)
 
-        # Right Sidebar (Sample Questions & History)
-        with gr.Column(scale=2):
-            gr.Markdown("## Sample questions for this document:")
-            with gr.Column():
-                sample_questions = gr.Dropdown(
-                    label="Select a sample question",
-                    choices=[],
-                    interactive=True,
-                    allow_custom_value=True  # Allows users to type custom questions if needed
+                # Process uploaded file and update UI
+                upload_event = upload_btn.change(
+                    process_uploaded_file,
+                    inputs=[upload_btn, doc_selector],
+                    outputs=[
+                        upload_status,
+                        doc_selector,
+                        trigger_summary_state,  # Store trigger_summary
+                        filename_state,
+                        ingestion_job_state
+                    ],
+                    concurrency_limit=None  # Work is bounded by the ingestion worker pool, not by this event
+                )
+                cancel_upload_btn.click(
+                    cancel_upload,
+                    inputs=[ingestion_job_state],
+                    outputs=[upload_status]
+                )
+                delete_btn.click(
+                    delete_selected_documents,
+                    inputs=[doc_selector],
+                    outputs=[upload_status, doc_selector]
+                )
+                clear_btn.click(
+                    clear_selection,
+                    outputs=[doc_selector, upload_status, filename_state]
                 )
-                '''question_dropdown = gr.Dropdown(
+                # Reinitialize LLM when the model changes
+                model_selector.change(
+                    app_config.gen_llm.reinitialize_llm,
+                    inputs=[model_selector],
+                    outputs=[upload_status]
+                )
+
+            # Middle Section (Chat & LLM Response)
+            with gr.Column(scale=6):
+                gr.Markdown("## Chat with document(s)")
+                chat_history = gr.Chatbot(label="Chat History", height= 650, bubble_full_width= False, type="messages")
+                with gr.Row():
+                    chat_input = gr.Textbox(label="Ask additional questions about the document...", show_label=False, placeholder="Ask additional questions about the document...", elem_id="chat-input", lines=3)
+                    chat_btn = gr.Button("🚀 Send", variant="primary", elem_id="send-button", scale=0)
+                chat_btn.click(chat_response_stream, inputs=[chat_input, doc_selector, chat_history], outputs=chat_history).then(
+                    lambda: "",  # Return an empty string to clear the chat_input
+                    outputs=chat_input
+                )
+
+            # Right Sidebar (Sample Questions & History)
+            with gr.Column(scale=2):
+                gr.Markdown("## Sample questions for this document:")
+                with gr.Column():
+                    sample_questions = gr.Dropdown(
+                        label="Select a sample question",
+                        choices=[],
+                        interactive=True,
+                        allow_custom_value=True  # Allows users to type custom questions if needed
+                    )
+                    '''question_dropdown = gr.Dropdown(
                     label="",
                     choices=all_questions,
                     interactive=True,
                     info="Choose a question from the dropdown to populate the query box."
                 )'''
 
-           # After upload, generate "Auto Summary" message only if trigger_summary is True
-            upload_event.then(
-                fn=lambda trigger, filename: "Can you provide summary of the document" if trigger and filename else None,
-                inputs=[trigger_summary_state, filename_state],
-                outputs=[summary_query_state]
-                ).then(
-                    fn=lambda query, history: history + [{"role": "user", "content": ""}, {"role": "assistant", "content": "Generating summary of the document, please wait..."}] if query else history,
-                    inputs=[summary_query_state, chat_history],
-                    outputs=[chat_history]
-                ).then(
-                    fn=lambda trigger, filename: app_config.doc_manager.get_chunks(filename) if trigger and filename else None,
+               # After upload, generate "Auto Summary" message only if trigger_summary is True
+                upload_event.then(
+                    fn=lambda trigger, filename: "Can you provide summary of the document" if trigger and filename else None,
                     inputs=[trigger_summary_state, filename_state],
-                    outputs=[chunks_state]
-                ).then(
-                    fn=lambda chunks: app_config.chat_manager.generate_summary(chunks) if chunks else None,
-                    inputs=[chunks_state],
-                    outputs=[summary_text_state]
-                ).then(
-                    fn=lambda summary, history: history + [{"role": "assistant", "content": summary}] if summary else history,
-                    inputs=[summary_text_state, chat_history],
-                    outputs=[chat_history]
-                ).then(
-                    fn=lambda chunks: app_config.chat_manager.generate_sample_questions(chunks) if chunks else [],
-                    inputs=[chunks_state],
-                    outputs=[sample_questions_state]
-                ).then(
-                    fn=lambda questions: gr.update(choices=questions if questions else ["No questions available"]),
-                    inputs=[sample_questions_state],
-                    outputs=[sample_questions]
+                    outputs=[summary_query_state]
+                    ).then(
+                        fn=lambda query, history: history + [{"role": "user", "content": ""}, {"role": "assistant", "content": "Generating summary of the document, please wait..."}] if query else history,
+                        inputs=[summary_query_state, chat_history],
+                        outputs=[chat_history]
+                    ).then(
+                        fn=get_session_chunks,
+                        inputs=[trigger_summary_state, filename_state],
+                        outputs=[chunks_state]
+                    ).then(
+                        fn=lambda chunks: app_config.chat_manager.generate_summary(chunks) if chunks else None,
+                        inputs=[chunks_state],
+                        outputs=[summary_text_state]
+                    ).then(
+                        fn=lambda summary, history: history + [{"role": "assistant", "content": summary}] if summary else history,
+                        inputs=[summary_text_state, chat_history],
+                        outputs=[chat_history]
+                    ).then(
+                        fn=lambda chunks: app_config.chat_manager.generate_sample_questions(chunks) if chunks else [],
+                        inputs=[chunks_state],
+                        outputs=[sample_questions_state]
+                    ).then(
+                        fn=lambda questions: gr.update(choices=questions if questions else ["No questions available"]),
+                        inputs=[sample_questions_state],
+                        outputs=[sample_questions]
+                    )
+                # Populate chat_input when a question is selected
+                sample_questions.change(
+                    fn=lambda question: question,
+                    inputs=[sample_questions],
+                    outputs=[chat_input]
                 )
-            # Populate chat_input when a question is selected
-            sample_questions.change(
-                fn=lambda question: question,
-                inputs=[sample_questions],
-                outputs=[chat_input]
-            )
-            #gr.Markdown("## Logs")
-            #history = gr.Textbox(label="Previous Queries", interactive=False)
+                #gr.Markdown("## Logs")
+                #history = gr.Textbox(label="Previous Queries", interactive=False)
+
+        # Each browser session sees its own documents; its namespace is dropped when the session ends
+        interface.load(load_session_documents, outputs=[doc_selector])
+        interface.unload(close_session)
+    return interface
+
 
 if __name__ == "__main__":
-    interface.launch()
\ No newline at end of file
+    build_interface().launch()
@@ -0,0 +1,67 @@
+"""
+PDF text extraction throughput benchmark for PDFReader.
+
+Reports pages/sec and time to the first page for each sample PDF, backend and
+worker count, so the sequential reader can be compared with page-parallel
+extraction and with PyMuPDF where it is installed.
+
+Usage (from the chatwithdocuments directory):
+    python -m benchmarks.pdf_extraction_benchmark manual1.pdf manual2.pdf --backends pypdf2 pymupdf --workers 1 4 8
+"""
+import os
+import time
+import argparse
+import logging
+
+from data.pdf_reader import PDFReader, fitz
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def run_once(file_path, backend, workers):
+    reader = PDFReader(backend=backend, max_workers=workers)
+    start = time.perf_counter()
+    first_page_seconds = None
+    pages = 0
+    for _ in reader.iter_pages(file_path):
+        if first_page_seconds is None:
+            first_page_seconds = time.perf_counter() - start
+        pages += 1
+    total_seconds = time.perf_counter() - start
+    return {
+        "pdf": os.path.basename(file_path),
+        "backend": reader.backend,
+        "workers": workers,
+        "pages": pages,
+        "seconds": round(total_seconds, 3),
+        "pages_per_sec": round(pages / total_seconds, 1) if total_seconds else None,
+        "first_page_seconds": round(first_page_seconds, 3) if first_page_seconds is not None else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction with PDFReader.")
+    parser.add_argument("pdfs", nargs="+", help="Sample PDF files")
+    parser.add_argument("--backends", nargs="+", default=["pypdf2", "pymupdf"], choices=["pypdf2", "pymupdf"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, os.cpu_count() or 1])
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per configuration; the fastest is reported")
+    args = parser.parse_args()
+
+    backends = [backend for backend in args.backends if backend != "pymupdf" or fitz is not None]
+    if len(backends) < len(args.backends):
+        logging.warning("PyMuPDF is not installed, skipping the pymupdf backend")
+
+    rows = []
+    for file_path in args.pdfs:
+        for backend in backends:
+            for workers in args.workers:
+                runs = [run_once(file_path, backend, workers) for _ in range(args.repeats)]
+                rows.append(min(runs, key=lambda row: row["seconds"]))
+                logging.info(rows[-1])
+
+    columns = list(rows[0].keys())
+    print("| " + " | ".join(columns) + " |")
+    print("|" + "|".join("---" for _ in columns) + "|")
+    for row in rows:
+        print("| " + " | ".join(str(row[column]) for column in columns) + " |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Load test for concurrent browser sessions sharing one DocumentManager.
+
+Every simulated session indexes its own synthetic document into its namespace
+and then asks questions about it, all sessions at once, so searches run while
+other sessions are still adding chunks. Reports query throughput and latency
+per concurrency level and checks that no session ever retrieves another
+session's chunks. Uses the `HashingEmbeddings` stub, so it runs offline.
+
+Usage (from the chatwithdocuments directory):
+    python -m benchmarks.session_load_test --sessions 1 10 50 --output session_load.json
+"""
+import os
+import json
+import time
+import argparse
+import logging
+import tempfile
+import threading
+import numpy as np
+
+from benchmarks.stub_embedder import HashingEmbeddings, make_corpus, make_queries
+from data.document_catalog import DocumentCatalog
+from retriever.chunk_documents import chunk_documents
+from retriever.document_manager import DocumentManager
+from retriever.vector_store_manager import VectorStoreManager
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def run_session(doc_manager, session_id, pages, queries, top_k, batch_pages, stats):
+    """Index one document into the session's namespace in batches, then query it."""
+    doc_id = f"{session_id}-doc"
+    filename = f"{session_id}.pdf"
+    namespace = doc_manager.get_namespace(session_id)
+    for start in range(0, len(pages), batch_pages):
+        chunks = chunk_documents(pages[start:start + batch_pages], doc_id, chunk_size=2000, chunk_overlap=300, start_page=start + 1)
+        doc_manager.vector_manager.add_documents(chunks)
+        namespace.document_ids[filename] = doc_id
+        namespace.uploaded_documents[filename] = filename
+
+    for query in queries:
+        start = time.perf_counter()
+        results = doc_manager.retrieve_top_k(query, [filename], k=top_k, session_id=session_id)
+        stats["latencies"].append(time.perf_counter() - start)
+        stats["leaks"] += sum(1 for result in results if result['metadata']['doc_id'] != doc_id)
+        stats["foreign_choices"] += sum(1 for name in doc_manager.get_uploaded_documents(session_id) if name != filename)
+
+def run_level(num_sessions, pages_per_session, queries_per_session, top_k, batch_pages, embedding_model):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vector_manager = VectorStoreManager(embedding_path=os.path.join(tmp_dir, "embeddings.faiss"), embedding_model=embedding_model)
+        doc_manager = DocumentManager(vector_manager=vector_manager, catalog=DocumentCatalog(os.path.join(tmp_dir, "catalog.json")))
+        # One stats dict per session, merged once all threads are done
+        session_stats = []
+        threads = []
+        for i in range(num_sessions):
+            pages = make_corpus(pages_per_session, seed=i)
+            queries = make_queries(pages, queries_per_session, seed=i + 1)
+            stats = {"latencies": [], "leaks": 0, "foreign_choices": 0}
+            session_stats.append(stats)
+            threads.append(threading.Thread(
+                target=run_session,
+                args=(doc_manager, f"session-{i}", pages, queries, top_k, batch_pages, stats)
+            ))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        vector_manager.close()
+
+        latencies_ms = np.array([latency for stats in session_stats for latency in stats["latencies"]]) * 1000
+        return {
+            "sessions": num_sessions,
+            "queries": len(latencies_ms),
+            "seconds": elapsed,
+            "queries_per_sec": len(latencies_ms) / elapsed if elapsed else None,
+            "query_p50_ms": float(np.percentile(latencies_ms, 50)),
+            "query_p95_ms": float(np.percentile(latencies_ms, 95)),
+            "cross_session_results": sum(stats["leaks"] for stats in session_stats),
+            "cross_session_choices": sum(stats["foreign_choices"] for stats in session_stats),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load test over one shared index with a hashing stub embedder.")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 10, 50], help="Concurrent session counts to test")
+    parser.add_argument("--pages", type=int, default=200, help="Pages indexed by each session")
+    parser.add_argument("--queries", type=int, default=50, help="Queries asked by each session")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-pages", type=int, default=16, help="Pages indexed per add, as during a streamed upload")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--output", default="session_load.json", help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    embedding_model = HashingEmbeddings(size=args.dim)
+    results = []
+    print(f"{'sessions':>8} {'queries/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'leaks':>6}")
+    for num_sessions in args.sessions:
+        result = run_level(num_sessions, args.pages, args.queries, args.top_k, args.batch_pages, embedding_model)
+        results.append(result)
+        print(f"{num_sessions:>8} {result['queries_per_sec']:>10.1f} {result['query_p50_ms']:>8.2f} {result['query_p95_ms']:>8.2f} "
+              f"{result['cross_session_results'] + result['cross_session_choices']:>6}")
+
+    with open(args.output, "w") as f:
+        json.dump({"settings": vars(args), "results": results}, f, indent=4)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import zlib
+import random
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic embedding model for offline benchmarks.
+
+    Each lower-cased token is hashed into one of `size` buckets with a +/-1 sign
+    (the hashing trick) and the vector is L2-normalized. Identical text always
+    gives identical vectors across runs and machines, and nothing is downloaded.
+    """
+
+    def __init__(self, size: int = 384):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        hashes = np.array([zlib.crc32(token.encode()) for token in text.lower().split()], dtype=np.int64)
+        vector = np.zeros(self.size, dtype=np.float32)
+        if hashes.size:
+            np.add.at(vector, hashes % self.size, np.where((hashes >> 16) & 1, 1.0, -1.0))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+def make_vocabulary(size: int = 5000, seed: int = 0) -> List[str]:
+    """Build a reproducible vocabulary of pronounceable pseudo-words."""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "qu", "dr", "en", "is", "or"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def make_corpus(num_texts: int, words_per_text: int = 40, seed: int = 0) -> List[str]:
+    """Generate `num_texts` distinct synthetic texts with a Zipf-like word distribution."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(seed=seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    return [f"passage {i} " + " ".join(rng.choices(vocabulary, weights=weights, k=words_per_text)) for i in range(num_texts)]
+
+def make_queries(corpus: List[str], num_queries: int, words_per_query: int = 8, seed: int = 1) -> List[str]:
+    """Build queries from random word windows of corpus texts, so every query has a true match."""
+    rng = random.Random(seed)
+    queries = []
+    for text in rng.sample(corpus, min(num_queries, len(corpus))):
+        words = text.split()
+        start = rng.randint(0, max(0, len(words) - words_per_query))
+        queries.append(" ".join(words[start:start + words_per_query]))
+    return queries
@@ -0,0 +1,122 @@
+"""
+Offline performance regression benchmark for VectorStoreManager.
+
+Uploads synthetic documents through `chunk_documents` and
+`VectorStoreManager.add_documents`, then times `VectorStoreManager.search`.
+It uses the deterministic `HashingEmbeddings` stub, so it runs with no network
+access and no model downloads.
+
+Usage (from the chatwithdocuments directory):
+    python -m benchmarks.vector_store_regression --sizes 10000 100000 1000000 --output results.json
+    python -m benchmarks.vector_store_regression --baseline baseline.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import logging
+import platform
+import tempfile
+import numpy as np
+
+from benchmarks.regression import compare_with_baseline, peak_rss_mb
+from benchmarks.stub_embedder import HashingEmbeddings, make_corpus, make_queries
+from retriever.chunk_documents import chunk_documents
+from retriever.vector_store_manager import VectorStoreManager
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Whether a larger value of a metric is better, used when comparing against a baseline
+HIGHER_IS_BETTER = {
+    "ingest_per_sec": True,
+    "search_p50_ms": False,
+    "search_p95_ms": False,
+    "flush_seconds": False,
+    "index_mb": False,
+    "peak_rss_mb": False,
+}
+
+def run_size(num_chunks, num_documents, num_queries, top_k, embedding_model):
+    # Each synthetic page is short enough to become exactly one chunk
+    pages = make_corpus(num_chunks)
+    pages_per_document = max(1, num_chunks // num_documents)
+    documents = {f"bench-{i}": pages[i * pages_per_document:(i + 1) * pages_per_document] for i in range(num_documents)}
+    queries = make_queries(pages, num_queries)
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = VectorStoreManager(embedding_path=os.path.join(tmp_dir, "embeddings.faiss"), embedding_model=embedding_model)
+
+        total_chunks = 0
+        start = time.perf_counter()
+        for doc_id, page_list in documents.items():
+            chunks = chunk_documents(page_list, doc_id, chunk_size=2000, chunk_overlap=300)
+            manager.add_documents(chunks)
+            total_chunks += len(chunks)
+        ingest_seconds = time.perf_counter() - start
+
+        # Time the background writer's work separately, and save before the temporary directory goes away
+        start = time.perf_counter()
+        manager.close()
+        flush_seconds = time.perf_counter() - start
+
+        doc_ids = list(documents)
+        latencies = []
+        for query in queries:
+            doc_id = rng.choice(doc_ids)
+            start = time.perf_counter()
+            manager.search(query, doc_id, k=top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        index = manager.vector_store.index
+        return {
+            "chunks": total_chunks,
+            "ingest_per_sec": total_chunks / ingest_seconds if ingest_seconds else None,
+            "search_p50_ms": float(np.percentile(latencies, 50)),
+            "search_p95_ms": float(np.percentile(latencies, 95)),
+            "flush_seconds": flush_seconds,
+            "index_mb": index.ntotal * index.d * 4 / 2**20,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline VectorStoreManager regression benchmark with a hashing stub embedder.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000, 1000000], help="Corpus sizes in chunks")
+    parser.add_argument("--documents", type=int, default=20, help="Number of uploads the corpus is split into")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--output", default="vector_store_benchmark.json", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    embedding_model = HashingEmbeddings(size=args.dim)
+    results = {}
+    for size in sorted(args.sizes):
+        logging.info(f"Benchmarking VectorStoreManager with {size} chunks")
+        results[str(size)] = run_size(size, args.documents, args.num_queries, args.top_k, embedding_model)
+        logging.info(f"{size} chunks: {results[str(size)]}")
+
+    report = {
+        "settings": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    logging.info(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_with_baseline(results, baseline, args.tolerance, HIGHER_IS_BETTER)
+        if regressions:
+            logging.error("Performance regressions against baseline:\n" + "\n".join(regressions))
+            sys.exit(1)
+        logging.info(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import logging
 from retriever.llm_manager import LLMManager
 from retriever.document_manager import DocumentManager
 from retriever.chat_manager import ChatManager
+from retriever.ingestion_manager import IngestionManager
 
 class AppConfig:
     def __init__(self):
@@ -10,4 +11,6 @@ class AppConfig:
         # Initialize DocumentManager (it will be a singleton instance shared across the app)
         self.doc_manager = DocumentManager()
         self.chat_manager = ChatManager(documentManager = self.doc_manager, llmManager = self.gen_llm)
+        # Uploads are processed in the background so the UI can report progress
+        self.ingestion_manager = IngestionManager(self.doc_manager)
         logging.info("AppConfig initialized with LLMManager")
\ No newline at end of file
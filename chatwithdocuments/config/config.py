@@ -8,3 +8,32 @@ class ConfigConstants:
     GENERATION_MODELS = ["llama3-8b-8192", "qwen-2.5-32b", "gemma2-9b-it" ]
     DEFAULT_CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
+    PERSIST_DEBOUNCE_SECONDS = 5  # Save the index once uploads have been idle this long
+    PERSIST_MAX_DELAY_SECONDS = 30  # Upper bound on how long unsaved changes may wait
+    PDF_EXTRACTION_BACKEND = "auto"  # "pypdf2", "pymupdf" or "auto" (PyMuPDF when installed)
+    PDF_EXTRACTION_WORKERS = None  # Worker processes for page-parallel extraction, None for one per CPU
+    PDF_EXTRACTION_BATCH_PAGES = 8  # Pages extracted per worker task
+    PDF_PARALLEL_MIN_PAGES = 64  # Smaller PDFs are extracted in-process
+    INGEST_BATCH_PAGES = 16  # Pages chunked and embedded together while a PDF is streamed in
+    INGESTION_WORKERS = 2  # Uploads processed concurrently in the background
+    INGESTION_MAX_PENDING = 8  # Uploads that may be queued or running before new ones are refused
+    INGESTION_JOB_HISTORY = 32  # Finished jobs kept for polling when the UI does not release them
+    COMPACTION_DEAD_FRACTION = 0.2  # Rebuild the index once this fraction of its rows belong to deleted documents
+    SUMMARY_MAP_CONCURRENCY = 4  # Concurrent LLM calls while summarizing a document
+    SUMMARY_REQUESTS_PER_MINUTE = 30  # Rate limit for those calls
+    SUMMARY_MAP_MAX_CHARS = 6000  # Document text summarized per map call
+    SUMMARY_REDUCE_MAX_CHARS = 6000  # Partial summaries combined per reduce call
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95  # Cosine similarity above which an earlier answer is reused
+    ANSWER_CACHE_TTL_SECONDS = 3600  # Cached answers expire after this long
+    ANSWER_CACHE_MAX_ENTRIES = 1000
+    CONTEXT_PACKING_ENABLED = True  # Merge overlapping retrieved chunks before prompting; turn off to compare
+    CONTEXT_MAX_OVERLAP_CHARS = 600  # Longest shared text looked for between consecutive chunks
+    DEFAULT_CONTEXT_TOKEN_BUDGET = 3000
+    CONTEXT_TOKEN_BUDGETS = {"gemma2-9b-it": 3000, "llama3-8b-8192": 3000, "llama3-70b-8192": 4000, "qwen-2.5-32b": 4000}
+    LLM_REQUEST_TIMEOUT_SECONDS = 30  # A model that takes longer counts as failed and the next model is tried
+    LLM_RATE_LIMIT_COOLDOWN_SECONDS = 30  # A rate-limited model is tried last for this long
+    LLM_HEDGING_ENABLED = False  # Send a duplicate request to the next model when the first exceeds its p95 latency
+    LLM_HEDGING_MIN_SAMPLES = 20  # Latency samples needed before a model's p95 is trusted for hedging
+    LLM_HEDGING_MIN_DELAY_SECONDS = 1.0
+    EMBEDDING_NUM_THREADS = None  # torch intra-op threads for the shared embedding model, None for torch's default
+    SHARE_RESTORED_DOCUMENTS = True  # Documents restored from the catalog at startup are visible to every session
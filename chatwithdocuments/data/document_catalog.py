@@ -0,0 +1,87 @@
+# document_catalog.py
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+class DocumentCatalog:
+    def __init__(self, catalog_path: str = "document_catalog.json"):
+        """
+        Persistent record of uploaded documents, keyed by a hash of their content.
+
+        Args:
+            catalog_path (str): Path of the JSON file the catalog is stored in.
+        """
+        self.catalog_path = catalog_path
+        self._lock = threading.Lock()
+        self.documents = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.catalog_path):
+            return {}
+        try:
+            with open(self.catalog_path, encoding="utf-8") as f:
+                documents = json.load(f)
+            logging.info(f"Loaded {len(documents)} documents from catalog {self.catalog_path}")
+            return documents
+        except (OSError, json.JSONDecodeError) as e:
+            logging.error(f"Error reading document catalog: {str(e)}")
+            return {}
+
+    def _save(self):
+        """Write the catalog to a temporary file and rename it over the old one."""
+        tmp_path = f"{self.catalog_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.documents, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.catalog_path)
+
+    @staticmethod
+    def compute_doc_id(file_path: str) -> str:
+        """Return the SHA-256 of the file content, so identical files share a document ID."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self.documents.get(doc_id)
+
+    def add(self, doc_id: str, filename: str, file_path: str, page_count: int, chunk_count: int, owner: Optional[str] = None):
+        """Record a processed document and persist the catalog; owner is the uploading session, None if shared."""
+        with self._lock:
+            self.documents[doc_id] = {
+                "filename": filename,
+                "file_path": file_path,
+                "size": os.path.getsize(file_path),
+                "page_count": page_count,
+                "chunk_count": chunk_count,
+                "uploaded_at": datetime.now().isoformat(timespec="seconds"),
+                "owner": owner,
+            }
+            self._save()
+
+    def get_artifact(self, doc_id: str, name: str) -> Optional[Any]:
+        """Return a cached artifact (e.g. a summary) generated for a document, or None."""
+        entry = self.documents.get(doc_id)
+        return entry.get("artifacts", {}).get(name) if entry else None
+
+    def set_artifact(self, doc_id: str, name: str, value: Any):
+        """Cache an artifact generated for a catalogued document and persist the catalog."""
+        with self._lock:
+            entry = self.documents.get(doc_id)
+            if entry is None:
+                return
+            entry.setdefault("artifacts", {})[name] = value
+            self._save()
+
+    def remove(self, doc_id: str):
+        """Forget a document and persist the catalog."""
+        with self._lock:
+            if self.documents.pop(doc_id, None) is not None:
+                self._save()
@@ -1,31 +1,105 @@
 # pdf_reader.py
+import os
+import logging
+import multiprocessing
 import PyPDF2
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+from config.config import ConfigConstants
+
+try:
+    import fitz  # PyMuPDF, optional and considerably faster than PyPDF2
+except ImportError:
+    fitz = None
+
+def _resolve_backend(backend: str) -> str:
+    if backend == "auto":
+        return "pymupdf" if fitz is not None else "pypdf2"
+    if backend == "pymupdf" and fitz is None:
+        logging.warning("PyMuPDF is not installed, falling back to PyPDF2")
+        return "pypdf2"
+    if backend not in ("pypdf2", "pymupdf"):
+        raise ValueError(f"Unknown PDF extraction backend: {backend}")
+    return backend
+
+def _count_pages(file_path: str, backend: str) -> int:
+    if backend == "pymupdf":
+        with fitz.open(file_path) as pdf:
+            return pdf.page_count
+    with open(file_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def _extract_page_range(file_path: str, start: int, stop: int, backend: str) -> List[str]:
+    """Extract the text of pages [start, stop). Runs in a worker process, so it opens the file itself."""
+    if backend == "pymupdf":
+        with fitz.open(file_path) as pdf:
+            return [pdf[page_num].get_text() or "" for page_num in range(start, stop)]
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[page_num].extract_text() or "" for page_num in range(start, stop)]
+
+def _iter_page_texts(file_path: str, backend: str) -> Iterator[str]:
+    """Extract pages one by one in this process, opening the file once."""
+    if backend == "pymupdf":
+        with fitz.open(file_path) as pdf:
+            for page in pdf:
+                yield page.get_text() or ""
+        return
+    with open(file_path, 'rb') as file:
+        for page in PyPDF2.PdfReader(file).pages:
+            yield page.extract_text() or ""
 
 class PDFReader:
-    def __init__(self):
-        self.page_list = []
-        
+    def __init__(self, backend: str = None, max_workers: int = None):
+        """
+        Args:
+            backend (str): "pypdf2", "pymupdf" or "auto" (PyMuPDF when installed). Defaults to the configured backend.
+            max_workers (int): Worker processes for page-parallel extraction. Defaults to the configured count.
+        """
+        self.backend = _resolve_backend(backend or ConfigConstants.PDF_EXTRACTION_BACKEND)
+        self.max_workers = max_workers or ConfigConstants.PDF_EXTRACTION_WORKERS or os.cpu_count() or 1
+
+    def iter_pages(self, file_path: str) -> Iterator[str]:
+        """
+        Yield the text of each non-empty page in order, as soon as it is extracted.
+
+        Large PDFs are split into page ranges that are extracted in parallel by a
+        process pool; results are still yielded in page order, so chunking and
+        embedding can start on the first pages while later ones are extracted.
+        """
+        try:
+            num_pages = _count_pages(file_path, self.backend)
+            if self.max_workers <= 1 or num_pages < ConfigConstants.PDF_PARALLEL_MIN_PAGES:
+                # Process start-up costs more than it saves on short documents
+                for text in _iter_page_texts(file_path, self.backend):
+                    if text and text.strip():  # Only yield non-empty pages
+                        yield text.strip()
+                return
+
+            batch_pages = ConfigConstants.PDF_EXTRACTION_BATCH_PAGES
+            ranges = [(start, min(start + batch_pages, num_pages)) for start in range(0, num_pages, batch_pages)]
+
+            logging.info(f"Extracting {num_pages} pages with {self.max_workers} {self.backend} workers")
+            # Spawned rather than forked: this process runs many threads whose locks a forked child would inherit.
+            # Spawned workers re-import the main script, so app.py builds nothing on import (see globals.get_app_config)
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(ranges)),
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = [executor.submit(_extract_page_range, file_path, start, stop, self.backend) for start, stop in ranges]
+                try:
+                    for future in futures:
+                        for text in future.result():
+                            if text and text.strip():  # Only yield non-empty pages
+                                yield text.strip()
+                finally:
+                    for future in futures:  # Stop outstanding work if the consumer gives up early
+                        future.cancel()
+
+        except Exception as e:
+            raise Exception(f"Error reading PDF: {str(e)}")
+
     def read_pdf(self, file_path: str) -> List[str]:
         """
         Read PDF content and return list of pages
         Each element in the list is the text content of a page
         """
-        try:
-            # Open and read the PDF file
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
-                
-                # Extract text from each page
-                self.page_list = []
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    if text:  # Only add non-empty pages
-                        self.page_list.append(text.strip())
-                
-                return self.page_list
-                
-        except Exception as e:
-            raise Exception(f"Error reading PDF: {str(e)}")
\ No newline at end of file
+        return list(self.iter_pages(file_path))
@@ -1,6 +1,20 @@
 import logging
-from config.appConfig import AppConfig
+import threading
 
-# Initialize AppConfig (this will initialize the LLMManager with the default model)
-app_config = AppConfig()
-logging.info("Global app_config initialized")
+_app_config = None
+_app_config_lock = threading.Lock()
+
+def get_app_config():
+    """
+    Return the app's AppConfig, creating it on first use (this initializes the LLMManager with the default model).
+
+    Nothing is built on import: PDF extraction workers are spawned processes that
+    re-import the main script, and must not open a second copy of the app's stores.
+    """
+    global _app_config
+    with _app_config_lock:
+        if _app_config is None:
+            from config.appConfig import AppConfig
+            _app_config = AppConfig()
+            logging.info("Global app_config initialized")
+        return _app_config
@@ -0,0 +1,96 @@
+import time
+import logging
+import threading
+import numpy as np
+from config.config import ConfigConstants
+
+class AnswerCache:
+    def __init__(self, similarity_threshold=None, ttl_seconds=None, max_entries=None):
+        """
+        Semantic cache of chat answers.
+
+        Answers are looked up by cosine similarity of the query embedding and are
+        scoped to the exact model and set of selected documents they were generated for.
+
+        Args:
+            similarity_threshold (float): Minimum cosine similarity for a cached answer to be reused.
+            ttl_seconds (float): Age after which an entry expires.
+            max_entries (int): Entries kept in total; the oldest are evicted first.
+        """
+        self.similarity_threshold = similarity_threshold or ConfigConstants.ANSWER_CACHE_SIMILARITY_THRESHOLD
+        self.ttl_seconds = ttl_seconds or ConfigConstants.ANSWER_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or ConfigConstants.ANSWER_CACHE_MAX_ENTRIES
+        self._scopes = {}  # (model, frozenset(doc_ids)) -> list of (created_at, unit query vector, query, answer)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _scope(model, doc_ids):
+        return model, frozenset(doc_ids)
+
+    @staticmethod
+    def _unit(query_vector):
+        vector = np.asarray(query_vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query_vector, model, doc_ids):
+        """
+        Return the cached answer of the most similar earlier query in the same scope, or None.
+        """
+        now = time.time()
+        with self._lock:
+            entries = [entry for entry in self._scopes.get(self._scope(model, doc_ids), []) if now - entry[0] < self.ttl_seconds]
+            if entries:
+                self._scopes[self._scope(model, doc_ids)] = entries
+            best = None
+            if entries:
+                similarities = np.stack([entry[1] for entry in entries]) @ self._unit(query_vector)
+                index = int(np.argmax(similarities))
+                if similarities[index] >= self.similarity_threshold:
+                    best = (entries[index], float(similarities[index]))
+
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        entry, similarity = best
+        logging.info(f"Answer cache hit (similarity {similarity:.3f}) for earlier query: {entry[2]}; hit rate {self.hit_rate():.1%}")
+        return entry[3]
+
+    def store(self, query_vector, query, answer, model, doc_ids):
+        """Cache an answer for a query in the given scope."""
+        with self._lock:
+            self._scopes.setdefault(self._scope(model, doc_ids), []).append((time.time(), self._unit(query_vector), query, answer))
+            self._evict()
+
+    def _evict(self):
+        total = sum(len(entries) for entries in self._scopes.values())
+        if total <= self.max_entries:
+            return
+        oldest = sorted((entry[0], scope) for scope, entries in self._scopes.items() for entry in entries)
+        cutoff = oldest[total - self.max_entries - 1][0]
+        for scope in list(self._scopes):
+            self._scopes[scope] = [entry for entry in self._scopes[scope] if entry[0] > cutoff]
+            if not self._scopes[scope]:
+                del self._scopes[scope]
+
+    def invalidate_document(self, doc_id):
+        """Drop every entry whose document set includes doc_id."""
+        with self._lock:
+            stale = [scope for scope in self._scopes if doc_id in scope[1]]
+            for scope in stale:
+                del self._scopes[scope]
+        if stale:
+            logging.info(f"Answer cache: invalidated {len(stale)} scopes for document {doc_id}")
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            entries = sum(len(entries) for entries in self._scopes.values())
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate(), "entries": entries}
@@ -1,7 +1,10 @@
 from datetime import datetime
+import time
 import logging
-from typing import List
-
+from typing import Iterator, List
+from retriever.answer_cache import AnswerCache
+from retriever.context_packer import estimate_tokens, get_token_budget, pack_context
+from config.config import ConfigConstants
 
 class ChatManager:
     def __init__(self, documentManager, llmManager):
@@ -11,62 +14,104 @@ class ChatManager:
         self.doc_manager = documentManager
         self.llm_manager = llmManager
 
+        # Repeated questions on the same documents and model are answered from the cache
+        self.answer_cache = AnswerCache()
+        self.doc_manager.vector_manager.add_change_listener(self.answer_cache.invalidate_document)
+
         logging.info("ChatManager initialized")
 
-    def generate_chat_response(self, query: str, selected_docs: List[str], history: List[dict]) -> List[dict]:
-        """
-        Generate a chat response based on the user's query and selected documents.
+    def _pack_context(self, top_k_results: List[dict]) -> List[dict]:
+        """Merge overlapping chunks and trim them to the model's context budget, if enabled."""
+        if not ConfigConstants.CONTEXT_PACKING_ENABLED:
+            return top_k_results
+        llm = self.llm_manager.generation_llm
+        return pack_context(top_k_results, get_token_budget(llm.name if llm else None))
+
+    def _answer_cache_scope(self, selected_docs: List[str], session_id=None):
+        """Return the (model, doc_ids) a cached answer must match; answers are stored under the model that gave them."""
+        llm = self.llm_manager.generation_llm
+        return (llm.name if llm else None), self.doc_manager.get_selected_document_ids(selected_docs, session_id=session_id)
+
+    @staticmethod
+    def _exchange(history: List[dict], query: str, answer: str) -> List[dict]:
+        """Return the history followed by the query and its answer."""
+        return history + [
+            {"role": "user", "content": f"{query}"},
+            {"role": "assistant", "content": answer}
+        ]
 
-        Args:
-            query (str): The user's query.
-            selected_docs (List[str]): List of selected document filenames from the dropdown.
-            history (List[dict]): The chat history as a list of {'role': str, 'content': str} dictionaries.
+    def _prepare_answer(self, query: str, selected_docs: List[str], history: List[dict], session_id=None):
+        """
+        Everything before the LLM call, shared by the streaming and non-streaming paths:
+        validate the request, look the answer up in the cache, then retrieve and pack the context.
 
         Returns:
-            List[dict]: Updated chat history with the new response in 'messages' format.
+            tuple: (final history, None) when the request is answered without the LLM,
+                otherwise (None, (query_vector, model, doc_ids, context)).
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        logging.info(f"Generating chat response for query: {query} at {timestamp}")
-
         # Handle empty query
         if not query:
             logging.warning("Empty query received")
-            return history + [{"role": "assistant", "content": "Please enter a query."}]
+            return history + [{"role": "assistant", "content": "Please enter a query."}], None
 
         # Handle no selected documents
         if not selected_docs:
             logging.warning("No documents selected")
-            return history + [{"role": "assistant", "content": "Please select at least one document."}]
+            return history + [{"role": "assistant", "content": "Please select at least one document."}], None
 
         # Retrieve the top 5 chunks based on the query and selected documents
         try:
-            top_k_results = self.doc_manager.retrieve_top_k(query, selected_docs, k=5)
+            query_vector = self.doc_manager.vector_manager.embed_query(query)
+            model, doc_ids = self._answer_cache_scope(selected_docs, session_id)
+            cached_answer = self.answer_cache.lookup(query_vector, model, doc_ids)
+            if cached_answer:
+                return self._exchange(history, query, cached_answer), None
+            top_k_results = self.doc_manager.retrieve_top_k(query, selected_docs, k=5, query_vector=query_vector, session_id=session_id)
         except Exception as e:
             logging.error(f"Error retrieving chunks: {str(e)}")
-            return history + [
-                {"role": "user", "content": f"{query}"},
-                {"role": "assistant", "content": f"Error retrieving chunks: {str(e)}"}
-            ]
+            return self._exchange(history, query, f"Error retrieving chunks: {str(e)}"), None
 
         if not top_k_results:
             logging.info("No relevant chunks found")
-            return history + [
-                {"role": "user", "content": f"{query}"},
-                {"role": "assistant", "content": "No relevant information found in the selected documents."}
-            ]
+            return self._exchange(history, query, "No relevant information found in the selected documents."), None
+
+        context = self._pack_context(top_k_results)
+        logging.info(f"Answering from {sum(estimate_tokens(doc['text']) for doc in context)} context tokens "
+                     f"(packing {'on' if ConfigConstants.CONTEXT_PACKING_ENABLED else 'off'})")
+        return None, (query_vector, model, doc_ids, context)
+
+    def generate_chat_response(self, query: str, selected_docs: List[str], history: List[dict], session_id=None) -> List[dict]:
+        """
+        Generate a chat response based on the user's query and selected documents.
+
+        Args:
+            query (str): The user's query.
+            selected_docs (List[str]): List of selected document filenames from the dropdown.
+            history (List[dict]): The chat history as a list of {'role': str, 'content': str} dictionaries.
+            session_id (str, optional): Session whose document namespace selected_docs refer to.
 
-        # Send the top K results to the LLM to generate a response
+        Returns:
+            List[dict]: Updated chat history with the new response in 'messages' format.
+        """
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        logging.info(f"Generating chat response for query: {query} at {timestamp}")
+
+        final_history, prepared = self._prepare_answer(query, selected_docs, history, session_id)
+        if final_history is not None:
+            return final_history
+        query_vector, model, doc_ids, context = prepared
+
+        # Send the packed context to the LLM to generate a response
         try:
-            llm_response, source_docs = self.llm_manager.generate_response(query, top_k_results)
+            start = time.perf_counter()
+            answered_by = []  # The router may fail over or hedge to another model than the selected one
+            response, source_docs = self.llm_manager.generate_response(query, context, on_model=answered_by.append)
+            logging.info(f"LLM response in {time.perf_counter() - start:.2f}s")
         except Exception as e:
             logging.error(f"Error generating LLM response: {str(e)}")
-            return history + [
-                {"role": "user", "content": f"{query}"},
-                {"role": "assistant", "content": f"Error generating response: {str(e)}"}
-            ]
+            return self._exchange(history, query, f"Error generating response: {str(e)}")
 
-        # Format the response
-        response = llm_response
+        self.answer_cache.store(query_vector, query, response, answered_by[0] if answered_by else model, doc_ids)
         # Uncomment to include source docs in response (optional)
         # for i, doc in enumerate(source_docs, 1):
         #     doc_id = doc.metadata.get('doc_id', 'Unknown')
@@ -75,10 +120,46 @@ class ChatManager:
 
         logging.info("Chat response generated successfully")
         # Return updated history with new user query and LLM response
-        return history + [
-            {"role": "user", "content": f"{query}"},
-            {"role": "assistant", "content": response}
-        ]
+        return self._exchange(history, query, response)
+
+    def generate_chat_response_stream(self, query: str, selected_docs: List[str], history: List[dict], session_id=None) -> Iterator[List[dict]]:
+        """
+        Streaming variant of generate_chat_response.
+
+        Yields the updated history each time new tokens arrive, so the chatbot can
+        render the answer progressively.
+
+        Args:
+            query (str): The user's query.
+            selected_docs (List[str]): List of selected document filenames from the dropdown.
+            history (List[dict]): The chat history as a list of {'role': str, 'content': str} dictionaries.
+            session_id (str, optional): Session whose document namespace selected_docs refer to.
+
+        Yields:
+            List[dict]: Updated chat history with the partial response in 'messages' format.
+        """
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        logging.info(f"Generating streaming chat response for query: {query} at {timestamp}")
+
+        final_history, prepared = self._prepare_answer(query, selected_docs, history, session_id)
+        if final_history is not None:
+            yield final_history
+            return
+        query_vector, model, doc_ids, context = prepared
+
+        response = ""
+        answered_by = []  # The router may fail over to another model than the selected one
+        try:
+            for token in self.llm_manager.stream_response(query, context, on_model=answered_by.append):
+                response += token
+                yield self._exchange(history, query, response)
+        except Exception as e:
+            logging.error(f"Error generating LLM response: {str(e)}")
+            yield self._exchange(history, query, f"{response}\n\nError generating response: {str(e)}" if response else f"Error generating response: {str(e)}")
+            return
+
+        self.answer_cache.store(query_vector, query, response, answered_by[0] if answered_by else model, doc_ids)
+        logging.info("Chat response generated successfully")
 
     def generate_summary(self, chunks: any, summary_type: str = "medium") -> str:
         """
@@ -103,12 +184,29 @@ class ChatManager:
             logging.warning("No documents selected for summarization")
             return "Please select at least one document."
 
-        
-        llm_summary_response = self.llm_manager.generate_summary_v0(chunks = chunks)
+        # Summaries are cached per document content hash, so re-opening a document is instant
+        doc_id = chunks[0].get('doc_id')
+        cache_key = f"summary_{summary_type}"
+        cached = self.doc_manager.catalog.get_artifact(doc_id, cache_key) if doc_id else None
+        if cached:
+            logging.info(f"Using cached {summary_type} summary for document {doc_id}")
+            return cached
+
+        llm_summary_response = self.llm_manager.generate_summary(chunks, summary_type=summary_type)
         #logging.info(f" Summary response {llm_summary_response}")
+        if doc_id and not llm_summary_response.startswith("Error generating summary"):
+            self.doc_manager.catalog.set_artifact(doc_id, cache_key, llm_summary_response)
 
         return llm_summary_response
     
     def generate_sample_questions(self, chunks: any):
+        doc_id = chunks[0].get('doc_id') if chunks else None
+        cached = self.doc_manager.catalog.get_artifact(doc_id, "sample_questions") if doc_id else None
+        if cached:
+            logging.info(f"Using cached sample questions for document {doc_id}")
+            return cached
+
         questions = self.llm_manager.generate_questions(chunks = chunks)
-        return questions
+        if doc_id and questions:
+            self.doc_manager.catalog.set_artifact(doc_id, "sample_questions", questions)
+        return questions
\ No newline at end of file
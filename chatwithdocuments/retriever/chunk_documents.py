@@ -2,7 +2,11 @@ import logging
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import hashlib
 
-def chunk_documents(page_list, doc_id, chunk_size=1000, chunk_overlap=200):
+def page_content_hash(page_content):
+    """Return the SHA-256 of a page's extracted text."""
+    return hashlib.sha256(page_content.encode()).hexdigest()
+
+def chunk_documents(page_list, doc_id, chunk_size=1000, chunk_overlap=200, start_page=1, seen_hashes=None):
     """
     Chunk a list of page contents into smaller segments with document ID metadata.
     
@@ -11,18 +15,24 @@ def chunk_documents(page_list, doc_id, chunk_size=1000, chunk_overlap=200):
         doc_id (str): Unique identifier for the document.
         chunk_size (int): Maximum size of each chunk (default: 1000 characters).
         chunk_overlap (int): Overlap between chunks (default: 200 characters).
+        start_page (int): Page number of the first page in page_list, when chunking a document in batches.
+        seen_hashes (set): Hashes of chunks already emitted for this document; updated in place so
+            duplicates are skipped across batches.
     
     Returns:
-        list: List of dictionaries, each containing 'text', 'source', and 'doc_id'.
+        list: List of dictionaries, each containing 'text', 'source', 'doc_id' and 'page_hash'.
     """
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     documents = []
-    seen_hashes = set()  # Track hashes of chunks to avoid duplicates
+    seen_hashes = set() if seen_hashes is None else seen_hashes  # Track hashes of chunks to avoid duplicates
 
-    for page_num, page_content in enumerate(page_list, start=1):  # Start page numbering at 1
+    for page_num, page_content in enumerate(page_list, start=start_page):  # Start page numbering at 1
         if not page_content or not isinstance(page_content, str):
             continue  # Skip empty or invalid pages
 
+        # Hash of the whole page, used to recognize unchanged pages when a new version is uploaded
+        page_hash = page_content_hash(page_content)
+
         # Split the page content into chunks
         chunks = text_splitter.split_text(page_content)
         
@@ -41,7 +51,8 @@ def chunk_documents(page_list, doc_id, chunk_size=1000, chunk_overlap=200):
             documents.append({
                 'text': chunk,
                 'source': source,
-                'doc_id': doc_id
+                'doc_id': doc_id,
+                'page_hash': page_hash
             })
             seen_hashes.add(chunk_hash)
             
@@ -0,0 +1,97 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from config.config import ConfigConstants
+
+# Sources are written by chunk_documents as "doc_<doc_id>_page_<page>_chunk_<index>"
+SOURCE_PATTERN = re.compile(r"^doc_(?P<doc_id>.+)_page_(?P<page>\d+)_chunk_(?P<chunk>\d+)$")
+MIN_OVERLAP_CHARS = 20
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+def get_token_budget(model_name: Optional[str]) -> int:
+    """Context token budget for a generation model."""
+    return ConfigConstants.CONTEXT_TOKEN_BUDGETS.get(model_name, ConfigConstants.DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+def parse_source(source: str) -> Optional[Tuple[str, int, int]]:
+    """Return (doc_id, page, chunk_index) for a chunk source, or None if it has another format."""
+    match = SOURCE_PATTERN.match(source or "")
+    if not match:
+        return None
+    return match.group("doc_id"), int(match.group("page")), int(match.group("chunk"))
+
+def merge_texts(first: str, second: str) -> str:
+    """Join two consecutive chunks, writing the text they share only once."""
+    if second in first:
+        return first
+    if first in second:
+        return second
+    for length in range(min(len(first), len(second), ConfigConstants.CONTEXT_MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:length]):
+            return first + second[length:]
+    return first + "\n" + second
+
+def pack_context(results: List[Dict[str, Any]], token_budget: int) -> List[Dict[str, Any]]:
+    """
+    Merge adjacent chunks of the same page and fill a token budget in rank order.
+
+    Args:
+        results (List[Dict[str, Any]]): Retrieved chunks with 'text', 'metadata' and 'score', best first.
+        token_budget (int): Maximum estimated tokens of context to keep.
+
+    Returns:
+        List[Dict[str, Any]]: Packed blocks in the same format, ranked by their best chunk.
+    """
+    # Group chunks by page, remembering the rank of each chunk
+    blocks = []
+    pages = {}
+    for rank, result in enumerate(results):
+        position = parse_source(result['metadata'].get('source'))
+        if position is None:
+            blocks.append({'rank': rank, 'chunks': [(0, result)]})
+            continue
+        doc_id, page, chunk_index = position
+        pages.setdefault((doc_id, page), []).append((chunk_index, rank, result))
+
+    # Runs of consecutive chunk indices on a page become one block
+    for page_chunks in pages.values():
+        page_chunks.sort(key=lambda item: item[0])
+        run = [page_chunks[0]]
+        for item in page_chunks[1:]:
+            if item[0] == run[-1][0]:
+                continue  # The same chunk retrieved twice
+            if item[0] == run[-1][0] + 1:
+                run.append(item)
+            else:
+                blocks.append({'rank': min(rank for _, rank, _ in run), 'chunks': [(index, result) for index, _, result in run]})
+                run = [item]
+        blocks.append({'rank': min(rank for _, rank, _ in run), 'chunks': [(index, result) for index, _, result in run]})
+
+    # Drop blocks whose text is already contained in a better-ranked block
+    packed = []
+    used_tokens = 0
+    for block in sorted(blocks, key=lambda block: block['rank']):
+        text = block['chunks'][0][1]['text']
+        for _, result in block['chunks'][1:]:
+            text = merge_texts(text, result['text'])
+        if any(text in kept['text'] for kept in packed):
+            continue
+
+        tokens = estimate_tokens(text)
+        if used_tokens + tokens > token_budget:
+            if packed:
+                continue  # A later, smaller block may still fit
+            text = text[:token_budget * 4]  # Always keep at least the best block
+            tokens = estimate_tokens(text)
+
+        best = results[block['rank']]
+        metadata = dict(best['metadata'])
+        metadata['merged_sources'] = [result['metadata'].get('source') for _, result in block['chunks']]
+        packed.append({'text': text, 'metadata': metadata, 'score': best['score']})
+        used_tokens += tokens
+
+    before = sum(estimate_tokens(result['text']) for result in results)
+    logging.info(f"Context packing: {len(results)} chunks ({before} tokens) -> {len(packed)} blocks ({used_tokens} tokens, budget {token_budget})")
+    return packed
@@ -1,30 +1,169 @@
 import logging
 import os
+import threading
 from typing import Any, Dict, List
-import uuid
+from config.config import ConfigConstants
+from data.document_catalog import DocumentCatalog
 from data.document_loader import DocumentLoader
 from data.pdf_reader import PDFReader
-from retriever.chunk_documents import chunk_documents
+from retriever.chunk_documents import chunk_documents, page_content_hash
+from retriever.context_packer import parse_source
 from retriever.vector_store_manager import VectorStoreManager
 
-class DocumentManager:
-    def __init__(self):
-        self.doc_loader = DocumentLoader()
-        self.pdf_reader = PDFReader()
-        self.vector_manager = VectorStoreManager()
+DEFAULT_NAMESPACE = "default"
+
+class DocumentNamespace:
+    def __init__(self, name, shared=None):
+        """
+        Documents visible to one browser session.
+
+        Args:
+            name (str): Session hash, or DEFAULT_NAMESPACE.
+            shared (DocumentNamespace, optional): Namespace whose documents are visible here as well.
+        """
+        self.name = name
+        self.shared = shared
         self.uploaded_documents = {}
         self.chunked_documents = {}
         self.document_ids = {}
+        self.hidden = set()  # Shared filenames deleted in this session, still visible to the others
+        self.closed = False
+        # Ingestion threads mutate the dicts above while the UI and other namespaces read them
+        self.lock = threading.RLock()
+
+    def get_document_id(self, filename):
+        doc_id = self.document_ids.get(filename)
+        if doc_id is None and self.shared is not None and filename not in self.hidden:
+            doc_id = self.shared.get_document_id(filename)
+        return doc_id
+
+    def get_file_path(self, filename):
+        file_path = self.uploaded_documents.get(filename)
+        if file_path is None and self.shared is not None and filename not in self.hidden:
+            file_path = self.shared.get_file_path(filename)
+        return file_path
+
+    def filenames(self):
+        shared = [filename for filename in self.shared.filenames() if filename not in self.hidden] if self.shared is not None else []
+        with self.lock:
+            own = list(self.uploaded_documents)
+        return shared + [filename for filename in own if filename not in shared]
+
+    def referenced_ids(self):
+        """Return a copy of the document IDs this namespace lists."""
+        with self.lock:
+            return set(self.document_ids.values())
+
+    def set_document(self, filename, file_path, doc_id):
+        with self.lock:
+            self.uploaded_documents[filename] = file_path
+            self.document_ids[filename] = doc_id
+
+    def remove_document(self, filename):
+        with self.lock:
+            self.uploaded_documents.pop(filename, None)
+            self.document_ids.pop(filename, None)
+            self.chunked_documents.pop(filename, None)
+
+    def owner_of(self, filename):
+        """Return the namespace that holds filename: this one, the shared one, or None."""
+        if filename in self.document_ids:
+            return self
+        if self.shared is None or filename in self.hidden:
+            return None
+        return self.shared.owner_of(filename)
+
+class DocumentManager:
+    def __init__(self, vector_manager=None, catalog=None):
+        self.doc_loader = DocumentLoader()
+        self.pdf_reader = PDFReader()
+        self.vector_manager = vector_manager or VectorStoreManager()
+        # Every browser session gets its own namespace over the one shared index;
+        # documents restored from the catalog live in the default namespace
+        self.namespaces = {DEFAULT_NAMESPACE: DocumentNamespace(DEFAULT_NAMESPACE)}
+        self._namespaces_lock = threading.Lock()
+        self.catalog = catalog or DocumentCatalog()
+        self._restore_documents()
         logging.info("DocumentManager initialized")
 
-    def process_document(self, file):
+    def _restore_documents(self):
+        """
+        Make documents uploaded outside any session that are still in the vector store selectable again.
+
+        Documents owned by a session are dropped: sessions do not outlive the process,
+        so they were left behind by sessions that never closed.
+        """
+        namespace = self.namespaces[DEFAULT_NAMESPACE]
+        for doc_id, entry in list(self.catalog.documents.items()):
+            if doc_id not in self.vector_manager.doc_positions:
+                logging.warning(f"Dropping catalog entry for {entry['filename']}: no chunks in the vector store")
+                self.catalog.remove(doc_id)
+                continue
+            if entry.get('owner'):
+                logging.info(f"Dropping {entry['filename']}, left behind by session {entry['owner']}")
+                self.catalog.remove(doc_id)
+                self.vector_manager.delete_document(doc_id)
+                continue
+            namespace.set_document(entry['filename'], entry['file_path'], doc_id)
+        logging.info(f"Restored {len(namespace.document_ids)} documents from the catalog")
+
+    def get_namespace(self, session_id=None):
+        """Return the namespace of a session, creating it on first use; None gives the default namespace."""
+        session_id = session_id or DEFAULT_NAMESPACE
+        with self._namespaces_lock:
+            if session_id not in self.namespaces:
+                shared = self.namespaces[DEFAULT_NAMESPACE] if ConfigConstants.SHARE_RESTORED_DOCUMENTS else None
+                self.namespaces[session_id] = DocumentNamespace(session_id, shared=shared)
+                logging.info(f"Created document namespace for session {session_id} ({len(self.namespaces) - 1} sessions)")
+            return self.namespaces[session_id]
+
+    def close_namespace(self, session_id):
+        """
+        Forget a session's namespace when the session ends, and delete the documents
+        it uploaded that no other session lists.
+
+        An upload still running for the session is rolled back when it next checks in.
+        """
+        if not session_id or session_id == DEFAULT_NAMESPACE:
+            return
+        with self._namespaces_lock:
+            namespace = self.namespaces.pop(session_id, None)
+        if namespace is None:
+            return
+        with namespace.lock:
+            namespace.closed = True
+            doc_ids = set(namespace.document_ids.values())
+        deleted = 0
+        for doc_id in doc_ids:
+            if not self._is_referenced(doc_id):
+                self.catalog.remove(doc_id)
+                self.vector_manager.delete_document(doc_id)
+                deleted += 1
+        logging.info(f"Closed document namespace for session {session_id}, deleted {deleted} documents ({len(self.namespaces) - 1} sessions)")
+
+    def _is_referenced(self, doc_id):
+        """True while any namespace still lists the document."""
+        with self._namespaces_lock:
+            namespaces = list(self.namespaces.values())
+        return any(doc_id in namespace.referenced_ids() for namespace in namespaces)
+
+    def process_document(self, file, progress=None, cancel_event=None, session_id=None):
         """
         Process an uploaded file: load, read PDF, chunk, and store in vector store.
-        Returns: (status_message, page_list, filename, doc_id)
+
+        Args:
+            file (str): Path of the uploaded file.
+            progress (callable, optional): Called as progress(pages_read, chunks_embedded) after each batch of pages.
+            cancel_event (threading.Event, optional): Stops processing after the current batch when set.
+            session_id (str, optional): Namespace the document is added to; the default namespace if None.
+
+        Returns: (status_message, filename, doc_id)
         """
+        indexing = False
         try:
             if file is None:
                 return "No file uploaded", None, None
+            namespace = self.get_namespace(session_id)
 
             logging.info(f"Processing file: {file}")
 
@@ -32,46 +171,220 @@ class DocumentManager:
             file_path = self.doc_loader.load_file(file)
             filename = os.path.basename(file_path)
 
-            # Read PDF content
-            page_list = self.pdf_reader.read_pdf(file_path)
+            # The document ID is the content hash, so a byte-identical upload is found without parsing it
+            doc_id = self.catalog.compute_doc_id(file_path)
+            entry = self.catalog.get(doc_id)
+            if entry and doc_id in self.vector_manager.doc_positions:
+                logging.info(f"{filename} is already indexed as {entry['filename']}, skipping parsing and embedding")
+                previous_doc_id = namespace.get_document_id(filename)
+                namespace.set_document(filename, file_path, doc_id)
+                if previous_doc_id and previous_doc_id != doc_id:
+                    # The name now refers to another indexed version, so the one it replaces goes as a new version's would
+                    self._replace_version(namespace, previous_doc_id, doc_id)
+                if progress:
+                    progress(entry['page_count'], entry['chunk_count'])
+                return (
+                    f"Successfully loaded {filename} with {entry['page_count']} pages",
+                    filename,
+                    doc_id
+                )
 
-            # Store the uploaded document
-            self.uploaded_documents[filename] = file_path
+            # A new version of a known document reuses the vectors of its unchanged pages
+            previous_doc_id = namespace.get_document_id(filename)
+            previous_path = namespace.get_file_path(filename)
+            reusable_pages = {}
+            if previous_doc_id and previous_doc_id != doc_id:
+                reusable_pages = self.vector_manager.get_page_vectors(previous_doc_id)
+                logging.info(f"{filename} is a new version of document {previous_doc_id}, re-embedding changed pages only")
 
-            # Generate a unique document ID
-            doc_id = str(uuid.uuid4())
-            self.document_ids[filename] = doc_id
+            # Stream pages from the PDF reader and chunk and embed them in batches,
+            # so the first pages are searchable while later ones are still being extracted
+            chunks = []
+            page_count = 0
+            pages_reused = 0
+            seen_hashes = set()
+            indexing = True
+            for page_batch in self._batched(self.pdf_reader.iter_pages(file_path), ConfigConstants.INGEST_BATCH_PAGES):
+                if (cancel_event is not None and cancel_event.is_set()) or namespace.closed:
+                    logging.info(f"Processing of {filename} cancelled after {page_count} pages")
+                    self._rollback_upload(namespace, filename, doc_id, previous_doc_id, previous_path)
+                    return f"Cancelled {filename} after {page_count} pages", None, None
+
+                batch_chunks, batch_embeddings, batch_reused = self._chunk_batch(
+                    page_batch, doc_id, page_count + 1, reusable_pages, seen_hashes)
+                page_count += len(page_batch)
+                pages_reused += batch_reused
+                self.vector_manager.add_documents(batch_chunks, batch_embeddings)
+                chunks.extend(batch_chunks)
 
-            # Chunk the pages
-            chunks = chunk_documents(page_list, doc_id, chunk_size=2000, chunk_overlap=300)
-            self.chunked_documents[filename] = chunks
+                # The document can be selected for chat once its first pages are indexed
+                namespace.set_document(filename, file_path, doc_id)
+                if progress:
+                    progress(page_count, len(chunks))
 
-            # Add chunks to vector store
-            self.vector_manager.add_documents(chunks)
+            with namespace.lock:
+                # close_namespace() either sees this document and deletes it, or the upload sees the close here
+                closed = namespace.closed
+                if not closed:
+                    namespace.chunked_documents[filename] = chunks
+                    owner = None if namespace.name == DEFAULT_NAMESPACE else namespace.name
+                    self.catalog.add(doc_id, filename, file_path, page_count=page_count, chunk_count=len(chunks), owner=owner)
+            if closed:
+                logging.info(f"Session closed while processing {filename}, discarding it")
+                self._rollback_upload(namespace, filename, doc_id, previous_doc_id, previous_path)
+                return f"Cancelled {filename}: the session has ended", None, None
+            if previous_doc_id and previous_doc_id != doc_id and chunks:
+                self._replace_version(namespace, previous_doc_id, doc_id)
+                logging.info(f"Re-indexed {filename}: {pages_reused} pages reused, {page_count - pages_reused} pages re-embedded")
 
             return (
-                f"Successfully loaded {filename} with {len(page_list)} pages",
+                f"Successfully loaded {filename} with {page_count} pages",
                 filename,
                 doc_id
             )
 
         except Exception as e:
             logging.error(f"Error processing document: {str(e)}")
-            return f"Error: {str(e)}", [], None, None
+            if indexing:
+                # Batches indexed before the failure would otherwise be duplicated by a retry
+                self._rollback_upload(namespace, filename, doc_id, previous_doc_id, previous_path)
+            return f"Error: {str(e)}", None, None
 
-    def get_uploaded_documents(self):
-        """Return the list of uploaded document filenames."""
-        return list(self.uploaded_documents.keys())
+    def _rollback_upload(self, namespace, filename, doc_id, previous_doc_id, previous_path):
+        """Undo an upload that did not complete: restore the previous version's name and drop the pages indexed so far."""
+        with namespace.lock:
+            namespace.remove_document(filename)
+            if (previous_doc_id and previous_doc_id != doc_id and namespace.get_document_id(filename) != previous_doc_id
+                    and previous_doc_id in self.vector_manager.doc_positions):
+                # The previous version stays in place until the new one is complete
+                namespace.set_document(filename, previous_path, previous_doc_id)
+        if not self._is_referenced(doc_id):
+            self.catalog.remove(doc_id)
+            self.vector_manager.delete_document(doc_id)
+
+    @staticmethod
+    def _chunk_batch(page_batch, doc_id, start_page, reusable_pages, seen_hashes):
+        """
+        Chunk a batch of pages, reusing the chunks and vectors of pages whose content is unchanged.
+
+        Returns:
+            tuple: (chunks in page order, their vectors with None for chunks still to be embedded, pages reused)
+        """
+        reused = [reusable_pages.get(page_content_hash(page)) if page else None for page in page_batch]
+        chunks, embeddings = [], []
+
+        def chunk_fresh(first, last):
+            # Pages are chunked in runs between reused ones, so seen_hashes always covers every earlier page
+            fresh_chunks = chunk_documents(page_batch[first:last], doc_id, chunk_size=2000, chunk_overlap=300,
+                                           start_page=start_page + first, seen_hashes=seen_hashes)
+            chunks.extend(fresh_chunks)
+            embeddings.extend([None] * len(fresh_chunks))
+
+        run_start = 0
+        for offset, reuse in enumerate(reused):
+            if not reuse:
+                continue
+            if run_start < offset:
+                chunk_fresh(run_start, offset)
+            run_start = offset + 1
+            for old_chunk, vector in reuse:
+                chunk_hash = page_content_hash(old_chunk['text'])
+                if chunk_hash in seen_hashes:
+                    continue
+                seen_hashes.add(chunk_hash)
+                chunk_index = parse_source(old_chunk['source'])[2]
+                chunks.append({
+                    'text': old_chunk['text'],
+                    'source': f"doc_{doc_id}_page_{start_page + offset}_chunk_{chunk_index}",
+                    'doc_id': doc_id,
+                    'page_hash': old_chunk['page_hash']
+                })
+                embeddings.append(vector)
+        if run_start < len(page_batch):
+            chunk_fresh(run_start, len(page_batch))
+        return chunks, embeddings, sum(1 for reuse in reused if reuse)
 
-    def get_chunks(self, filename):
+    def _replace_version(self, namespace, previous_doc_id, doc_id):
+        """
+        Point every name of a document's previous version in the namespace at the new one,
+        and remove the old chunks once no other namespace lists them.
+        """
+        with namespace.lock:
+            for name in [name for name, d_id in namespace.document_ids.items() if d_id == previous_doc_id]:
+                namespace.document_ids[name] = doc_id
+                namespace.chunked_documents.pop(name, None)
+        if not self._is_referenced(previous_doc_id):
+            self.catalog.remove(previous_doc_id)
+            self.vector_manager.delete_document(previous_doc_id)
+
+    @staticmethod
+    def _batched(iterable, size):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def delete_document(self, filename, session_id=None):
+        """
+        Remove a document from the selector, and from the catalog and the vector store
+        once no other session lists it.
+
+        A document shared from the default namespace is only hidden from the
+        session deleting it; the other sessions keep it.
+
+        Returns:
+            str: Status message.
+        """
+        namespace = self.get_namespace(session_id)
+        owner = namespace.owner_of(filename)
+        if owner is None:
+            return f"No document named {filename}"
+        if owner is not namespace:
+            with namespace.lock:
+                namespace.hidden.add(filename)
+            return f"Removed {filename} from this session"
+
+        with namespace.lock:
+            doc_id = namespace.document_ids.get(filename)
+            if doc_id is None:
+                return f"No document named {filename}"
+            # The same content may have been uploaded under several names
+            for name in [name for name, d_id in namespace.document_ids.items() if d_id == doc_id]:
+                namespace.remove_document(name)
+        if self._is_referenced(doc_id):
+            return f"Removed {filename} from this session"
+        self.catalog.remove(doc_id)
+        deleted = self.vector_manager.delete_document(doc_id)
+        return f"Deleted {filename} ({deleted} chunks)"
+
+    def get_selected_document_ids(self, selected_docs: List[str], session_id=None) -> List[str]:
+        """Return the document IDs of the selected filenames, skipping unknown ones."""
+        namespace = self.get_namespace(session_id)
+        doc_ids = [namespace.get_document_id(filename) for filename in selected_docs]
+        return [doc_id for doc_id in doc_ids if doc_id]
+
+    def get_uploaded_documents(self, session_id=None):
+        """Return the list of document filenames visible to a session."""
+        return self.get_namespace(session_id).filenames()
+
+    def get_chunks(self, filename, session_id=None):
         """Return chunks for a given filename."""
-        return self.chunked_documents.get(filename, [])
+        namespace = self.get_namespace(session_id)
+        if filename in namespace.chunked_documents:
+            return namespace.chunked_documents[filename]
+        # Documents restored from the catalog or re-uploaded are read back from the vector store
+        doc_id = namespace.get_document_id(filename)
+        return self.vector_manager.get_document_chunks(doc_id) if doc_id else []
 
-    def get_document_id(self, filename):
+    def get_document_id(self, filename, session_id=None):
         """Return the document ID for a given filename."""
-        return self.document_ids.get(filename, None)
+        return self.get_namespace(session_id).get_document_id(filename)
     
-    def retrieve_top_k(self, query: str, selected_docs: List[str], k: int = 5) -> List[Dict[str, Any]]:
+    def retrieve_top_k(self, query: str, selected_docs: List[str], k: int = 5, query_vector=None, session_id=None) -> List[Dict[str, Any]]:
         """
         Retrieve the top K chunks across the selected documents based on the user's query.
 
@@ -79,6 +392,8 @@ class DocumentManager:
             query (str): The user's query.
             selected_docs (List[str]): List of selected document filenames from the dropdown.
             k (int): Number of top results to return (default is 5).
+            query_vector (np.ndarray, optional): The query already embedded, to avoid embedding it again.
+            session_id (str, optional): Session whose namespace the filenames belong to.
 
         Returns:
             List[Dict[str, Any]]: List of top K chunks with their text, metadata, and scores.
@@ -87,27 +402,24 @@ class DocumentManager:
             logging.warning("No documents selected for retrieval")
             return []
 
-        all_results = []
+        namespace = self.get_namespace(session_id)
+        doc_ids = []
         for filename in selected_docs:
-            doc_id = self.get_document_id(filename)
+            doc_id = namespace.get_document_id(filename)
             if not doc_id:
                 logging.warning(f"No document ID found for filename: {filename}")
                 continue
+            doc_ids.append(doc_id)
 
-            # Search for relevant chunks within this document
-            results = self.vector_manager.search(query, doc_id, k=k)
-            all_results.extend(results)
-
-        # Sort all results by score in descending order and take the top K
-        all_results.sort(key=lambda x: x['score'], reverse=True)
-        top_k_results = all_results[:k]
+        # Search all selected documents at once; results come back nearest first
+        top_k_results = self.vector_manager.search_documents(query, doc_ids, k=k, query_vector=query_vector)
 
         # Log the list of retrieved documents
         #logging.info(f"Result from search :{all_results} ")
         logging.info(f"Retrieved top {k} documents:")
         for i, result in enumerate(top_k_results, 1):
             doc_id = result['metadata'].get('doc_id', 'Unknown')
-            filename = next((name for name, d_id in self.document_ids.items() if d_id == doc_id), 'Unknown')
+            filename = next((name for name in selected_docs if namespace.get_document_id(name) == doc_id), 'Unknown')
             logging.info(f"{i}. Filename: {filename}, Doc ID: {doc_id}, Score: {result['score']:.4f}, Text: {result['text'][:200]}...")
 
         return top_k_results
@@ -0,0 +1,87 @@
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from langchain_core.embeddings import Embeddings
+from config.config import ConfigConstants
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_models = {}
+_models_lock = threading.Lock()
+
+def _resident_memory_mb():
+    """Current resident memory of the process, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+class SharedEmbeddings(Embeddings):
+    def __init__(self, model_name: str):
+        """
+        Process-wide embedding model, loaded on first use.
+
+        All inference runs on one dedicated thread, so concurrent callers queue up
+        instead of each driving their own torch thread pool and oversubscribing cores.
+        """
+        self.model_name = model_name
+        self._model = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self.load_seconds = None
+        self.load_rss_mb = None
+
+    def _load(self):
+        if self._model is not None:
+            return self._model
+        if ConfigConstants.EMBEDDING_NUM_THREADS:
+            try:
+                import torch
+                torch.set_num_threads(ConfigConstants.EMBEDDING_NUM_THREADS)
+            except ImportError:
+                pass
+
+        from langchain_huggingface import HuggingFaceEmbeddings
+        rss_before = _resident_memory_mb()
+        start = time.perf_counter()
+        self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+        self.load_seconds = time.perf_counter() - start
+        self.load_rss_mb = _resident_memory_mb()
+        if self.load_rss_mb is None:
+            memory = "resident memory unknown"
+        elif rss_before is None:
+            memory = f"resident memory {self.load_rss_mb:.0f} MB"
+        else:
+            memory = f"resident memory {self.load_rss_mb:.0f} MB, +{self.load_rss_mb - rss_before:.0f} MB"
+        logging.info(f"Loaded embedding model {self.model_name} in {self.load_seconds:.2f}s "
+                     f"({memory}, threads {ConfigConstants.EMBEDDING_NUM_THREADS or 'default'})")
+        return self._model
+
+    def _run(self, method, *args):
+        return self._executor.submit(lambda: getattr(self._load(), method)(*args)).result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._run("embed_documents", texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._run("embed_query", text)
+
+def get_embedding_model(model_name: str = None) -> SharedEmbeddings:
+    """Return the shared embedding runtime for a model (the configured one by default)."""
+    model_name = model_name or ConfigConstants.EMBEDDING_MODEL_NAME
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = SharedEmbeddings(model_name)
+        return _models[model_name]
@@ -0,0 +1,128 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.config import ConfigConstants
+
+class IngestionJob:
+    def __init__(self, file_path, session_id=None):
+        """Progress and outcome of one background upload."""
+        self.job_id = str(uuid.uuid4())
+        self.file_path = file_path
+        self.session_id = session_id
+        self.filename = os.path.basename(file_path)
+        self.status = "queued"  # queued, running, done, failed or cancelled
+        self.pages_read = 0
+        self.chunks_embedded = 0
+        self.message = ""
+        self.doc_id = None
+        self.submitted_at = time.time()
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def describe(self):
+        """One-line progress summary for the UI."""
+        if self.status == "queued":
+            return f"{self.filename}: waiting for a free worker"
+        if self.status == "running":
+            return f"{self.filename}: {self.pages_read} pages read, {self.chunks_embedded} chunks embedded"
+        return self.message
+
+class IngestionManager:
+    def __init__(self, document_manager, max_workers=None, max_pending=None, max_history=None):
+        """
+        Process uploads on a bounded pool of background workers.
+
+        Args:
+            document_manager (DocumentManager): Does the actual reading, chunking and indexing.
+            max_workers (int): Uploads processed at the same time.
+            max_pending (int): Uploads that may be queued or running before submit() refuses new ones.
+            max_history (int): Finished jobs kept until released; the oldest are evicted beyond this.
+        """
+        self.doc_manager = document_manager
+        self.max_pending = max_pending or ConfigConstants.INGESTION_MAX_PENDING
+        self.max_history = max_history or ConfigConstants.INGESTION_JOB_HISTORY
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or ConfigConstants.INGESTION_WORKERS,
+            thread_name_prefix="ingestion"
+        )
+        self.jobs = {}
+        self._lock = threading.Lock()
+        logging.info("IngestionManager initialized")
+
+    def submit(self, file_path, session_id=None):
+        """
+        Queue an upload for background processing into a session's document namespace.
+
+        Raises:
+            RuntimeError: If too many uploads are already queued or running.
+        """
+        with self._lock:
+            pending = sum(1 for job in self.jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise RuntimeError(f"{pending} uploads are already in progress, please try again shortly")
+            job = IngestionJob(file_path, session_id)
+            self.jobs[job.job_id] = job
+            self._prune_finished()
+        self.executor.submit(self._run, job)
+        logging.info(f"Queued ingestion job {job.job_id} for {job.filename}")
+        return job
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            job.status = "cancelled"
+            job.message = f"Cancelled {job.filename} before it started"
+            return
+
+        job.status = "running"
+        start = time.perf_counter()
+
+        def progress(pages_read, chunks_embedded):
+            job.pages_read = pages_read
+            job.chunks_embedded = chunks_embedded
+
+        try:
+            message, filename, doc_id = self.doc_manager.process_document(
+                job.file_path, progress=progress, cancel_event=job.cancel_event, session_id=job.session_id
+            )
+            job.message = message
+            job.doc_id = doc_id
+            if job.cancel_event.is_set() and not doc_id:
+                job.status = "cancelled"
+            else:
+                job.status = "done" if doc_id else "failed"
+        except Exception as e:
+            logging.error(f"Ingestion job {job.job_id} failed: {str(e)}")
+            job.message = f"Error: {str(e)}"
+            job.status = "failed"
+        logging.info(f"Ingestion job {job.job_id} for {job.filename} {job.status} in {time.perf_counter() - start:.2f}s")
+
+    def _prune_finished(self):
+        """Evict the oldest finished jobs beyond max_history, for sessions that stopped polling before release()."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]  # Insertion order, oldest first
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def release(self, job_id):
+        """Forget a finished job once its outcome has been shown; running jobs are kept."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job and job.finished:
+                del self.jobs[job_id]
+
+    def cancel(self, job_id):
+        """Ask a queued or running job to stop after its current batch of pages."""
+        job = self.jobs.get(job_id)
+        if not job or job.finished:
+            return "No upload in progress"
+        job.cancel_event.set()
+        logging.info(f"Cancellation requested for ingestion job {job_id}")
+        return f"Cancelling {job.filename}..."
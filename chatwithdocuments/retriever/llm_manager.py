@@ -1,18 +1,25 @@
 import logging
 import os
-from typing import List, Dict, Any, Tuple
+import time
+from typing import List, Dict, Any, Iterator, Tuple
 from langchain_groq import ChatGroq
-from langchain.chains import RetrievalQA
 from langchain_core.documents import Document
-from langchain_core.retrievers import BaseRetriever
 from langchain.chains.summarize import load_summarize_chain
+from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
 from langchain.prompts import PromptTemplate
+from concurrent.futures import ThreadPoolExecutor
+from config.config import ConfigConstants
+from utils.rate_limiter import RateLimiter
+from retriever.model_router import ModelRouter
 
 class LLMManager:
     DEFAULT_MODEL = "gemma2-9b-it"  # Set the default model name
 
     def __init__(self):
         self.generation_llm = None
+        self.router = None
+        # Shared by the concurrent summarization calls so they stay within the provider's request rate
+        self.rate_limiter = RateLimiter(ConfigConstants.SUMMARY_REQUESTS_PER_MINUTE, period=60.0)
         logging.info("LLMManager initialized")
 
         # Initialize the default model during construction
@@ -37,10 +44,22 @@ class LLMManager:
             raise ValueError("GROQ_API_KEY is not set. Please add it in your environment variables.")
         
         os.environ["GROQ_API_KEY"] = api_key
-        self.generation_llm = ChatGroq(model=model_name, temperature=0.7)
-        self.generation_llm.name = model_name
+        # The selected model is tried first; the other configured models are fallbacks.
+        # Switching models reuses the router, so its clients, latency history and executor are kept
+        if self.router is None:
+            self.router = ModelRouter(self._create_llm, ConfigConstants.GENERATION_MODELS, model_name)
+        else:
+            self.router.set_primary_model(model_name)
+        self.generation_llm = self.router.get_llm(model_name)
         logging.info(f"Generation LLM {model_name} initialized")
 
+    @staticmethod
+    def _create_llm(model_name: str) -> ChatGroq:
+        # No client-side retries: the router fails over to another model instead
+        llm = ChatGroq(model=model_name, temperature=0.7, timeout=ConfigConstants.LLM_REQUEST_TIMEOUT_SECONDS, max_retries=0)
+        llm.name = model_name
+        return llm
+
     def reinitialize_llm(self, model_name: str) -> str:
         """
         Reinitialize the LLM with a new model name.
@@ -58,64 +77,82 @@ class LLMManager:
             logging.error(f"Failed to reinitialize LLM with model {model_name}: {str(e)}")
             return f"Error: Failed to change LLM model: {str(e)}"
 
-    def generate_response(self, question: str, relevant_docs: List[Dict[str, Any]]) -> Tuple[str, List[Document]]:
+    def _answer_inputs(self, question: str, relevant_docs: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Inputs of the question-answering prompt, shared by generate_response and stream_response.
+
+        Raises:
+            ValueError: If the generation LLM is not initialized.
+        """
+        if not self.generation_llm:
+            raise ValueError("Generation LLM is not initialized. Call initialize_generation_llm first.")
+        # Chunks are joined the way the "stuff" documents chain joins them
+        return {"context": "\n\n".join(doc['text'] for doc in relevant_docs), "question": question}
+
+    @staticmethod
+    def _answer_chain(llm):
+        """The "stuff" question-answering prompt of LangChain's RetrievalQA, piped into the model."""
+        return PROMPT_SELECTOR.get_prompt(llm) | llm
+
+    def generate_response(self, question: str, relevant_docs: List[Dict[str, Any]], on_model=None) -> Tuple[str, List[Document]]:
         """
         Generate a response using the generation LLM based on the question and relevant documents.
 
         Args:
             question (str): The user's query.
             relevant_docs (List[Dict[str, Any]]): List of relevant document chunks with text, metadata, and scores.
+            on_model (callable, optional): Called with the name of the model that answered, which may be a fallback.
 
         Returns:
             Tuple[str, List[Document]]: The LLM's response and the source documents used.
 
         Raises:
             ValueError: If the generation LLM is not initialized.
-            Exception: If there's an error during the QA chain invocation.
+            Exception: If there's an error during the model invocation.
         """
-        if not self.generation_llm:
-            raise ValueError("Generation LLM is not initialized. Call initialize_generation_llm first.")
+        inputs = self._answer_inputs(question, relevant_docs)
+        try:
+            # On whichever model the router picks
+            response = self.router.invoke(lambda llm: self._answer_chain(llm).invoke(inputs).content, on_model=on_model)
+        except Exception as e:
+            logging.error(f"Error during QA chain invocation: {str(e)}")
+            raise e
+        source_docs = [Document(page_content=doc['text'], metadata=doc['metadata']) for doc in relevant_docs]
+        return response, source_docs
 
-        # Convert the relevant documents into LangChain Document objects
-        documents = [
-            Document(page_content=doc['text'], metadata=doc['metadata'])
-            for doc in relevant_docs
-        ]
-
-        # Create a proper retriever by subclassing BaseRetriever
-        class SimpleRetriever(BaseRetriever):
-            def __init__(self, docs: List[Document], **kwargs):
-                super().__init__(**kwargs)  # Pass kwargs to BaseRetriever
-                self._docs = docs  # Use a private attribute to store docs
-                logging.debug(f"SimpleRetriever initialized with {len(docs)} documents")
-
-            def _get_relevant_documents(self, query: str) -> List[Document]:
-                logging.debug(f"SimpleRetriever._get_relevant_documents called with query: {query}")
-                return self._docs
-
-            async def _aget_relevant_documents(self, query: str) -> List[Document]:
-                logging.debug(f"SimpleRetriever._aget_relevant_documents called with query: {query}")
-                return self._docs
-
-        # Instantiate the retriever
-        retriever = SimpleRetriever(docs=documents)
-
-        # Create a retrieval-based question-answering chain
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.generation_llm,
-            retriever=retriever,
-            return_source_documents=True
-        )
+    def stream_response(self, question: str, relevant_docs: List[Dict[str, Any]], on_model=None) -> Iterator[str]:
+        """
+        Stream the answer to a question token by token, with the same prompt as generate_response.
+
+        Args:
+            question (str): The user's query.
+            relevant_docs (List[Dict[str, Any]]): List of relevant document chunks with text, metadata, and scores.
+            on_model (callable, optional): Called with the name of the model that answered once the stream completes.
+
+        Yields:
+            str: Pieces of the response as they arrive from the model.
+
+        Raises:
+            ValueError: If the generation LLM is not initialized.
+        """
+        inputs = self._answer_inputs(question, relevant_docs)
 
+        start = time.perf_counter()
+        first_token_seconds = None
         try:
-            result = qa_chain.invoke({"query": question})
-            response = result['result']
-            source_docs = result['source_documents']
-            #logging.info(f"Generated response for question: {question} : {response}")
-            return response, source_docs
+            for chunk in self.router.stream(lambda llm: self._answer_chain(llm).stream(inputs), on_model=on_model):
+                if not chunk.content:
+                    continue
+                if first_token_seconds is None:
+                    first_token_seconds = time.perf_counter() - start
+                yield chunk.content
         except Exception as e:
-            logging.error(f"Error during QA chain invocation: {str(e)}")
+            logging.error(f"Error during streaming response generation: {str(e)}")
             raise e
+        finally:
+            total_seconds = time.perf_counter() - start
+            ttft = f"{first_token_seconds:.2f}s" if first_token_seconds is not None else "n/a"
+            logging.info(f"Streamed response: time to first token {ttft}, total {total_seconds:.2f}s")
 
     def generate_summary_v0(self, chunks: any):
         logging.info("Generating summary ...")
@@ -197,11 +234,10 @@ class LLMManager:
         """
         prompt = PromptTemplate(input_variables=["text"], template=question_prompt_template)
         
-        chain = load_summarize_chain(self.generation_llm, chain_type="stuff", prompt=prompt)
         docs = [Document(page_content=full_text)]
 
         try:
-            result = chain.invoke(docs)
+            result = self.router.invoke(lambda llm: load_summarize_chain(llm, chain_type="stuff", prompt=prompt).invoke(docs))
             question_output = result.get("output_text", "").strip()
             
             # Clean and parse the output into a list of questions
@@ -223,87 +259,105 @@ class LLMManager:
             logging.error(f"Error generating questions: {e}")
             return []
     
-    def generate_summary(self, chunks: Any, toc_text: Any, summary_type: str = "medium") -> str:
+    def generate_summary(self, chunks: Any, toc_text: Any = None, summary_type: str = "medium") -> str:
         """
-        Generate a summary of the document using LangChain's summarization chains.
+        Generate a summary of a whole document with a hierarchical map-reduce.
+
+        Consecutive chunks are grouped into sections that fit one request and each
+        section is summarized concurrently (the map step, rate limited). The partial
+        summaries are then combined in a tree until they fit a single final request,
+        so every page of the document contributes regardless of its length.
 
         Args:
-            vector_store_manager: Instance of VectorStoreManager with a FAISS vector store.
+            chunks (list): Document chunks as dictionaries with 'text', in document order.
+            toc_text (str, optional): Table of contents to give the map step some structure.
             summary_type (str): Type of summary ("small", "medium", "detailed").
-            k (int): Number of chunks to retrieve from the vector store.
-            include_toc (bool): Whether to include the table of contents (if available).
 
         Returns:
             str: Generated summary.
 
         Raises:
-            ValueError: If summary_type is invalid or vector store is not initialized.
+            ValueError: If summary_type is invalid or the generation LLM is not initialized.
         """
+        if not self.generation_llm:
+            raise ValueError("Generation LLM is not initialized. Call initialize_generation_llm first.")
 
-        # Define chunk retrieval parameters based on summary type
-        if summary_type == "small":
-            k = min(k, 3)  # Fewer chunks for small summary
-            chain_type = "stuff"  # Use stuff for small summaries
-            word_count = "50-100"
-        elif summary_type == "medium":
-            k = min(k, 10)
-            chain_type = "map_reduce"  # Use map-reduce for medium summaries
-            word_count = "200-400"
-        else:  # detailed
-            k = min(k, 20)
-            chain_type = "map_reduce"  # Use map-reduce for detailed summaries
-            word_count = "500-1000"
-
-        # Define prompts
-        if chain_type == "stuff":
-            prompt = PromptTemplate(
-                input_variables=["text"],
-                template=(
-                    "Generate a {summary_type} summary ({word_count} words) of the following document excerpts. "
-                    "Focus on key points and ensure clarity. Stick strictly to the provided text:\n\n"
-                    "{toc_prompt}{text}"
-                ).format(
-                    summary_type=summary_type,
-                    word_count=word_count,
-                    toc_prompt="Table of Contents:\n{toc_text}\n\n" if toc_text else ""
-                )
-            )
-            chain = load_summarize_chain(
-                llm=self.generation_llm,
-                chain_type="stuff",
-                prompt=prompt
-            )
-        else:  # map_reduce
-            map_prompt = PromptTemplate(
-                input_variables=["text"],
-                template=(
-                    "Summarize the following document excerpt in 1-2 sentences, focusing on key points. "
-                    "Consider the document's structure from this table of contents:\n\n"
-                    "Table of Contents:\n{toc_text}\n\nExcerpt:\n{text}"
-                ).format(toc_text=toc_text if toc_text else "Not provided")
+        word_counts = {"small": "50-100", "medium": "200-400", "detailed": "500-1000"}
+        if summary_type not in word_counts:
+            raise ValueError("summary_type must be 'small', 'medium', or 'detailed'")
+
+        map_prompt = PromptTemplate(
+            input_variables=["text"],
+            template=(
+                "Summarize the following document excerpt in a few bullet points, focusing on key points. "
+                "Stick strictly to the provided text.\n\n"
+                + ("Table of Contents:\n" + toc_text.replace("{", "{{").replace("}", "}}") + "\n\n" if toc_text else "")
+                + "Excerpt:\n{text}"
             )
-            combine_prompt = PromptTemplate(
-                input_variables=["text"],
-                template=(
-                    "Combine the following summaries into a cohesive {summary_type} summary "
-                    "({word_count} words) of the document. Ensure clarity, avoid redundancy, and "
-                    "organize by key themes or sections if applicable:\n\n{text}"
-                ).format(summary_type=summary_type, word_count=word_count)
-            )
-            chain = load_summarize_chain(
-                llm=self.generation_llm,
-                chain_type="map_reduce",
-                map_prompt=map_prompt,
-                combine_prompt=combine_prompt,
-                return_intermediate_steps=False
+        )
+        reduce_prompt = PromptTemplate(
+            input_variables=["text"],
+            template=(
+                "Combine the following partial summaries of consecutive parts of a document into one "
+                "set of bullet points. Keep the document order, avoid redundancy and keep only the key points:\n\n{text}"
             )
+        )
+        final_prompt = PromptTemplate(
+            input_variables=["text"],
+            template=(
+                "Combine the following summaries into a cohesive {summary_type} summary "
+                "({word_count} words) of the document, using bullet points. Ensure clarity, avoid redundancy, and "
+                "organize by key themes or sections if applicable:\n\n{{text}}"
+            ).format(summary_type=summary_type, word_count=word_counts[summary_type])
+        )
 
-        # Run the chain
         try:
-            logging.info(f"Generating {summary_type} summary with {len(chunks)} chunks")
-            summary = chain.run(chunks)
-            logging.info(f"{summary_type.capitalize()} summary generated successfully")
+            start = time.perf_counter()
+            texts = [chunk['text'] for chunk in chunks]
+            sections = self._group_texts(texts, ConfigConstants.SUMMARY_MAP_MAX_CHARS)
+            logging.info(f"Generating {summary_type} summary: {len(texts)} chunks in {len(sections)} sections")
+
+            if len(sections) == 1:
+                # Short documents fit a single request
+                summary = self._invoke_prompt(final_prompt, sections[0])
+            else:
+                partials = self._invoke_prompt_concurrently(map_prompt, sections)
+                level = 1
+                while sum(len(partial) for partial in partials) > ConfigConstants.SUMMARY_REDUCE_MAX_CHARS and len(partials) > 1:
+                    groups = self._group_texts(partials, ConfigConstants.SUMMARY_REDUCE_MAX_CHARS)
+                    if len(groups) == len(partials):
+                        groups = ["\n\n".join(partials[i:i + 2]) for i in range(0, len(partials), 2)]  # Always make progress
+                    logging.info(f"Summary reduce level {level}: {len(partials)} partial summaries into {len(groups)}")
+                    partials = self._invoke_prompt_concurrently(reduce_prompt, groups)
+                    level += 1
+                summary = self._invoke_prompt(final_prompt, "\n\n".join(partials))
+
+            logging.info(f"{summary_type.capitalize()} summary generated successfully in {time.perf_counter() - start:.2f}s")
             return summary
         except Exception as e:
             logging.error(f"Error generating summary: {str(e)}")
-            return f"Error generating summary: {str(e)}"
\ No newline at end of file
+            return f"Error generating summary: {str(e)}"
+
+    @staticmethod
+    def _group_texts(texts: List[str], max_chars: int) -> List[str]:
+        """Join consecutive texts into groups of at most max_chars characters (a single longer text is truncated)."""
+        groups, current, current_length = [], [], 0
+        for text in texts:
+            text = text[:max_chars]
+            if current and current_length + len(text) > max_chars:
+                groups.append("\n\n".join(current))
+                current, current_length = [], 0
+            current.append(text)
+            current_length += len(text) + 2
+        if current:
+            groups.append("\n\n".join(current))
+        return groups
+
+    def _invoke_prompt(self, prompt: PromptTemplate, text: str) -> str:
+        self.rate_limiter.acquire()
+        return self.router.invoke(lambda llm: llm.invoke(prompt.format(text=text)).content.strip())
+
+    def _invoke_prompt_concurrently(self, prompt: PromptTemplate, texts: List[str]) -> List[str]:
+        """Run the prompt over each text concurrently, keeping the input order."""
+        with ThreadPoolExecutor(max_workers=ConfigConstants.SUMMARY_MAP_CONCURRENCY) as executor:
+            return list(executor.map(lambda text: self._invoke_prompt(prompt, text), texts))
@@ -0,0 +1,198 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+from config.config import ConfigConstants
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits, timeouts and server errors, where another model may still answer."""
+    if isinstance(error, TimeoutError):
+        return True
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    name = type(error).__name__
+    message = str(error).lower()
+    return ("RateLimit" in name or "Timeout" in name or "Connection" in name
+            or "rate limit" in message or "timed out" in message)
+
+def is_rate_limited(error: Exception) -> bool:
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status_code == 429 or "RateLimit" in type(error).__name__ or "rate limit" in str(error).lower()
+
+class ModelStats:
+    def __init__(self, window: int = 100):
+        """Recent latency and error history of one model."""
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True for success
+        self.cooldown_until = 0.0
+
+    def record_success(self, seconds: float):
+        self.latencies.append(seconds)
+        self.outcomes.append(True)
+
+    def record_error(self, rate_limited: bool = False):
+        self.outcomes.append(False)
+        if rate_limited:
+            self.cooldown_until = time.monotonic() + ConfigConstants.LLM_RATE_LIMIT_COOLDOWN_SECONDS
+
+    def p95(self):
+        return float(np.percentile(self.latencies, 95)) if self.latencies else None
+
+    def error_rate(self) -> float:
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+class ModelRouter:
+    def __init__(self, llm_factory, model_names, primary_model):
+        """
+        Route generation calls over several models with failover and hedging.
+
+        Args:
+            llm_factory (callable): Creates the LangChain chat model for a model name.
+            model_names (list): Models that may serve requests.
+            primary_model (str): Model tried first; the others are fallbacks.
+        """
+        self.llm_factory = llm_factory
+        self.primary_model = primary_model
+        self.model_names = [primary_model] + [name for name in model_names if name != primary_model]
+        self.stats = {name: ModelStats() for name in self.model_names}
+        self._llms = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+    def set_primary_model(self, primary_model):
+        """Make another model the one tried first, keeping the clients, stats and executor."""
+        with self._lock:
+            self.stats.setdefault(primary_model, ModelStats())
+            self.model_names = [primary_model] + [name for name in self.model_names if name != primary_model]
+            self.primary_model = primary_model
+
+    def get_llm(self, model_name):
+        with self._lock:
+            if model_name not in self._llms:
+                self._llms[model_name] = self.llm_factory(model_name)
+            return self._llms[model_name]
+
+    def candidates(self):
+        """Primary model first, then fallbacks ordered by error rate and p95 latency; rate-limited models go last."""
+        fallbacks = sorted(
+            self.model_names[1:],
+            key=lambda name: (self.stats[name].error_rate(), self.stats[name].p95() or float("inf"))
+        )
+        ordered = [self.primary_model] + fallbacks
+        return [name for name in ordered if not self.stats[name].cooling_down()] + \
+               [name for name in ordered if self.stats[name].cooling_down()]
+
+    def _call(self, model_name, fn):
+        start = time.perf_counter()
+        try:
+            result = fn(self.get_llm(model_name))
+        except Exception as e:
+            self.stats[model_name].record_error(rate_limited=is_rate_limited(e))
+            raise
+        self.stats[model_name].record_success(time.perf_counter() - start)
+        return result
+
+    def _hedge_deadline(self, model_name):
+        """Seconds to wait for a model before sending a duplicate request, or None if hedging is off."""
+        stats = self.stats[model_name]
+        if not ConfigConstants.LLM_HEDGING_ENABLED or len(stats.latencies) < ConfigConstants.LLM_HEDGING_MIN_SAMPLES:
+            return None
+        return max(stats.p95(), ConfigConstants.LLM_HEDGING_MIN_DELAY_SECONDS)
+
+    def invoke(self, fn, on_model=None):
+        """
+        Call fn(llm) on the best available model, failing over on retryable errors.
+
+        When the first model has not answered within its p95 latency, a hedged
+        duplicate request goes to the next model and whichever answers first wins.
+
+        Args:
+            fn (callable): Called with the chat model to use.
+            on_model (callable, optional): Called with the name of the model whose result is returned.
+
+        Raises:
+            Exception: The last error if every model failed, or a non-retryable error of the primary model.
+        """
+        candidates = self.candidates()
+        last_error = None
+        index = 0
+        while index < len(candidates):
+            model_name = candidates[index]
+            pending = {self._executor.submit(self._call, model_name, fn): model_name}
+            deadline = self._hedge_deadline(model_name)
+            if deadline is not None and index + 1 < len(candidates):
+                done, _ = wait(pending, timeout=deadline)
+                if not done:
+                    hedge_model = candidates[index + 1]
+                    logging.info(f"{model_name} slower than {deadline:.2f}s, hedging with {hedge_model}")
+                    pending[self._executor.submit(self._call, hedge_model, fn)] = hedge_model
+                    index += 1
+            index += 1
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    answered_by = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Any failure of a fallback is skipped; the primary model only fails over on transient errors
+                        if not is_retryable(e) and answered_by == self.primary_model:
+                            raise
+                        logging.warning(f"Model {answered_by} failed ({type(e).__name__}: {e}), trying next model")
+                        last_error = e
+                        continue
+                    if answered_by != self.primary_model:
+                        logging.info(f"Response served by fallback model {answered_by}")
+                    if on_model:
+                        on_model(answered_by)
+                    return result
+
+        raise last_error or RuntimeError("No generation model available")
+
+    def stream(self, fn, on_model=None):
+        """
+        Yield from fn(llm) on the best available model.
+
+        Failover only happens before the first piece has been yielded; a stream that
+        breaks midway is not restarted on another model, which would repeat text.
+
+        Args:
+            fn (callable): Called with the chat model to use; returns an iterator.
+            on_model (callable, optional): Called with the name of the model once its stream completes.
+        """
+        last_error = None
+        for model_name in self.candidates():
+            start = time.perf_counter()
+            started = False
+            try:
+                for piece in fn(self.get_llm(model_name)):
+                    started = True
+                    yield piece
+                self.stats[model_name].record_success(time.perf_counter() - start)
+                if on_model:
+                    on_model(model_name)
+                return
+            except Exception as e:
+                self.stats[model_name].record_error(rate_limited=is_rate_limited(e))
+                if started or (not is_retryable(e) and model_name == self.primary_model):
+                    raise
+                logging.warning(f"Model {model_name} failed ({type(e).__name__}: {e}), trying next model")
+                last_error = e
+        raise last_error or RuntimeError("No generation model available")
+
+    def get_stats(self):
+        """Per-model call count, error rate and p95 latency over the recent window."""
+        return {
+            name: {"calls": len(stats.outcomes), "error_rate": stats.error_rate(), "p95_seconds": stats.p95(),
+                   "cooling_down": stats.cooling_down()}
+            for name, stats in self.stats.items()
+        }
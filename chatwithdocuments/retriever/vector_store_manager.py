@@ -1,25 +1,76 @@
 import os
+import json
+import time
+import uuid
+import atexit
+import shutil
 import logging
+import threading
+import numpy as np
+import faiss
 from config.config import ConfigConstants
-from langchain_huggingface import HuggingFaceEmbeddings
+from utils.rw_lock import RWLock
+from retriever.embedding_runtime import get_embedding_model
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+DELETED_IDS_FILE = "deleted_ids.json"
 
 class VectorStoreManager:
-    def __init__(self, embedding_path="embeddings.faiss"):
+    def __init__(self, embedding_path="embeddings.faiss", embedding_model=None):
         """
         Initialize the vector store manager.
         
         Args:
             embedding_path (str): Path to save/load the FAISS index.
+            embedding_model (Embeddings, optional): Embedding model to use instead of the shared configured model.
         """
         self.embedding_path = embedding_path
-        self.embedding_model = HuggingFaceEmbeddings(model_name=ConfigConstants.EMBEDDING_MODEL_NAME)
+        self.journal_path = f"{embedding_path}.journal"
+        # Journal entries covered by a save in progress; removed once the save completes
+        self.saving_journal_path = f"{embedding_path}.journal.saving"
+        self.embedding_model = embedding_model or get_embedding_model()
+
+        # Searches and save snapshots share a read lock; adds and deletes take the write lock.
+        # Saving happens on a background thread, writing the snapshot outside the lock
+        self._lock = RWLock()
+        self._journal_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty_since = None
+        self._last_change = None
+        self._stop_event = threading.Event()
+
+        # FAISS row ids of each document's chunks, used to restrict searches to selected documents
+        self.doc_positions = {}
+        # Docstore ids of deleted chunks; their rows stay in the index until the next compaction
+        self.deleted_ids = set()
+        self._compaction_thread = None
+        # Called with a doc_id whenever that document's chunks are added or deleted
+        self._change_listeners = []
+
         self.vector_store = self._initialize_vector_store()
+        self._index_document_positions()
+        self._replay_journal()
+        self._maybe_compact()
+
+        self._writer = threading.Thread(target=self._persist_loop, name="vector-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def _initialize_vector_store(self):
         """Initialize or load the FAISS vector store."""
+        backup_path = f"{self.embedding_path}.old"
+        if not os.path.exists(self.embedding_path) and os.path.exists(backup_path):
+            # A crash during the directory swap in _save leaves the previous copy behind
+            logging.warning(f"Restoring vector store from {backup_path}")
+            os.replace(backup_path, self.embedding_path)
+
         if os.path.exists(self.embedding_path):
             logging.info("Loading embeddings from local file")
+            deleted_ids_path = os.path.join(self.embedding_path, DELETED_IDS_FILE)
+            if os.path.exists(deleted_ids_path):
+                with open(deleted_ids_path, encoding="utf-8") as f:
+                    self.deleted_ids = set(json.load(f))
             return FAISS.load_local(
                 self.embedding_path,
                 self.embedding_model,
@@ -36,32 +87,360 @@ class VectorStoreManager:
             logging.info("Creating new vector store (unpopulated)")
             return None 
 
-    def add_documents(self, documents):
+    def add_documents(self, documents, embeddings=None):
         """
-        Add new documents to the vector store and save it.
-        
+        Add new documents to the vector store.
+
+        The chunks are recorded in an append-only journal before this returns, and
+        the full index is saved later by the background writer.
+
         Args:
-            documents (list): List of dictionaries with 'text', 'source', and 'doc_id'.
+            documents (list): List of dictionaries with 'text', 'source', 'doc_id' and optionally 'page_hash'.
+            embeddings (list, optional): Vectors of the documents, when they are reused rather than embedded
+                again; documents whose entry is None are embedded.
         """
         if not documents:
             return
 
+        ids = [str(uuid.uuid4()) for _ in documents]
+        logging.info("Adding new documents to vector store")
+        self._add(documents, ids, embeddings)
+        self._append_journal(documents, ids)
+        logging.info(f"Vector store updated with {len(documents)} chunks, save to {self.embedding_path} pending")
+
+    def _add(self, documents, ids, embeddings=None):
+        """Embed documents outside the lock, then add them to the index."""
         texts = [doc['text'] for doc in documents]
-        metadatas = [{'source': doc['source'], 'doc_id': doc['doc_id']} for doc in documents]
+        metadatas = [self._metadata(doc) for doc in documents]
+        if embeddings is None:
+            embeddings = self.embedding_model.embed_documents(texts)
+        elif any(embedding is None for embedding in embeddings):
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            embeddings = list(embeddings)
+            for i, embedding in zip(missing, self.embedding_model.embed_documents([texts[i] for i in missing])):
+                embeddings[i] = embedding
 
-        logging.info("Adding new documents to vector store")
-        
+        with self._lock.write_locked():
+            if not self.vector_store:
+                self.vector_store = FAISS.from_embeddings(
+                    text_embeddings=list(zip(texts, embeddings)),
+                    embedding=self.embedding_model,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+            else:
+                self.vector_store.add_embeddings(text_embeddings=list(zip(texts, embeddings)), metadatas=metadatas, ids=ids)
+            self._index_document_positions(start=self.vector_store.index.ntotal - len(documents))
+            self._mark_dirty()
+        self._notify_change(dict.fromkeys(doc['doc_id'] for doc in documents))
+
+    @staticmethod
+    def _metadata(doc):
+        metadata = {'source': doc['source'], 'doc_id': doc['doc_id']}
+        if doc.get('page_hash'):
+            metadata['page_hash'] = doc['page_hash']
+        return metadata
+
+    def add_change_listener(self, listener):
+        """Register a callable that is called with a doc_id whenever that document's chunks change."""
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, doc_ids):
+        for doc_id in doc_ids:
+            for listener in self._change_listeners:
+                listener(doc_id)
+
+    def _index_document_positions(self, start=0):
+        """Record the FAISS row ids of chunks from row `start` onwards under their doc_id, skipping deleted chunks."""
         if not self.vector_store:
-            self.vector_store = FAISS.from_texts(
-                texts=texts,
-                embedding=self.embedding_model,
-                metadatas=metadatas
-            )
-        else:
-            self.vector_store.add_texts(texts=texts, metadatas=metadatas)
+            return
+        for position in range(start, self.vector_store.index.ntotal):
+            chunk_id = self.vector_store.index_to_docstore_id[position]
+            if chunk_id in self.deleted_ids:
+                continue
+            chunk = self.vector_store.docstore.search(chunk_id)
+            self.doc_positions.setdefault(chunk.metadata['doc_id'], []).append(position)
+
+    def _mark_dirty(self):
+        now = time.monotonic()
+        self._last_change = now
+        if self._dirty_since is None:
+            self._dirty_since = now
+
+    def _append_journal(self, documents, ids):
+        """Durably record added chunks so they can be replayed if the process dies before the next save."""
+        self._write_journal([{
+            'id': chunk_id,
+            'text': doc['text'],
+            **self._metadata(doc)
+        } for doc, chunk_id in zip(documents, ids)])
+
+    def _write_journal(self, records):
+        with self._journal_lock, open(self.journal_path, "a", encoding="utf-8") as journal:
+            for record in records:
+                journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def delete_document(self, doc_id):
+        """
+        Remove a document from search immediately.
+
+        Its chunks are tombstoned: they are excluded from every search at once and
+        physically removed by the next compaction.
+
+        Returns:
+            int: Number of chunks deleted.
+        """
+        with self._lock.write_locked():
+            positions = self.doc_positions.pop(doc_id, [])
+            if not positions:
+                return 0
+            chunk_ids = [self.vector_store.index_to_docstore_id[position] for position in positions]
+            self.deleted_ids.update(chunk_ids)
+            self._write_journal([{'op': 'delete', 'ids': chunk_ids}])
+            self._mark_dirty()
+        logging.info(f"Deleted {len(chunk_ids)} chunks of document {doc_id}")
+        self._notify_change([doc_id])
+        self._maybe_compact()
+        return len(chunk_ids)
+
+    def dead_fraction(self):
+        """Fraction of index rows that belong to deleted chunks."""
+        with self._lock.read_locked():
+            if not self.vector_store or not self.vector_store.index.ntotal:
+                return 0.0
+            live = sum(len(positions) for positions in self.doc_positions.values())
+            return 1 - live / self.vector_store.index.ntotal
+
+    def _maybe_compact(self):
+        """Start a background compaction when enough of the index is dead."""
+        if self.dead_fraction() < ConfigConstants.COMPACTION_DEAD_FRACTION:
+            return
+        with self._lock.write_locked():
+            if self._compaction_thread and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, name="vector-store-compaction", daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self):
+        """
+        Rebuild the index and docstore without deleted chunks.
+
+        The rebuild works on a snapshot outside the lock, so searches and uploads
+        continue meanwhile; rows added during the rebuild are carried over when the
+        new index is swapped in.
+        """
+        try:
+            start = time.perf_counter()
+            with self._lock.read_locked():
+                if not self.vector_store:
+                    return
+                # Copying the live vectors is a memcpy; the index must not grow while it is read
+                index = self.vector_store.index
+                snapshot_rows = index.ntotal
+                snapshot_deleted = set(self.deleted_ids)
+                live_rows = [row for row in range(snapshot_rows) if self.vector_store.index_to_docstore_id[row] not in snapshot_deleted]
+                new_ids = [self.vector_store.index_to_docstore_id[row] for row in live_rows]
+                live_vectors = index.reconstruct_batch(np.array(live_rows, dtype=np.int64)) if live_rows else None
+                # An empty index of the same kind; the live index is not touched once the lock is released
+                new_index = faiss.IndexFlat(index.d, index.metric_type)
+
+            if live_vectors is not None:
+                new_index.add(live_vectors)
+
+            with self._lock.write_locked():
+                # Carry over rows added while the new index was being built
+                added_rows = self.vector_store.index.ntotal - snapshot_rows
+                if added_rows:
+                    new_index.add(self.vector_store.index.reconstruct_n(snapshot_rows, added_rows))
+                    new_ids.extend(self.vector_store.index_to_docstore_id[row] for row in range(snapshot_rows, snapshot_rows + added_rows))
+
+                docstore = self.vector_store.docstore
+                self.vector_store.index = new_index
+                self.vector_store.index_to_docstore_id = dict(enumerate(new_ids))
+                self.vector_store.docstore = InMemoryDocstore({chunk_id: docstore.search(chunk_id) for chunk_id in new_ids})
+                self.deleted_ids -= snapshot_deleted
+
+                self.doc_positions = {}
+                self._index_document_positions()
+                self._mark_dirty()
+
+            logging.info(f"Compacted vector store from {snapshot_rows + added_rows} to {len(new_ids)} chunks in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logging.error(f"Error compacting vector store: {str(e)}")
+
+    def _replay_journal(self):
+        """Re-add journaled chunks that are missing from the loaded index, then save."""
+        journal_paths = [path for path in (self.saving_journal_path, self.journal_path) if os.path.exists(path)]
+        if not journal_paths:
+            return
+
+        entries = []
+        for path in journal_paths:
+            with open(path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logging.warning("Skipping incomplete journal entry")  # Torn write at crash time
+
+        deleted_ids = {chunk_id for entry in entries if entry.get('op') == 'delete' for chunk_id in entry['ids']}
+        entries = [entry for entry in entries if entry.get('op') != 'delete']
+
+        known_ids = set(self.vector_store.index_to_docstore_id.values()) if self.vector_store else set()
+        missing = [entry for entry in entries if entry['id'] not in known_ids]
+        if missing:
+            logging.info(f"Replaying {len(missing)} journaled chunks not present in the saved index")
+            self._add(missing, [entry['id'] for entry in missing])
+        if deleted_ids - self.deleted_ids:
+            logging.info(f"Replaying {len(deleted_ids - self.deleted_ids)} journaled chunk deletions")
+            with self._lock.write_locked():
+                self.deleted_ids |= deleted_ids
+                self.doc_positions = {}
+                self._index_document_positions()
+                self._mark_dirty()
+        self.flush()
+        self._truncate_journal()
+
+    def _truncate_journal(self):
+        with self._journal_lock, open(self.journal_path, "w", encoding="utf-8") as journal:
+            journal.flush()
+            os.fsync(journal.fileno())
+            if os.path.exists(self.saving_journal_path):
+                os.remove(self.saving_journal_path)
+
+    def _rotate_journal(self):
+        """Set aside the entries a save is about to cover; later changes go to a fresh journal."""
+        with self._journal_lock:
+            if not os.path.exists(self.journal_path):
+                return
+            if os.path.exists(self.saving_journal_path):
+                # A previous save failed; its entries are still needed
+                with open(self.journal_path, encoding="utf-8") as journal, open(self.saving_journal_path, "a", encoding="utf-8") as saving:
+                    shutil.copyfileobj(journal, saving)
+                    saving.flush()
+                    os.fsync(saving.fileno())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.saving_journal_path)
+
+    def _persist_loop(self):
+        """Background writer: save once changes have settled or have waited too long."""
+        while not self._stop_event.wait(1.0):
+            if self._dirty_since is None:
+                continue
+            now = time.monotonic()
+            settled = now - self._last_change >= ConfigConstants.PERSIST_DEBOUNCE_SECONDS
+            overdue = now - self._dirty_since >= ConfigConstants.PERSIST_MAX_DELAY_SECONDS
+            if settled or overdue:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logging.error(f"Error saving vector store: {str(e)}")
+
+    def flush(self):
+        """
+        Save pending changes now and clear the journal entries they cover.
+
+        Only taking the snapshot holds the lock; the snapshot is written to disk
+        while searches and uploads continue.
+        """
+        with self._save_lock:
+            with self._lock.read_locked():
+                if self._dirty_since is None or not self.vector_store:
+                    return
+                start = time.perf_counter()
+                snapshot = self._snapshot()
+                # Writers are excluded while the read lock is held, so no change is missed by the snapshot
+                self._dirty_since = None
+                self._rotate_journal()
+
+            try:
+                self._save(*snapshot)
+            except Exception:
+                with self._lock.write_locked():
+                    self._mark_dirty()  # Retried by the background writer; the journal entries are kept
+                raise
+            with self._journal_lock:
+                if os.path.exists(self.saving_journal_path):
+                    os.remove(self.saving_journal_path)
+            logging.info(f"Vector store saved to {self.embedding_path} in {time.perf_counter() - start:.2f}s")
 
-        self.vector_store.save_local(self.embedding_path)
-        logging.info(f"Vector store updated and saved to {self.embedding_path}")
+    def _snapshot(self):
+        """Copy of the store to save: the serialized index (a memcpy for a flat index), docstore, id map and tombstones."""
+        return (
+            faiss.serialize_index(self.vector_store.index),
+            dict(self.vector_store.docstore._dict),
+            dict(self.vector_store.index_to_docstore_id),
+            sorted(self.deleted_ids)
+        )
+
+    def _save(self, index_bytes, docstore, index_to_docstore_id, deleted_ids):
+        """Write a snapshot to a temporary directory and swap it in, so a crash never leaves a half-written store."""
+        tmp_path = f"{self.embedding_path}.tmp"
+        backup_path = f"{self.embedding_path}.old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        FAISS(
+            embedding_function=self.embedding_model,
+            index=faiss.deserialize_index(index_bytes),
+            docstore=InMemoryDocstore(docstore),
+            index_to_docstore_id=index_to_docstore_id
+        ).save_local(tmp_path)
+        with open(os.path.join(tmp_path, DELETED_IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(deleted_ids, f)
+
+        if os.path.exists(self.embedding_path):
+            shutil.rmtree(backup_path, ignore_errors=True)
+            os.replace(self.embedding_path, backup_path)
+        os.replace(tmp_path, self.embedding_path)
+        shutil.rmtree(backup_path, ignore_errors=True)
+
+    def close(self):
+        """Stop the background writer and save anything still pending."""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self._writer.join(timeout=5)
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        self.flush()
+
+    def get_document_chunks(self, doc_id):
+        """
+        Return the stored chunks of a document in the order they were added.
+
+        Returns:
+            list: List of dictionaries with 'text', 'source', 'doc_id' and, for chunks stored with one, 'page_hash'.
+        """
+        with self._lock.read_locked():
+            chunks = []
+            for position in self.doc_positions.get(doc_id, []):
+                doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[position])
+                chunks.append({'text': doc.page_content, **doc.metadata})
+            return chunks
+
+    def get_page_vectors(self, doc_id):
+        """
+        Return a document's chunks and their stored vectors grouped by page content hash.
+
+        Used to re-index a new version of a document without embedding its unchanged pages again.
+        Chunks stored without a page hash are left out.
+
+        Returns:
+            dict: page_hash -> list of (chunk dictionary, vector) in chunk order.
+        """
+        with self._lock.read_locked():
+            positions = self.doc_positions.get(doc_id, [])
+            if not positions:
+                return {}
+            vectors = self.vector_store.index.reconstruct_batch(np.array(positions, dtype=np.int64))
+            pages = {}
+            for position, vector in zip(positions, vectors):
+                doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[position])
+                if doc.metadata.get('page_hash'):
+                    pages.setdefault(doc.metadata['page_hash'], []).append(({'text': doc.page_content, **doc.metadata}, vector.tolist()))
+            return pages
 
     def search(self, query, doc_id, k=10):
         """
@@ -75,24 +454,58 @@ class VectorStoreManager:
         Returns:
             list: List of relevant document chunks with metadata and scores.
         """
+        return self.search_documents(query, [doc_id], k=k)
+
+    def embed_query(self, query):
+        """Embed a query the same way search_documents does, as a (1, d) float32 array."""
+        query = " ".join(query.lower().split())
+        query_vector = np.array([self.embedding_model.embed_query(query)], dtype=np.float32)
+        if self.vector_store and self.vector_store._normalize_L2:
+            faiss.normalize_L2(query_vector)
+        return query_vector
+
+    def search_documents(self, query, doc_ids, k=10, query_vector=None):
+        """
+        Search the chunks of several documents in a single restricted FAISS search.
+
+        The query is embedded once and the search only visits rows belonging to
+        `doc_ids`, so the result is the exact top k across all of them.
+
+        Args:
+            query (str): The user's query.
+            doc_ids (list): Document IDs to search within.
+            k (int): Number of results to return.
+            query_vector (np.ndarray, optional): The query already embedded with embed_query.
+
+        Returns:
+            list: Chunks with 'text', 'metadata' and 'score' (L2 distance), nearest first.
+        """
         if not self.vector_store:
             return []
 
         try:
-            query = " ".join(query.lower().split())
-            # Define a filter function to match doc_id
-            filter_fn = lambda metadata: metadata['doc_id'] == doc_id
-            
-            # Perform similarity search with filter
-            results = self.vector_store.similarity_search_with_score(
-                query=query,
-                k=k,
-                filter=filter_fn
-            )
-            
-            # Format results
-            return [{'text': doc.page_content, 'metadata': doc.metadata, 'score': score} for doc, score in results]
-        
+            if query_vector is None:
+                query_vector = self.embed_query(query)
+
+            with self._lock.read_locked():
+                positions = [position for doc_id in dict.fromkeys(doc_ids) for position in self.doc_positions.get(doc_id, [])]
+                if not positions:
+                    return []
+                selector = faiss.IDSelectorBatch(np.array(positions, dtype=np.int64))
+                scores, indices = self.vector_store.index.search(
+                    query_vector,
+                    min(k, len(positions)),
+                    params=faiss.SearchParameters(sel=selector)
+                )
+
+                results = []
+                for score, position in zip(scores[0], indices[0]):
+                    if position == -1:
+                        continue
+                    doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[position])
+                    results.append({'text': doc.page_content, 'metadata': doc.metadata, 'score': float(score)})
+            return results
+
         except Exception as e:
             logging.error(f"Error during vector store search: {str(e)}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,30 @@
+import time
+import threading
+from collections import deque
+
+class RateLimiter:
+    def __init__(self, max_calls: int, period: float = 60.0):
+        """
+        Thread-safe sliding-window rate limiter.
+
+        Args:
+            max_calls (int): Calls allowed within any window of `period` seconds.
+            period (float): Window length in seconds.
+        """
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed, then record it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
@@ -0,0 +1,75 @@
+import threading
+from contextlib import contextmanager
+
+class RWLock:
+    def __init__(self):
+        """
+        Readers-writer lock: any number of readers or a single writer.
+
+        Both modes are reentrant, and the thread holding the write lock may also
+        read. Waiting writers block new readers, so a steady stream of searches
+        cannot starve uploads.
+        """
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}  # thread ident -> read depth
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            self._readers[me] -= 1
+            if not self._readers[me]:
+                del self._readers[me]
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        """
+        Raises:
+            RuntimeError: If the calling thread holds only a read lock, since upgrading could deadlock.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+            self._writers_waiting += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,162 @@
+"""
+Sweep chunk size and overlap for RAGBench subsets and measure what each choice costs.
+
+For every dataset and (chunk_size, chunk_overlap) pair this reports the chunk
+count, index build time, index memory, retrieval latency and retrieval recall.
+Recall uses RAGBench's own labels: a question's relevant sentences
+(`all_relevant_sentence_keys`) count as retrieved when they appear in one of
+the top-k chunks. No LLM is called.
+
+Usage (from the pipeline directory):
+    python -m benchmarks.chunking_sweep --datasets covidqa cuad --chunk-sizes 500 1000 2000 4000 --overlaps 0 100 200
+"""
+import csv
+import time
+import argparse
+import logging
+import numpy as np
+import faiss
+from langchain_community.vectorstores import FAISS
+
+from config import ConfigConstants
+from data.load_dataset import load_data
+from retriever.chunk_documents import chunk_documents
+from retriever.embedding_runtime import get_embedding_model
+from retriever.load_selected_datasets import get_chunk_settings
+from retriever.retrieve_documents import retrieve_top_k_documents
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def _normalize(text):
+    return " ".join(text.split())
+
+def get_relevant_sentences(row):
+    """Return the normalized text of the sentences RAGBench labels as relevant for a question."""
+    sentences = {}
+    for document_sentences in row['documents_sentences']:
+        for key, sentence in document_sentences:
+            sentences[key] = _normalize(sentence)
+    return [sentences[key] for key in row['all_relevant_sentence_keys'] if sentences.get(key)]
+
+def build_index(chunks, embedding_model):
+    """Embed chunks into an in-memory FAISS store, returning the store and build time in seconds."""
+    texts = [chunk['text'] for chunk in chunks]
+    start = time.perf_counter()
+    embeddings = []
+    for batch_start in range(0, len(texts), ConfigConstants.EMBEDDING_BATCH_SIZE):
+        embeddings.extend(embedding_model.embed_documents(texts[batch_start:batch_start + ConfigConstants.EMBEDDING_BATCH_SIZE]))
+    vector_store = FAISS.from_embeddings(list(zip(texts, embeddings)), embedding_model)
+    return vector_store, time.perf_counter() - start
+
+def index_memory_mb(vector_store):
+    """Approximate resident size of the index plus the chunk texts in the docstore."""
+    index_bytes = faiss.serialize_index(vector_store.index).nbytes
+    text_bytes = sum(len(doc.page_content.encode()) for doc in vector_store.docstore._dict.values())
+    return (index_bytes + text_bytes) / 2**20
+
+def evaluate_retrieval(vector_store, questions, top_k):
+    """Return per-query latencies in ms, mean sentence recall and hit rate over the labelled questions."""
+    latencies = []
+    recalls = []
+    hits = 0
+    for question, relevant_sentences in questions:
+        start = time.perf_counter()
+        documents = retrieve_top_k_documents(vector_store, question, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        retrieved_text = [_normalize(doc.page_content) for doc in documents]
+        found = sum(1 for sentence in relevant_sentences if any(sentence in text for text in retrieved_text))
+        recalls.append(found / len(relevant_sentences))
+        hits += 1 if found else 0
+
+    return latencies, float(np.mean(recalls)) if recalls else 0.0, hits / len(questions) if questions else 0.0
+
+def sweep_dataset(data_set_name, chunk_sizes, overlaps, num_questions, top_k, embedding_model):
+    dataset = load_data(data_set_name)
+    questions = []
+    for row in dataset.select(range(min(num_questions, dataset.num_rows))):
+        relevant_sentences = get_relevant_sentences(row)
+        if relevant_sentences:  # Questions without relevant sentences cannot contribute to recall
+            questions.append((row['question'], relevant_sentences))
+    logging.info(f"{data_set_name}: evaluating {len(questions)} labelled questions")
+
+    rows = []
+    for chunk_size in chunk_sizes:
+        for chunk_overlap in overlaps:
+            if chunk_overlap >= chunk_size:
+                continue
+            logging.info(f"{data_set_name}: chunk_size={chunk_size}, chunk_overlap={chunk_overlap}")
+            start = time.perf_counter()
+            chunks = chunk_documents(dataset, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+            chunk_seconds = time.perf_counter() - start
+
+            vector_store, build_seconds = build_index(chunks, embedding_model)
+            latencies, recall, hit_rate = evaluate_retrieval(vector_store, questions, top_k)
+            rows.append({
+                "dataset": data_set_name,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "chunks": len(chunks),
+                "chunk_seconds": round(chunk_seconds, 3),
+                "build_seconds": round(build_seconds, 3),
+                "index_mb": round(index_memory_mb(vector_store), 2),
+                "search_p50_ms": round(float(np.percentile(latencies, 50)), 3) if latencies else None,
+                "search_p95_ms": round(float(np.percentile(latencies, 95)), 3) if latencies else None,
+                f"recall_at_{top_k}": round(recall, 4),
+                f"hit_rate_at_{top_k}": round(hit_rate, 4),
+            })
+    return rows
+
+def recommend_settings(rows, top_k, tolerance):
+    """Pick the smallest index whose recall is within `tolerance` of the best recall, per dataset."""
+    recommendations = {}
+    for data_set_name in dict.fromkeys(row["dataset"] for row in rows):
+        candidates = [row for row in rows if row["dataset"] == data_set_name]
+        best_recall = max(row[f"recall_at_{top_k}"] for row in candidates)
+        good = [row for row in candidates if row[f"recall_at_{top_k}"] >= best_recall - tolerance]
+        best = min(good, key=lambda row: (row["index_mb"], row["search_p50_ms"] or 0))
+        recommendations[data_set_name] = (best["chunk_size"], best["chunk_overlap"])
+    return recommendations
+
+def print_table(rows):
+    columns = list(rows[0].keys())
+    print("| " + " | ".join(columns) + " |")
+    print("|" + "|".join("---" for _ in columns) + "|")
+    for row in rows:
+        print("| " + " | ".join(str(row[column]) for column in columns) + " |")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep chunk size and overlap for RAGBench datasets.")
+    parser.add_argument("--datasets", nargs="+", default=["covidqa"], choices=ConfigConstants.DATA_SET_NAMES)
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, default=[500, 1000, 2000, 4000])
+    parser.add_argument("--overlaps", nargs="+", type=int, default=[0, 100, 200])
+    parser.add_argument("--num-questions", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--recall-tolerance", type=float, default=0.01,
+                        help="Recall drop accepted in exchange for a smaller index when recommending settings")
+    parser.add_argument("--output", default="chunking_sweep.csv", help="CSV file to write the results table to")
+    args = parser.parse_args()
+
+    embedding_model = get_embedding_model()
+    rows = []
+    for data_set_name in args.datasets:
+        current = get_chunk_settings(data_set_name)
+        logging.info(f"{data_set_name}: current settings chunk_size={current[0]}, chunk_overlap={current[1]}")
+        rows.extend(sweep_dataset(data_set_name, args.chunk_sizes, args.overlaps, args.num_questions, args.top_k, embedding_model))
+
+    if not rows:
+        logging.warning("No configurations were evaluated")
+        return
+
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results written to {args.output}")
+
+    print_table(rows)
+    print("\nSuggested ConfigConstants.DATASET_CHUNK_SETTINGS:")
+    print(recommend_settings(rows, args.top_k, args.recall_tolerance))
+
+if __name__ == "__main__":
+    main()
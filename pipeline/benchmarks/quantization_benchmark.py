@@ -0,0 +1,132 @@
+"""
+Compare float32, float16 and int8 vector storage for the pipeline index.
+
+Reports memory per million chunks, single-query search latency and recall@5
+against the exact float32 results, with and without float32 re-scoring.
+Runs on synthetic clustered vectors, so no model or dataset download is needed.
+
+Usage (from the pipeline directory):
+    python -m benchmarks.quantization_benchmark --num-vectors 200000 --output quantization.json
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import logging
+import numpy as np
+import faiss
+
+from retriever.quantize_index import QUANTIZER_TYPES, load_full_precision_vectors, rescore_candidates, write_full_precision_vectors
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_vectors(num_vectors, dim, num_clusters, seed):
+    """Generate unit-length vectors around random centroids, similar in shape to sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    assignments = rng.integers(0, num_clusters, num_vectors)
+    vectors = centroids[assignments] + 0.5 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def recall_at_k(result_ids, exact_ids, k):
+    hits = sum(len(set(found[:k]) & set(expected[:k])) for found, expected in zip(result_ids, exact_ids))
+    return hits / (k * len(exact_ids))
+
+def time_queries(search_fn, queries):
+    """Run one query at a time and return (p50, p95) latency in milliseconds plus all result ids."""
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        ids = search_fn(query[None, :])
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids[0])
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)), np.array(results)
+
+def run_benchmark(args):
+    vectors = make_vectors(args.num_vectors, args.dim, args.num_clusters, args.seed)
+    queries = make_vectors(args.num_queries, args.dim, args.num_clusters, args.seed + 1)
+    k = args.top_k
+
+    flat_index = faiss.IndexFlatL2(args.dim)
+    flat_index.add(vectors)
+    _, exact_ids = flat_index.search(queries, k)
+
+    rows = []
+    p50, p95, ids = time_queries(lambda q: flat_index.search(q, k)[1], queries)
+    rows.append({
+        "storage": "float32",
+        "rescore": False,
+        "bytes_per_vector": args.dim * 4,
+        "mb_per_million_chunks": args.dim * 4 * 1e6 / 2**20,
+        "build_seconds": 0.0,
+        "search_p50_ms": p50,
+        "search_p95_ms": p95,
+        "recall_at_k": recall_at_k(ids, exact_ids, k),
+    })
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vectors_path = os.path.join(tmp_dir, "vectors_float32.bin")
+        write_full_precision_vectors(vectors_path, vectors)
+        full_vectors = load_full_precision_vectors(vectors_path, args.dim, args.num_vectors)
+
+        for storage, quantizer_type in QUANTIZER_TYPES.items():
+            start = time.perf_counter()
+            index = faiss.IndexScalarQuantizer(args.dim, quantizer_type, faiss.METRIC_L2)
+            index.train(vectors)
+            index.add(vectors)
+            build_seconds = time.perf_counter() - start
+            bytes_per_vector = index.sa_code_size()
+
+            def rescored_search(query, index=index):
+                _, candidate_ids = index.search(query, max(args.rescore_candidates, k))
+                return rescore_candidates(query, candidate_ids, full_vectors, k, index.metric_type)[1]
+
+            for rescore, search_fn in ((False, lambda q, index=index: index.search(q, k)[1]), (True, rescored_search)):
+                p50, p95, ids = time_queries(search_fn, queries)
+                rows.append({
+                    "storage": storage,
+                    "rescore": rescore,
+                    "bytes_per_vector": bytes_per_vector,
+                    "mb_per_million_chunks": bytes_per_vector * 1e6 / 2**20,
+                    "build_seconds": build_seconds,
+                    "search_p50_ms": p50,
+                    "search_p95_ms": p95,
+                    "recall_at_k": recall_at_k(ids, exact_ids, k),
+                })
+
+    return rows
+
+def print_table(rows, k):
+    header = f"{'storage':<8} {'rescore':<8} {'B/vec':>6} {'MB/1M':>8} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {f'recall@{k}':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['storage']:<8} {str(row['rescore']):<8} {row['bytes_per_vector']:>6} {row['mb_per_million_chunks']:>8.1f} "
+              f"{row['build_seconds']:>8.2f} {row['search_p50_ms']:>8.3f} {row['search_p95_ms']:>8.3f} {row['recall_at_k']:>9.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage against the float32 baseline.")
+    parser.add_argument("--num-vectors", type=int, default=100000)
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding size (384 for paraphrase-MiniLM-L3-v2)")
+    parser.add_argument("--num-clusters", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rescore-candidates", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Optional path of a JSON file to write the results to")
+    args = parser.parse_args()
+
+    logging.info(f"Benchmarking {args.num_vectors} vectors of size {args.dim} with {args.num_queries} queries")
+    rows = run_benchmark(args)
+    print_table(rows, args.top_k)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=4)
+        logging.info(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
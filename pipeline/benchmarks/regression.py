@@ -0,0 +1,40 @@
+"""Helpers of the offline regression benchmarks: memory measurement and baseline comparison."""
+import sys
+import logging
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+def compare_with_baseline(results, baseline, tolerance, higher_is_better):
+    """
+    Return a list of human-readable regressions beyond `tolerance` (a fraction, e.g. 0.2 for 20%).
+
+    Args:
+        results (dict): Metrics of this run by corpus size.
+        baseline (dict): Metrics of an earlier run by corpus size.
+        tolerance (float): Allowed relative change in the wrong direction.
+        higher_is_better (dict): Metric name -> whether a larger value is better; only these metrics are compared.
+    """
+    regressions = []
+    for size, metrics in results.items():
+        baseline_metrics = baseline.get(size)
+        if not baseline_metrics:
+            logging.info(f"No baseline for {size} chunks, skipping comparison")
+            continue
+        for metric, larger_is_better in higher_is_better.items():
+            current, previous = metrics.get(metric), baseline_metrics.get(metric)
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous
+            if (larger_is_better and change < -tolerance) or (not larger_is_better and change > tolerance):
+                regressions.append(f"{size} chunks: {metric} {previous:.3f} -> {current:.3f} ({change:+.1%})")
+    return regressions
@@ -0,0 +1,131 @@
+"""
+Offline performance regression benchmark for the pipeline retrieval stack.
+
+Times `chunk_documents`, `embed_documents`, `retrieve_top_k_documents` and
+`retrieve_top_k_documents_batch` on synthetic corpora of configurable size.
+It uses the deterministic `HashingEmbeddings` stub, so no network access or
+model download is needed and results only move when the code or its libraries
+(LangChain, FAISS, numpy) change.
+
+Usage (from the pipeline directory):
+    python -m benchmarks.retrieval_regression --sizes 10000 100000 1000000 --output results.json
+    python -m benchmarks.retrieval_regression --baseline baseline.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import tempfile
+import numpy as np
+
+from config import ConfigConstants
+from benchmarks.regression import compare_with_baseline, peak_rss_mb
+from benchmarks.stub_embedder import HashingEmbeddings, make_corpus, make_queries
+from retriever.chunk_documents import chunk_documents
+from retriever.embed_documents import embed_documents
+from retriever.retrieve_documents import retrieve_top_k_documents, retrieve_top_k_documents_batch
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Whether a larger value of a metric is better, used when comparing against a baseline
+HIGHER_IS_BETTER = {
+    "chunk_per_sec": True,
+    "ingest_per_sec": True,
+    "search_p50_ms": False,
+    "search_p95_ms": False,
+    "batch_search_ms_per_query": False,
+    "index_mb": False,
+    "peak_rss_mb": False,
+}
+
+def index_mb(vector_store):
+    index = vector_store.index
+    bytes_per_vector = index.sa_code_size() if hasattr(index, "sa_code_size") else index.d * 4
+    return index.ntotal * bytes_per_vector / 2**20
+
+def run_size(num_chunks, num_queries, top_k, embedding_model):
+    texts = make_corpus(num_chunks)
+    # One text per row, short enough to stay a single chunk
+    dataset = [{'question': f"synthetic question {i}", 'documents': [text]} for i, text in enumerate(texts)]
+    queries = make_queries(texts, num_queries)
+
+    start = time.perf_counter()
+    chunks = chunk_documents(dataset, chunk_size=ConfigConstants.DEFAULT_CHUNK_SIZE, chunk_overlap=ConfigConstants.CHUNK_OVERLAP)
+    chunk_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        vector_store = embed_documents(
+            chunks,
+            embedding_path=os.path.join(tmp_dir, "embeddings.faiss"),
+            metadata_path=os.path.join(tmp_dir, "metadata.json"),
+            vectors_path=os.path.join(tmp_dir, "vectors_float32.bin"),
+            embedding_model=embedding_model,
+        )
+        ingest_seconds = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            retrieve_top_k_documents(vector_store, query, top_k=top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        retrieve_top_k_documents_batch(vector_store, queries, top_k=top_k)
+        batch_seconds = time.perf_counter() - start
+
+        return {
+            "chunks": len(chunks),
+            "chunk_per_sec": len(chunks) / chunk_seconds if chunk_seconds else None,
+            "ingest_per_sec": len(chunks) / ingest_seconds if ingest_seconds else None,
+            "search_p50_ms": float(np.percentile(latencies, 50)),
+            "search_p95_ms": float(np.percentile(latencies, 95)),
+            "batch_search_ms_per_query": batch_seconds * 1000 / len(queries),
+            "index_mb": index_mb(vector_store),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval regression benchmark with a hashing stub embedder.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000, 1000000], help="Corpus sizes in chunks")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--storage", default=ConfigConstants.VECTOR_STORAGE, choices=["float32", "float16", "int8"])
+    parser.add_argument("--output", default="retrieval_benchmark.json", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    ConfigConstants.VECTOR_STORAGE = args.storage
+    embedding_model = HashingEmbeddings(size=args.dim)
+
+    results = {}
+    for size in sorted(args.sizes):
+        logging.info(f"Benchmarking retrieval with {size} chunks")
+        results[str(size)] = run_size(size, args.num_queries, args.top_k, embedding_model)
+        logging.info(f"{size} chunks: {results[str(size)]}")
+
+    report = {
+        "settings": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    logging.info(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_with_baseline(results, baseline, args.tolerance, HIGHER_IS_BETTER)
+        if regressions:
+            logging.error("Performance regressions against baseline:\n" + "\n".join(regressions))
+            sys.exit(1)
+        logging.info(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
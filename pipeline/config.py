@@ -13,6 +13,12 @@ class ConfigConstants:
     VALIDATION_MODELS = ["llama3-70b-8192", "deepseek-r1-distill-llama-70b" ]
     DEFAULT_CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
+    # Per-dataset (chunk_size, chunk_overlap) overrides, see benchmarks/chunking_sweep.py
+    DATASET_CHUNK_SETTINGS = {'cuad': (4000, 200)}
+    VECTOR_STORAGE = "float32"  # "float32", "float16" or "int8" (scalar quantized index)
+    RESCORE_CANDIDATES = 20  # Quantized hits re-scored with float32 vectors, 0 to disable
+    EMBEDDING_BATCH_SIZE = 256
+    EMBEDDING_NUM_THREADS = None  # torch intra-op threads for the shared embedding model, None for torch's default
 
 class AppConfig:
     def __init__(self, vector_store, gen_llm, val_llm):
@@ -1,6 +1,7 @@
 
 from sklearn.metrics import roc_auc_score, root_mean_squared_error
 from generator.generate_metrics import generate_metrics, retrieve_and_generate_response
+from retriever.retrieve_documents import retrieve_top_k_documents_batch
 import logging
 
 def compute_rmse_auc_roc_metrics(gen_llm, val_llm, dataset, vector_store, num_question):
@@ -15,6 +16,11 @@ def compute_rmse_auc_roc_metrics(gen_llm, val_llm, dataset, vector_store, num_qu
     all_ground_truth_adherence = []
     all_predicted_adherence = []
 
+    # Pre-retrieve documents for every question of the run in one batched search
+    questions = [dataset[i]['question'] for i in range(min(len(dataset), num_question + 1))]
+    logging.info(f"Retrieving documents for {len(questions)} questions")
+    all_relevant_docs = retrieve_top_k_documents_batch(vector_store, questions, top_k=5)
+
     # For each question in dataset get the metrics
     for i, document in enumerate(dataset):
         # Extract ground truth metrics from dataset
@@ -25,7 +31,7 @@ def compute_rmse_auc_roc_metrics(gen_llm, val_llm, dataset, vector_store, num_qu
         query = document['question']
         logging.info(f"Query number: {i + 1}")
         # Call the generate_metrics for each query
-        response, source_docs = retrieve_and_generate_response(gen_llm, vector_store, query)
+        response, source_docs = retrieve_and_generate_response(gen_llm, vector_store, query, all_relevant_docs[i])
         attributes, metrics = generate_metrics(val_llm, response, source_docs, query, 25)
         
         # Extract predicted metrics (ensure these are continuous if possible)
@@ -5,11 +5,12 @@ from retriever.retrieve_documents import retrieve_top_k_documents
 from generator.compute_metrics import get_metrics
 from generator.extract_attributes import extract_attributes
 
-def retrieve_and_generate_response(gen_llm, vector_store, query):
+def retrieve_and_generate_response(gen_llm, vector_store, query, relevant_docs=None):
     logging.info(f"Query: {query}")
     
-    # Step 1: Retrieve relevant documents for given query
-    relevant_docs = retrieve_top_k_documents(vector_store, query, top_k=5)
+    # Step 1: Retrieve relevant documents for given query, unless they were pre-retrieved
+    if relevant_docs is None:
+        relevant_docs = retrieve_top_k_documents(vector_store, query, top_k=5)
     #logging.info(f"Relevant documents retrieved :{len(relevant_docs)}")
 
     # Log each retrieved document individually
@@ -1,14 +1,25 @@
+from typing import List
 from langchain.chains import RetrievalQA
+from langchain.docstore.document import Document
+from langchain_core.retrievers import BaseRetriever
+
+class StaticRetriever(BaseRetriever):
+    """Retriever that returns documents already retrieved for the question."""
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query: str) -> List[Document]:
+        return self.documents
 
 def generate_response(llm, vector_store, question, relevant_docs):
     # Create a retrieval-based question-answering chain using the relevant documents
+    retriever = StaticRetriever(documents=relevant_docs) if relevant_docs is not None else vector_store.as_retriever()
     qa_chain = RetrievalQA.from_chain_type(
         llm=llm,
-        retriever=vector_store.as_retriever(),
+        retriever=retriever,
         return_source_documents=True
     )
     try:
-        result = qa_chain.invoke(question, documents=relevant_docs)
+        result = qa_chain.invoke(question)
         response = result['result']
         source_docs = result['source_documents']
         return response, source_docs
@@ -22,19 +22,21 @@ import os
 import logging
 import hashlib
 from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 from config import ConfigConstants  
+from retriever.embedding_runtime import get_embedding_model
+from retriever.quantize_index import append_full_precision_vectors, is_quantized, load_full_precision_vectors, quantize_vector_store
 
 
-def embed_documents(documents: List[Dict], embedding_path: str = ConfigConstants.DATA_SET_PATH + "embeddings/embeddings.faiss", metadata_path: str = ConfigConstants.DATA_SET_PATH + "embeddings/metadata.json") -> FAISS:
+def embed_documents(documents: List[Dict], embedding_path: str = ConfigConstants.DATA_SET_PATH + "embeddings/embeddings.faiss", metadata_path: str = ConfigConstants.DATA_SET_PATH + "embeddings/metadata.json", vectors_path: str = ConfigConstants.DATA_SET_PATH + "embeddings/vectors_float32.bin", embedding_model: Embeddings = None) -> FAISS:
     logging.info(f"Total documents got :{len(documents)}")
     os.makedirs(os.path.dirname(embedding_path), exist_ok=True)
     os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
     
-    embedding_model = HuggingFaceEmbeddings(model_name=ConfigConstants.EMBEDDING_MODEL_NAME)
+    if embedding_model is None:
+        embedding_model = get_embedding_model()
     
     if os.path.exists(embedding_path) and os.path.exists(metadata_path):
         logging.info("Loading embeddings and metadata from local files")
@@ -57,27 +59,36 @@ def embed_documents(documents: List[Dict], embedding_path: str = ConfigConstants
             new_documents.append(doc)
             existing_metadata[doc_hash] = True  # Mark as processed
     
+    store_updated = False
     if new_documents:
         logging.info(f"Generating embeddings for {len(new_documents)} new documents")
-        with ThreadPoolExecutor() as executor:
-            futures = []
-            for doc in new_documents:
-                futures.append(executor.submit(_embed_single_document, doc, embedding_model))
-            
-            for future in tqdm(futures, desc="Generating embeddings", unit="doc"):
-                vector_store.add_texts([future.result()])
-        
+        batch_size = ConfigConstants.EMBEDDING_BATCH_SIZE
+        for start in tqdm(range(0, len(new_documents), batch_size), desc="Generating embeddings", unit="batch"):
+            texts = [doc['text'] for doc in new_documents[start:start + batch_size]]
+            embeddings = embedding_model.embed_documents(texts)
+            vector_store.add_embeddings(list(zip(texts, embeddings)))
+            if is_quantized(vector_store):
+                # Keep the float32 copy in step with the quantized index for re-scoring
+                append_full_precision_vectors(vectors_path, embeddings)
+        store_updated = True
+
+    # Quantize a flat index once all of its vectors are known, so int8 ranges are trained on the full set
+    if ConfigConstants.VECTOR_STORAGE != "float32" and not is_quantized(vector_store):
+        quantize_vector_store(vector_store, ConfigConstants.VECTOR_STORAGE, vectors_path)
+        store_updated = True
+
+    if store_updated:
         # Save updated embeddings and metadata
         vector_store.save_local(embedding_path)
         _save_metadata(metadata_path, existing_metadata)
     else:
         logging.info("No new documents to process. Using existing embeddings.")
+
+    if is_quantized(vector_store):
+        vector_store.full_precision_vectors = load_full_precision_vectors(vectors_path, vector_store.index.d, vector_store.index.ntotal)
     
     return vector_store
 
-def _embed_single_document(doc: Dict, embedding_model: HuggingFaceEmbeddings) -> str:
-    return doc['text']
-
 def _generate_document_hash(text: str) -> str:
     """Generate a unique hash for a document based on its text."""
     return hashlib.sha256(text.encode()).hexdigest()
@@ -1,4 +1,5 @@
 import logging
+from config import ConfigConstants
 from data.load_dataset import load_data
 from retriever.embed_documents import embed_documents
 from retriever.chunk_documents import chunk_documents
@@ -20,10 +21,10 @@ def load_selected_datasets(selected_datasets, config) -> str:
         datasets[data_set_name] = load_data(data_set_name)
 
         # Set chunk size
-        chunk_size = 4000 if data_set_name == 'cuad' else 1000  # Example chunk sizes
+        chunk_size, chunk_overlap = get_chunk_settings(data_set_name)
         
         # Chunk documents
-        chunked_documents = chunk_documents(datasets[data_set_name], chunk_size=chunk_size, chunk_overlap=200)
+        chunked_documents = chunk_documents(datasets[data_set_name], chunk_size=chunk_size, chunk_overlap=chunk_overlap)
         all_chunked_documents.extend(chunked_documents)
         # Logging final count
         logging.info(f"Total chunked documents: {len(all_chunked_documents)}")
@@ -38,4 +39,10 @@ def load_selected_datasets(selected_datasets, config) -> str:
     # **🔹 Refresh loaded datasets after loading**
     config.loaded_datasets = config.detect_loaded_datasets()
 
-    return loaded_datasets #f"Loaded datasets: {', '.join(loaded_datasets)}"
\ No newline at end of file
+    return loaded_datasets #f"Loaded datasets: {', '.join(loaded_datasets)}"
+
+def get_chunk_settings(data_set_name):
+    """Return the (chunk_size, chunk_overlap) to use for a dataset."""
+    return ConfigConstants.DATASET_CHUNK_SETTINGS.get(
+        data_set_name, (ConfigConstants.DEFAULT_CHUNK_SIZE, ConfigConstants.CHUNK_OVERLAP)
+    )
@@ -0,0 +1,96 @@
+import os
+import logging
+import numpy as np
+import faiss
+
+# Scalar quantizer types supported for the vector storage option
+QUANTIZER_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+def is_quantized(vector_store) -> bool:
+    """Return True if the FAISS index of the vector store holds scalar-quantized vectors."""
+    return isinstance(vector_store.index, faiss.IndexScalarQuantizer)
+
+def quantize_vector_store(vector_store, storage: str, vectors_path: str):
+    """
+    Replace the flat float32 index of a vector store with a scalar-quantized one.
+
+    The original float32 vectors are written to `vectors_path` so the final top
+    candidates of a search can be re-scored at full precision without keeping
+    them in memory.
+    """
+    if storage not in QUANTIZER_TYPES:
+        raise ValueError(f"Unsupported vector storage '{storage}'. Use one of: float32, {', '.join(QUANTIZER_TYPES)}")
+
+    index = vector_store.index
+    vectors = index.reconstruct_n(0, index.ntotal)
+    write_full_precision_vectors(vectors_path, vectors)
+
+    quantized_index = faiss.IndexScalarQuantizer(index.d, QUANTIZER_TYPES[storage], index.metric_type)
+    quantized_index.train(vectors)  # Learns per-dimension ranges for int8, no-op for float16
+    quantized_index.add(vectors)
+    vector_store.index = quantized_index
+
+    logging.info(f"Quantized {index.ntotal} vectors to {storage} "
+                 f"({index.d * 4} -> {quantized_index.sa_code_size()} bytes per vector)")
+    return vector_store
+
+def write_full_precision_vectors(vectors_path: str, vectors):
+    """Overwrite the float32 side file with the given vectors."""
+    os.makedirs(os.path.dirname(vectors_path) or ".", exist_ok=True)
+    with open(vectors_path, "wb") as f:
+        f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+def append_full_precision_vectors(vectors_path: str, vectors):
+    """Append float32 vectors to the side file, in the same order they were added to the index."""
+    os.makedirs(os.path.dirname(vectors_path) or ".", exist_ok=True)
+    with open(vectors_path, "ab") as f:
+        f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+def load_full_precision_vectors(vectors_path: str, dim: int, expected_rows: int):
+    """Memory-map the float32 side file, or return None if it is missing or out of sync with the index."""
+    if not os.path.exists(vectors_path):
+        logging.warning(f"No float32 vectors found at {vectors_path}; re-scoring disabled")
+        return None
+
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode="r")
+    if vectors.size != dim * expected_rows:
+        logging.warning(f"Float32 vectors at {vectors_path} do not match the index ({vectors.size // dim} vs {expected_rows} rows); re-scoring disabled")
+        return None
+    return vectors.reshape(expected_rows, dim)
+
+def rescore_candidates(query_vectors, candidate_ids, full_vectors, top_k, metric_type=faiss.METRIC_L2):
+    """
+    Re-rank candidate ids with exact float32 scores.
+
+    Parameters:
+        query_vectors (np.ndarray): (n_queries, d) float32 query matrix.
+        candidate_ids (np.ndarray): (n_queries, n_candidates) ids returned by the quantized index.
+        full_vectors (np.ndarray): (ntotal, d) float32 vectors, usually a memmap.
+        top_k (int): Number of results to keep per query.
+        metric_type (int): FAISS metric of the index.
+
+    Returns:
+        tuple: (scores, ids) arrays of shape (n_queries, top_k), best first, padded with -1 ids.
+    """
+    n_queries = query_vectors.shape[0]
+    out_scores = np.full((n_queries, top_k), np.nan, dtype=np.float32)
+    out_ids = np.full((n_queries, top_k), -1, dtype=np.int64)
+
+    for row, (query_vector, ids) in enumerate(zip(query_vectors, candidate_ids)):
+        ids = np.sort(ids[ids >= 0])  # Sorted ids keep memmap reads sequential
+        if ids.size == 0:
+            continue
+        candidates = np.asarray(full_vectors[ids])
+        if metric_type == faiss.METRIC_INNER_PRODUCT:
+            scores = candidates @ query_vector
+            order = np.argsort(-scores)[:top_k]
+        else:
+            scores = ((candidates - query_vector) ** 2).sum(axis=1)
+            order = np.argsort(scores)[:top_k]
+        out_scores[row, :len(order)] = scores[order]
+        out_ids[row, :len(order)] = ids[order]
+
+    return out_scores, out_ids
@@ -1,17 +1,66 @@
 import logging
 import numpy as np
+import faiss
 from transformers import pipeline
 
 from config import ConfigConstants
+from retriever.quantize_index import rescore_candidates
+
+def _use_rescoring(vector_store):
+    return bool(ConfigConstants.RESCORE_CANDIDATES) and getattr(vector_store, "full_precision_vectors", None) is not None
 
 def retrieve_top_k_documents(vector_store, query, top_k=5):
-    documents = vector_store.similarity_search(query, k=top_k)
+    if _use_rescoring(vector_store):
+        # Quantized index: re-score the top candidates with the float32 vectors
+        documents = retrieve_top_k_documents_batch(vector_store, [query], top_k)[0]
+    else:
+        documents = vector_store.similarity_search(query, k=top_k)
     logging.info(f"Top {top_k} documents reterived for query")
 
     #documents = rerank_documents(query, documents)
     
     return documents 
 
+def retrieve_top_k_documents_batch(vector_store, queries, top_k=5):
+    """
+    Retrieve the top-k documents for many queries with one embedding call and one index search.
+
+    Parameters:
+        vector_store (FAISS): The vector store containing the FAISS index and docstore.
+        queries (list): The query strings.
+        top_k (int): The number of documents to retrieve per query.
+
+    Returns:
+        list: One list of Document objects per query, in the same order as `queries`.
+    """
+    if not queries:
+        return []
+
+    # Embed all queries in a single batched model call
+    query_vectors = np.array(vector_store.embedding_function.embed_documents(list(queries)), dtype='float32')
+    if getattr(vector_store, "_normalize_L2", False):
+        faiss.normalize_L2(query_vectors)
+
+    # Search the whole query matrix at once
+    if _use_rescoring(vector_store):
+        _, candidate_ids = vector_store.index.search(query_vectors, max(ConfigConstants.RESCORE_CANDIDATES, top_k))
+        _, indices = rescore_candidates(query_vectors, candidate_ids, vector_store.full_precision_vectors,
+                                        top_k, vector_store.index.metric_type)
+    else:
+        _, indices = vector_store.index.search(query_vectors, top_k)
+
+    results = []
+    for row in indices:
+        documents = []
+        for idx in row:
+            if idx == -1:  # FAISS returns -1 when fewer than top_k vectors exist
+                continue
+            documents.append(vector_store.docstore.search(vector_store.index_to_docstore_id[idx]))
+        results.append(documents)
+
+    logging.info(f"Top {top_k} documents reterived for {len(queries)} queries")
+    return results
+
 # Reranking: Cross-Encoder for refining top-k results
 def rerank_documents(query, documents):
     """